@@ -0,0 +1,220 @@
+"""
+Cluster health analysis for the Kubernetes MCP Server
+
+analyze_cluster takes pods, nodes, deployments and (warning) events decoded
+into the compact models of models.py and builds a structured health report
+in one pass over each list. Nodes, owners and events are put in dicts
+first so every pod is joined to its node, owning workload and recent
+warnings with constant-time lookups; the whole analysis stays linear in
+the number of objects.
+"""
+
+from datetime import datetime, timezone
+
+# Pod statuses that are not a problem on their own
+HEALTHY_POD_STATUSES = {"Running", "Completed", "Succeeded"}
+
+# Container statuses that mean the pod cannot make progress without help
+CRITICAL_POD_STATUSES = {
+    "CrashLoopBackOff", "ImagePullBackOff", "ErrImagePull", "InvalidImageName",
+    "CreateContainerConfigError", "CreateContainerError", "OOMKilled", "Error", "Evicted",
+}
+
+# Restarts at or above this count are reported even for running pods
+RESTART_THRESHOLD = 5
+
+# Findings included in the report; the rest are only counted
+MAX_FINDINGS = 200
+
+# Pod phases counted per namespace
+PHASE_COUNTS = {"Running": "running", "Pending": "pending", "Failed": "failed", "Succeeded": "succeeded"}
+
+
+def index_events(events):
+    """Warning events keyed by (namespace, kind, name) -> {count, reason, message, last_seen}"""
+    index = {}
+    for event in events:
+        if event.type != "Warning":
+            continue
+        key = (event.namespace, event.kind, event.name)
+        entry = index.get(key)
+        if entry is None:
+            index[key] = {"count": event.count, "reason": event.reason, "message": event.message, "last_seen": event.last_seen}
+        else:
+            entry["count"] += event.count
+            if event.last_seen >= entry["last_seen"]:
+                entry.update(reason=event.reason, message=event.message, last_seen=event.last_seen)
+    return index
+
+
+def count_pods(pods):
+    """Per-namespace pod, phase and restart totals"""
+    counts = {}
+    for pod in pods:
+        entry = counts.get(pod.namespace)
+        if entry is None:
+            entry = counts[pod.namespace] = {
+                "pods": 0, "running": 0, "pending": 0, "failed": 0, "succeeded": 0, "restarts": 0,
+            }
+        entry["pods"] += 1
+        entry["restarts"] += pod.restarts
+        phase = PHASE_COUNTS.get(pod.phase)
+        if phase is not None:
+            entry[phase] += 1
+    return counts
+
+
+def _rollup():
+    return {
+        "pods": 0, "running": 0, "pending": 0, "failed": 0, "succeeded": 0, "unhealthy_pods": 0,
+        "restarts": 0, "deployments": 0, "degraded_deployments": 0, "warning_events": 0,
+    }
+
+
+def analyze_cluster(pods, nodes, deployments, events, now=None, pod_counts=None):
+    """Compute a JSON-serializable health report
+
+    pod_counts, if given, holds count_pods() of every pod and pods only those
+    that may be unhealthy (the columnar pod table preselects them).
+    """
+    now = now or datetime.now(timezone.utc)
+    namespaces = {}
+
+    def rollup(namespace):
+        entry = namespaces.get(namespace)
+        if entry is None:
+            entry = namespaces[namespace] = _rollup()
+        return entry
+
+    events_by_object = index_events(events)
+    for (namespace, _, _), entry in events_by_object.items():
+        if namespace:
+            rollup(namespace)["warning_events"] += entry["count"]
+
+    node_findings = []
+    node_state = {}
+    for node in nodes:
+        node_state[node.name] = node.ready
+        if not node.ready or node.problems or node.unschedulable:
+            node_findings.append({
+                "name": node.name,
+                "ready": node.ready,
+                "conditions": node.problems,
+                "unschedulable": node.unschedulable,
+                "events": events_by_object.get((None, "Node", node.name)),
+                "pods": 0,
+            })
+    node_findings_by_name = {finding["name"]: finding for finding in node_findings}
+
+    if pod_counts is None:
+        pod_counts = count_pods(pods)
+    for namespace, counted in pod_counts.items():
+        counts = rollup(namespace)
+        for field, value in counted.items():
+            counts[field] += value
+
+    findings = []
+    unhealthy_by_owner = {}
+    for pod in pods:
+        namespace = pod.namespace
+        counts = rollup(namespace)
+        phase = pod.phase
+        restarts = pod.restarts
+
+        node = pod.node
+        if node in node_findings_by_name:
+            node_findings_by_name[node]["pods"] += 1
+        status = pod.status
+        ready, total = pod.ready, pod.containers
+        reasons = []
+        severity = None
+        if status in CRITICAL_POD_STATUSES or (status.startswith("Init:") and status[5:] in CRITICAL_POD_STATUSES):
+            severity = "critical"
+            reasons.append(status)
+        elif status not in HEALTHY_POD_STATUSES:
+            severity = "warning"
+            reasons.append(status)
+        elif status == "Running" and ready < total:
+            severity = "warning"
+            reasons.append(f"{ready}/{total} containers ready")
+        if restarts >= RESTART_THRESHOLD:
+            severity = severity or "warning"
+            reasons.append(f"{restarts} restarts")
+        if node and node_state.get(node) is False and phase in ("Running", "Pending"):
+            severity = "critical"
+            reasons.append(f"node {node} is NotReady")
+        if severity is None:
+            continue
+
+        counts["unhealthy_pods"] += 1
+        owner = pod.owner
+        if owner is not None:
+            owner_key = (namespace, owner[0], owner[1])
+            unhealthy_by_owner[owner_key] = unhealthy_by_owner.get(owner_key, 0) + 1
+        findings.append({
+            "severity": severity,
+            "kind": "Pod",
+            "namespace": namespace,
+            "name": pod.name,
+            "status": status,
+            "reasons": reasons,
+            "ready": f"{ready}/{total}",
+            "restarts": restarts,
+            "last_termination_reason": pod.last_termination_reason,
+            "node": node,
+            "owner": f"{owner[0]}/{owner[1]}" if owner else None,
+            "events": events_by_object.get((namespace, "Pod", pod.name)),
+        })
+
+    for deployment in deployments:
+        namespace = deployment.namespace
+        name = deployment.name
+        counts = rollup(namespace)
+        counts["deployments"] += 1
+        desired = deployment.desired
+        available = deployment.available
+        ready = deployment.ready
+        failing = deployment.failing
+        unhealthy_pods = unhealthy_by_owner.get((namespace, "Deployment", name), 0)
+        if ready >= desired and available >= desired and not failing:
+            continue
+        counts["degraded_deployments"] += 1
+        findings.append({
+            "severity": "critical" if desired and not available else "warning",
+            "kind": "Deployment",
+            "namespace": namespace,
+            "name": name,
+            "reasons": [f"{ready}/{desired} replicas ready", f"{available}/{desired} available"] + failing,
+            "unhealthy_pods": unhealthy_pods,
+            "events": events_by_object.get((namespace, "Deployment", name)),
+        })
+
+    findings.sort(key=lambda f: (f["severity"] != "critical", f["namespace"] or "", f["kind"], f["name"] or ""))
+    critical = sum(1 for f in findings if f["severity"] == "critical")
+    nodes_ready = sum(1 for ready in node_state.values() if ready)
+    if critical or (nodes and not nodes_ready):
+        overall = "Critical"
+    elif findings or node_findings:
+        overall = "Degraded"
+    else:
+        overall = "Healthy"
+
+    return {
+        "status": overall,
+        "generated_at": now.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "summary": {
+            "nodes": len(nodes),
+            "nodes_ready": nodes_ready,
+            "pods": sum(counts["pods"] for counts in pod_counts.values()),
+            "unhealthy_pods": sum(counts["unhealthy_pods"] for counts in namespaces.values()),
+            "deployments": len(deployments),
+            "degraded_deployments": sum(counts["degraded_deployments"] for counts in namespaces.values()),
+            "warning_events": sum(entry["count"] for entry in events_by_object.values()),
+            "critical_findings": critical,
+            "findings": len(findings),
+        },
+        "nodes": node_findings,
+        "findings": findings[:MAX_FINDINGS],
+        "findings_truncated": max(len(findings) - MAX_FINDINGS, 0),
+        "namespaces": {namespace: namespaces[namespace] for namespace in sorted(namespaces, key=str)},
+    }
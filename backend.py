@@ -0,0 +1,513 @@
+"""
+Cluster backends for the Kubernetes MCP Server
+
+A backend performs raw GET requests against the Kubernetes API. Two
+implementations are provided:
+
+- ApiBackend talks to the API server in-process through the official
+  kubernetes client, reusing one keep-alive HTTP connection pool for all
+  requests.
+- KubectlBackend forks `kubectl get --raw` per request and is used as a
+  fallback when the kubernetes client or a kubeconfig is not available.
+
+Both speak the same URL paths, so the handlers never care which one is in use.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import subprocess
+import threading
+import time
+from urllib.parse import quote, urlencode
+
+from executor import terminate
+from instrumentation import UpstreamMetrics
+from models import decode_page, loads, page_continue
+
+# Lines buffered between a streaming response's reader thread and its consumer
+STREAM_QUEUE_SIZE = 256
+
+# kind -> (API prefix, resource plural, namespaced, object kind)
+KINDS = {
+    "pods": ("/api/v1", "pods", True, "Pod"),
+    "services": ("/api/v1", "services", True, "Service"),
+    "nodes": ("/api/v1", "nodes", False, "Node"),
+    "events": ("/api/v1", "events", True, "Event"),
+    "endpoints": ("/api/v1", "endpoints", True, "Endpoints"),
+    "deployments": ("/apis/apps/v1", "deployments", True, "Deployment"),
+    "replicasets": ("/apis/apps/v1", "replicasets", True, "ReplicaSet"),
+    "statefulsets": ("/apis/apps/v1", "statefulsets", True, "StatefulSet"),
+    "daemonsets": ("/apis/apps/v1", "daemonsets", True, "DaemonSet"),
+    "jobs": ("/apis/batch/v1", "jobs", True, "Job"),
+    "nodemetrics": ("/apis/metrics.k8s.io/v1beta1", "nodes", False, "NodeMetrics"),
+    "podmetrics": ("/apis/metrics.k8s.io/v1beta1", "pods", True, "PodMetrics"),
+    "endpointslices": ("/apis/discovery.k8s.io/v1", "endpointslices", True, "EndpointSlice"),
+}
+
+
+class BackendError(Exception):
+    """A request to the cluster failed"""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+def api_path(kind, namespace=None, name=None, subresource=None):
+    """Build the API path for a kind, optionally scoped to a namespace/object"""
+    prefix, plural, namespaced, _ = KINDS[kind]
+    path = prefix
+    if namespaced and namespace:
+        path += f"/namespaces/{quote(namespace, safe='')}"
+    path += f"/{plural}"
+    if name:
+        path += f"/{quote(name, safe='')}"
+    if subresource:
+        path += f"/{subresource}"
+    return path
+
+
+def build_url(path, query=None):
+    """Append non-empty query parameters to an API path"""
+    params = {k: v for k, v in (query or {}).items() if v is not None and v != ""}
+    if not params:
+        return path
+    return path + "?" + urlencode({k: _query_value(v) for k, v in params.items()})
+
+
+def _query_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+class Backend:
+    """Interface implemented by every cluster backend"""
+
+    name = "base"
+
+    def __init__(self, executor, context=None):
+        self.executor = executor
+        self.context = context
+        self.upstream = UpstreamMetrics()
+
+    async def request(self, path, query=None, timeout=None):
+        """GET an API path and return the raw response body as bytes"""
+        started = time.perf_counter()
+        body = None
+        try:
+            body = await self.fetch(path, query, timeout)
+            return body
+        finally:
+            self.upstream.observe(
+                request_label(path), time.perf_counter() - started, len(body) if body is not None else 0, body is None
+            )
+
+    async def fetch(self, path, query, timeout):
+        """Perform the GET behind request()"""
+        raise NotImplementedError
+
+    async def list(self, kind, namespace=None, timeout=None, **query):
+        """List objects of a kind, decoded into a dict"""
+        raw = await self.request(api_path(kind, namespace), query, timeout=timeout)
+        return loads(raw)
+
+    async def list_pages(self, kind, namespace=None, limit=500, timeout=None, **query):
+        """Async iterator over decoded LIST pages of at most `limit` objects
+
+        Pages are decoded on a worker thread so large lists never stall the
+        event loop, and only one page is held in memory at a time.
+        """
+        loop = asyncio.get_running_loop()
+        token = query.pop("continue", None)
+        while True:
+            raw = await self.request(
+                api_path(kind, namespace), dict(query, limit=limit, **{"continue": token}), timeout=timeout
+            )
+            page = await loop.run_in_executor(None, loads, raw)
+            del raw
+            yield page
+            token = page.get("metadata", {}).get("continue")
+            if not token:
+                break
+
+    async def get(self, kind, name, namespace=None, timeout=None):
+        """Get a single object, decoded into a dict"""
+        raw = await self.request(api_path(kind, namespace, name), timeout=timeout)
+        return loads(raw)
+
+    async def list_models(self, kind, model, namespace=None, limit=500, timeout=None, **query):
+        """List objects of a kind as compact models (see models.py)
+
+        Each page is decoded and reduced to models on a worker thread, so
+        only one page of full objects is ever held in memory. The continue
+        token is read from the page's leading metadata so the next page is
+        already being fetched while this one is decoded.
+        """
+        loop = asyncio.get_running_loop()
+        path = api_path(kind, namespace)
+
+        def fetch(token):
+            return asyncio.ensure_future(self.request(path, dict(query, limit=limit, **{"continue": token}), timeout=timeout))
+
+        items = []
+        fetching = fetch(query.pop("continue", None))
+        try:
+            while fetching is not None:
+                raw = await fetching
+                known, token = page_continue(raw)
+                fetching = fetch(token) if token else None
+                models, token = await loop.run_in_executor(None, decode_page, raw, model)
+                del raw
+                items += models
+                if not known and token:
+                    fetching = fetch(token)
+            return items
+        finally:
+            if fetching is not None:
+                fetching.cancel()
+
+    async def logs(self, namespace, pod, timeout=None, **query):
+        """Fetch container logs as text"""
+        raw = await self.request(api_path("pods", namespace, pod, "log"), query, timeout=timeout)
+        return raw.decode("utf-8", errors="replace")
+
+    def stream_logs(self, namespace, pod, timeout=None, **query):
+        """Async iterator over container log lines (bytes, without newlines)"""
+        timeout = self.executor.timeout if timeout is None else timeout
+        return self.stream_lines(api_path("pods", namespace, pod, "log"), query, timeout)
+
+    def watch(self, kind, resource_version, timeout_seconds=300):
+        """Async iterator of decoded watch events for a kind, starting after resource_version"""
+        query = {
+            "watch": True,
+            "resourceVersion": resource_version,
+            "allowWatchBookmarks": True,
+            "timeoutSeconds": timeout_seconds,
+        }
+        return self.stream_lines(api_path(kind), query, timeout_seconds + 30, decode=loads)
+
+    async def stream_lines(self, path, query, timeout, decode=None):
+        """Async iterator over the lines of a streaming GET response
+
+        Lines are yielded without their newline. With decode, blank lines are
+        skipped and every other line is passed through decode.
+        """
+        stats = self.upstream.stream(request_label(path))
+        lines = self.open_lines(path, query, timeout)
+        try:
+            async for line in lines:
+                stats.lines += 1
+                stats.bytes += len(line)
+                if decode is None:
+                    yield line
+                elif line.strip():
+                    yield decode(line)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            await lines.aclose()
+
+    def open_lines(self, path, query, timeout):
+        """Async iterator over the raw lines behind stream_lines()"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any pooled resources"""
+
+
+class KubectlBackend(Backend):
+    """Backend that forks `kubectl get --raw` for every request"""
+
+    name = "kubectl"
+
+    def __init__(self, executor, kubectl="kubectl", context=None):
+        super().__init__(executor, context)
+        self.kubectl = kubectl
+
+    def command(self, *args):
+        """Build a kubectl command line honouring the configured context"""
+        cmd = [self.kubectl]
+        if self.context:
+            cmd += ["--context", self.context]
+        return cmd + list(args)
+
+    async def fetch(self, path, query, timeout):
+        result = await self.executor.run(
+            self.command("get", "--raw", build_url(path, query)), timeout=timeout, text=False
+        )
+        if result.returncode != 0:
+            message = result.stderr.decode("utf-8", errors="replace").strip()
+            raise BackendError(message or f"kubectl exited with {result.returncode}", _kubectl_status(message))
+        return result.stdout
+
+    async def open_lines(self, path, query, timeout):
+        proc = await self.executor.spawn(self.command("get", "--raw", build_url(path, query)))
+        try:
+            while True:
+                line = await asyncio.wait_for(proc.stdout.readline(), timeout)
+                if not line:
+                    break
+                yield line.rstrip(b"\n")
+            stderr = await proc.stderr.read()
+            await proc.wait()
+            if proc.returncode != 0:
+                message = stderr.decode("utf-8", errors="replace").strip()
+                raise BackendError(message or f"kubectl exited with {proc.returncode}", _kubectl_status(message))
+        finally:
+            await terminate(proc)
+
+
+# kubectl reports API errors as "Error from server (Reason): ..."
+_KUBECTL_REASONS = {
+    "(BadRequest)": 400,
+    "(Unauthorized)": 401,
+    "(Forbidden)": 403,
+    "(NotFound)": 404,
+    "(Gone)": 410,
+    "(Expired)": 410,
+    "(TooManyRequests)": 429,
+}
+
+
+def _kubectl_status(message):
+    for reason, status in _KUBECTL_REASONS.items():
+        if reason in message:
+            return status
+    return None
+
+
+class ApiBackend(Backend):
+    """In-process backend built on the kubernetes client's connection pool"""
+
+    name = "api"
+
+    def __init__(self, executor, context=None, pool_size=None):
+        super().__init__(executor, context)
+        from kubernetes import client
+        from kubernetes import config as kube_config
+
+        configuration = client.Configuration()
+        try:
+            kube_config.load_kube_config(context=context, client_configuration=configuration)
+        except Exception:
+            if context:
+                raise
+            kube_config.load_incluster_config(client_configuration=configuration)
+        # One keep-alive pool shared by every request; size it to the
+        # executor so concurrent calls never queue on connections.
+        configuration.connection_pool_maxsize = pool_size or executor.max_concurrency
+        self.configuration = configuration
+        self.api_client = client.ApiClient(configuration)
+        self.pool = self.api_client.rest_client.pool_manager
+
+    def headers(self):
+        """Request headers including credentials (refreshed when they expire)"""
+        headers = {"Accept": "application/json"}
+        token = self.configuration.get_api_key_with_prefix("authorization")
+        if token:
+            headers["Authorization"] = token
+        elif self.configuration.username and self.configuration.password:
+            headers["Authorization"] = self.configuration.get_basic_auth_token()
+        return headers
+
+    def open(self, path, query=None, timeout=None, stream=False):
+        """Issue a blocking GET on the shared pool and return the urllib3 response"""
+        response = self.pool.request(
+            "GET",
+            self.configuration.host + build_url(path, query),
+            headers=self.headers(),
+            preload_content=not stream,
+            timeout=timeout,
+        )
+        if response.status >= 400:
+            body = response.data if not stream else response.read()
+            response.release_conn()
+            raise BackendError(_api_error_message(response.status, body), response.status)
+        return response
+
+    def _get(self, path, query, timeout):
+        response = self.open(path, query, timeout)
+        return response.data
+
+    async def fetch(self, path, query, timeout):
+        timeout = self.executor.timeout if timeout is None else timeout
+        return await self.executor.run_blocking(self._get, path, query, timeout, timeout=timeout)
+
+    async def open_lines(self, path, query, timeout):
+        loop = asyncio.get_running_loop()
+        # Bounded so a fast stream (e.g. a followed log) waits for the
+        # consumer instead of buffering without limit.
+        queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        closed = threading.Event()
+        opened = {}
+
+        def put(item):
+            """Hand an item to the consumer; False once it has gone away"""
+            try:
+                future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+            except RuntimeError:
+                return False  # loop already closed
+            while not closed.is_set():
+                try:
+                    future.result(timeout=0.5)
+                    return True
+                except concurrent.futures.TimeoutError:
+                    continue
+                except concurrent.futures.CancelledError:
+                    return False
+            future.cancel()
+            return False
+
+        def pump():
+            # The request and all blocking reads happen on a dedicated thread
+            # so long-lived streams never occupy a worker slot and many can be
+            # opened at once.
+            try:
+                response = self.open(path, query, timeout, True)
+            except Exception as e:
+                put(e)
+                return
+            opened["response"] = response
+            if closed.is_set():
+                _drop(response)
+                return
+            try:
+                for line in _iter_lines(_iter_chunks(response)):
+                    if not put(line):
+                        return
+            except Exception as e:
+                put(e)
+            else:
+                response.release_conn()
+                put(None)
+
+        threading.Thread(target=pump, name=f"stream {path}", daemon=True).start()
+        finished = False
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    finished = True
+                    break
+                if isinstance(item, BackendError):
+                    raise item
+                if isinstance(item, Exception):
+                    raise BackendError(f"stream {path} failed: {item}")
+                yield item
+        finally:
+            closed.set()
+            response = opened.get("response")
+            if response is not None and not finished:
+                # Abandoned mid-stream: unblock the reader thread and drop the
+                # connection rather than returning it to the pool half-read.
+                _drop(response)
+
+    def close(self):
+        self.pool.clear()
+
+
+def request_label(path):
+    """Metrics label of an API path: its resource (and subresource), without names
+
+    /api/v1/namespaces/ns/pods/p/log -> pods/log,
+    /apis/metrics.k8s.io/v1beta1/nodes -> metrics.k8s.io/nodes
+    """
+    parts = path.strip("/").split("/")
+    if parts[0] == "apis":
+        group, rest = parts[1] + "/", parts[3:]
+    else:
+        group, rest = "", parts[2:]
+    if len(rest) > 2 and rest[0] == "namespaces":
+        rest = rest[2:]
+    if not rest:
+        return group + "discovery"
+    label = rest[0]
+    if len(rest) > 2:
+        label += "/" + rest[2]
+    return group + label
+
+
+def _drop(response):
+    """Close a streaming response without returning its connection to the pool"""
+    try:
+        getattr(response, "shutdown", response.close)()
+    except Exception:
+        pass
+    response.close()
+
+
+def _iter_chunks(response, size=64 * 1024):
+    """Yield body chunks as soon as they arrive
+
+    stream() returns chunked responses (what the API server sends for
+    watches and followed logs) chunk by chunk, but for other responses it
+    waits for `size` bytes; read1() returns whatever is available instead.
+    """
+    if response.chunked or not hasattr(response, "read1"):
+        yield from response.stream(size)
+        return
+    while True:
+        chunk = response.read1(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_lines(chunks):
+    """Split a byte stream into newline-terminated lines"""
+    parts = []
+    for chunk in chunks:
+        start = 0
+        end = chunk.find(b"\n")
+        while end >= 0:
+            parts.append(chunk[start:end])
+            yield b"".join(parts)
+            parts = []
+            start = end + 1
+            end = chunk.find(b"\n", start)
+        if start < len(chunk):
+            parts.append(chunk[start:])
+    if parts:
+        yield b"".join(parts)
+
+
+def _api_error_message(status, body):
+    try:
+        return json.loads(body).get("message") or f"HTTP {status}"
+    except (ValueError, AttributeError):
+        return f"HTTP {status}: {body[:200]!r}"
+
+
+def create_backend(config, executor, context=None):
+    """Pick a backend according to K8S_MCP_BACKEND (auto, api or kubectl)"""
+    context = context or config.context
+    if config.backend in ("auto", "api"):
+        try:
+            return ApiBackend(executor, context=context)
+        except Exception:
+            if config.backend == "api":
+                raise
+    return KubectlBackend(executor, kubectl=config.kubectl, context=context)
+
+
+def kubeconfig_contexts(config):
+    """(context names, current context) defined in the kubeconfig"""
+    if config.backend in ("auto", "api"):
+        try:
+            from kubernetes import config as kube_config
+
+            contexts, current = kube_config.list_kube_config_contexts()
+            return [context["name"] for context in contexts], (current or {}).get("name")
+        except Exception:
+            if config.backend == "api":
+                raise
+    names = subprocess.run(
+        [config.kubectl, "config", "get-contexts", "-o", "name"], capture_output=True, text=True, check=True
+    ).stdout.split()
+    current = subprocess.run(
+        [config.kubectl, "config", "current-context"], capture_output=True, text=True
+    ).stdout.strip()
+    return names, current or None
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3.11
+"""
+Decoding benchmark: plain json vs orjson vs the compact models
+
+For each kind, a LIST body from the synthetic cluster is decoded five ways:
+
+- json: json.loads into nested dicts (what the analyses used to receive)
+- orjson: orjson.loads into the same dicts (skipped if orjson is missing)
+- loads: models.loads, orjson or json with garbage collection paused
+- models: models.decode_items, the whole list at once
+- models paged: models.decode_page over pages of --page-size items, the way
+  Backend.list_models reads a LIST
+
+Reported per way: best-of-N decode time, peak traced memory while decoding
+and the memory still held by the result.
+
+    python3.11 bench/decode.py --pods 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fakecluster import FakeCluster  # noqa: E402
+from models import MODELS, decode_items, decode_page, loads, orjson  # noqa: E402
+
+KIND_PATHS = {
+    "pods": "/api/v1/pods",
+    "nodes": "/api/v1/nodes",
+    "services": "/api/v1/services",
+    "endpointslices": "/apis/discovery.k8s.io/v1/endpointslices",
+    "deployments": "/apis/apps/v1/deployments",
+    "events": "/api/v1/events",
+}
+
+
+def body(cluster, path):
+    status, _, chunks = cluster.handle(path)
+    if status != 200:
+        raise RuntimeError(f"{path}: HTTP {status}")
+    return b"".join(chunks)
+
+
+def decoders(cluster, kind, page_size):
+    model = MODELS[kind]
+    whole = body(cluster, KIND_PATHS[kind])
+    pages = []
+    token = None
+    while True:
+        suffix = f"?limit={page_size}" + (f"&continue={token}" if token else "")
+        raw = body(cluster, KIND_PATHS[kind] + suffix)
+        pages.append(raw)
+        token = json.loads(raw)["metadata"].get("continue")
+        if not token:
+            break
+
+    def paged():
+        items = []
+        for raw in pages:
+            items += decode_page(raw, model)[0]
+        return items
+
+    ways = {"json": lambda: json.loads(whole)["items"]}
+    if orjson is not None:
+        ways["orjson"] = lambda: orjson.loads(whole)["items"]
+    ways["loads"] = lambda: loads(whole)["items"]
+    ways["models"] = lambda: decode_items(whole, model)
+    ways["models paged"] = paged
+    return len(whole), ways
+
+
+def measure(decode, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = decode()
+        best = min(best, time.perf_counter() - started)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = decode()
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = len(result)
+    del result
+    return best, peak - baseline, held - baseline, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare json, orjson and compact-model decoding")
+    parser.add_argument("--pods", type=int, default=10000, help="pods in the synthetic cluster")
+    parser.add_argument("--kinds", default=",".join(KIND_PATHS), help="comma-separated kinds")
+    parser.add_argument("--page-size", type=int, default=500, help="items per page for the paged decoder")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per decoder (best is reported)")
+    args = parser.parse_args()
+
+    cluster = FakeCluster(args.pods)
+    print(f"{'KIND':<16} {'DECODER':<14} {'ITEMS':>7} {'INPUT MB':>9} {'MS':>9} {'PEAK MB':>9} {'HELD MB':>9}")
+    for kind in args.kinds.split(","):
+        size, ways = decoders(cluster, kind, args.page_size)
+        for name, decode in ways.items():
+            seconds, peak, held, count = measure(decode, args.repeat)
+            print(
+                f"{kind:<16} {name:<14} {count:>7} {size / 2 ** 20:>9.1f} {seconds * 1000:>9.1f} "
+                f"{peak / 2 ** 20:>9.1f} {held / 2 ** 20:>9.1f}",
+                flush=True,
+            )
+    if orjson is None:
+        print("\norjson is not installed; models fall back to the json module")
+
+
+if __name__ == "__main__":
+    main()
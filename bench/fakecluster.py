@@ -0,0 +1,635 @@
+#!/usr/bin/env python3.11
+"""
+Deterministic synthetic Kubernetes API server for benchmarks
+
+FakeCluster answers the GET requests the MCP server makes (lists with
+paging and selectors, single objects, pod logs, watches and metrics.k8s.io)
+for a cluster of any number of pods. Objects are generated from their index
+on demand from pre-encoded JSON templates, so a 100k-pod LIST costs the
+fake server little CPU and no memory beyond the page being written, while
+the objects themselves are full-sized (labels, owner references, managed
+fields, two containers with env and resources, conditions and container
+statuses; about 4 KiB per pod, like a real cluster).
+
+Run it standalone to get an API server and a kubeconfig pointing at it:
+
+    python3.11 bench/fakecluster.py --pods 10000 --port 18080 --kubeconfig /tmp/bench-kubeconfig
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Objects per chunk written to the socket for unpaged lists
+WRITE_BATCH = 1000
+
+
+def _timestamp(seconds_ago):
+    """Timestamps are relative to now, so ages and event windows look like a live cluster's"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - seconds_ago))
+
+
+def _template(obj, integers=()):
+    """Encode obj into a %-format string; "@name@" strings become %(name)s, integer fields %(name)d"""
+    text = json.dumps(obj).replace("%", "%%")
+    for name in integers:
+        text = text.replace(f'"@{name}@"', f"%({name})d")
+    while "@" in text:
+        start = text.index("@")
+        end = text.index("@", start + 1)
+        text = text[:start] + f"%({text[start + 1:end]})s" + text[end + 1:]
+    return text
+
+
+def _container_status(name, state, restarts, last_state=None):
+    return {
+        "name": name,
+        "ready": state == "running",
+        "restartCount": restarts,
+        "image": f"registry.example.com/{name}:1.@minor@",
+        "imageID": "@image_id@",
+        "containerID": "containerd://@digest@",
+        "started": state == "running",
+        "state": (
+            {"running": {"startedAt": "@started@"}} if state == "running"
+            else {"waiting": {"reason": state, "message": f"{state} for container {name}"}}
+        ),
+        "lastState": last_state or {},
+    }
+
+
+def _pod_template(state):
+    """Pod JSON template for one lifecycle state"""
+    phase = {"running": "Running", "CrashLoopBackOff": "Running", "Pending": "Pending", "Succeeded": "Succeeded"}[state]
+    crashed = {"terminated": {"exitCode": 137, "reason": "OOMKilled", "startedAt": "@started@", "finishedAt": "@started@"}}
+    main_state = "running" if state in ("running", "Succeeded") else ("ContainerCreating" if state == "Pending" else state)
+    statuses = [
+        _container_status("main", main_state, "@restarts@", crashed if state == "CrashLoopBackOff" else None),
+        _container_status("sidecar", "running" if state != "Pending" else "ContainerCreating", 0),
+    ]
+    if state == "Succeeded":
+        for status in statuses:
+            status["state"] = {"terminated": {"exitCode": 0, "reason": "Completed", "startedAt": "@started@", "finishedAt": "@started@"}}
+            status["ready"] = False
+    containers = [
+        {
+            "name": "main",
+            "image": "registry.example.com/main:1.@minor@",
+            "ports": [{"containerPort": 8080, "protocol": "TCP", "name": "http"}],
+            "env": [
+                {"name": "APP_NAME", "value": "@app@"},
+                {"name": "LOG_LEVEL", "value": "info"},
+                {"name": "POD_NAME", "valueFrom": {"fieldRef": {"apiVersion": "v1", "fieldPath": "metadata.name"}}},
+            ],
+            "resources": {"requests": {"cpu": "100m", "memory": "128Mi"}, "limits": {"cpu": "500m", "memory": "512Mi"}},
+            "volumeMounts": [{"name": "kube-api-access", "mountPath": "/var/run/secrets/kubernetes.io/serviceaccount", "readOnly": True}],
+            "readinessProbe": {"httpGet": {"path": "/healthz", "port": 8080, "scheme": "HTTP"}, "periodSeconds": 10},
+            "imagePullPolicy": "IfNotPresent",
+        },
+        {
+            "name": "sidecar",
+            "image": "registry.example.com/sidecar:1.@minor@",
+            "ports": [{"containerPort": 9090, "protocol": "TCP", "name": "metrics"}],
+            "resources": {"requests": {"cpu": "10m", "memory": "32Mi"}},
+            "imagePullPolicy": "IfNotPresent",
+        },
+    ]
+    ready = "True" if state == "running" else "False"
+    pod = {
+        "kind": "Pod",
+        "apiVersion": "v1",
+        "metadata": {
+            "name": "@name@",
+            "namespace": "@namespace@",
+            "uid": "@uid@",
+            "resourceVersion": "@version@",
+            "creationTimestamp": "@created@",
+            "generateName": "@owner@-",
+            "labels": {"app": "@app@", "pod-template-hash": "@hash@", "tier": "backend"},
+            "annotations": {"kubectl.kubernetes.io/restartedAt": "@created@", "prometheus.io/scrape": "true"},
+            "ownerReferences": [{
+                "apiVersion": "apps/v1", "kind": "ReplicaSet", "name": "@owner@", "uid": "@owner_uid@",
+                "controller": True, "blockOwnerDeletion": True,
+            }],
+            "managedFields": [{
+                "manager": "kube-controller-manager", "operation": "Update", "apiVersion": "v1", "time": "@created@",
+                "fieldsType": "FieldsV1",
+                "fieldsV1": {"f:metadata": {"f:generateName": {}, "f:labels": {".": {}, "f:app": {}, "f:pod-template-hash": {}}}},
+            }, {
+                "manager": "kubelet", "operation": "Update", "apiVersion": "v1", "time": "@started@",
+                "fieldsType": "FieldsV1", "subresource": "status",
+                "fieldsV1": {"f:status": {"f:conditions": {}, "f:containerStatuses": {}, "f:podIP": {}, "f:startTime": {}}},
+            }],
+        },
+        "spec": {
+            "containers": containers,
+            "volumes": [{"name": "kube-api-access", "projected": {"defaultMode": 420, "sources": [
+                {"serviceAccountToken": {"expirationSeconds": 3607, "path": "token"}},
+                {"configMap": {"name": "kube-root-ca.crt", "items": [{"key": "ca.crt", "path": "ca.crt"}]}},
+            ]}}],
+            "nodeName": "@node@",
+            "restartPolicy": "Always",
+            "serviceAccountName": "default",
+            "schedulerName": "default-scheduler",
+            "terminationGracePeriodSeconds": 30,
+            "dnsPolicy": "ClusterFirst",
+            "tolerations": [
+                {"key": "node.kubernetes.io/not-ready", "operator": "Exists", "effect": "NoExecute", "tolerationSeconds": 300},
+                {"key": "node.kubernetes.io/unreachable", "operator": "Exists", "effect": "NoExecute", "tolerationSeconds": 300},
+            ],
+        },
+        "status": {
+            "phase": phase,
+            "conditions": [
+                {"type": kind, "status": ready if kind in ("Ready", "ContainersReady") else "True", "lastTransitionTime": "@started@"}
+                for kind in ("Initialized", "Ready", "ContainersReady", "PodScheduled")
+            ],
+            "hostIP": "@host_ip@",
+            "podIP": "@pod_ip@",
+            "podIPs": [{"ip": "@pod_ip@"}],
+            "startTime": "@started@",
+            "qosClass": "Burstable",
+            "containerStatuses": statuses,
+        },
+    }
+    if state == "Pending":
+        pod["spec"].pop("nodeName")
+        for key in ("hostIP", "podIP", "podIPs"):
+            pod["status"].pop(key)
+    return _template(pod, integers=("restarts",))
+
+
+POD_TEMPLATES = {state: _pod_template(state) for state in ("running", "CrashLoopBackOff", "Pending", "Succeeded")}
+
+
+class FakeCluster:
+    """A synthetic cluster whose every object is a pure function of its index"""
+
+    def __init__(self, pods=1000, namespaces=None, nodes=None, apps_per_namespace=5):
+        self.pods = pods
+        self.namespaces = namespaces or max(5, min(pods // 200, 500))
+        self.nodes = nodes or max(3, pods // 30)
+        self.apps = self.namespaces * apps_per_namespace
+        self.log_lines = 200
+        # Per kind, the events of upcoming watch streams (see queue_watch),
+        # and (kind, query) of every watch request served
+        self.watch_streams = {}
+        self.watch_requests = []
+
+    # Index layout: pod i runs app i % apps, and app a lives in namespace a % namespaces
+
+    def pod_state(self, i):
+        if i % 20 == 3:
+            return "CrashLoopBackOff"
+        if i % 50 == 7:
+            return "Pending"
+        if i % 100 == 11:
+            return "Succeeded"
+        return "running"
+
+    def pod_fields(self, i):
+        app = i % self.apps
+        state = self.pod_state(i)
+        return {
+            "metadata.name": f"app-{app}-{i:07x}",
+            "metadata.namespace": f"ns-{app % self.namespaces}",
+            "spec.nodeName": "" if state == "Pending" else f"node-{i % self.nodes}",
+            "status.phase": {"running": "Running", "CrashLoopBackOff": "Running"}.get(state, state),
+        }
+
+    def pod(self, i):
+        fields = self.pod_fields(i)
+        app = i % self.apps
+        node = i % self.nodes
+        digest = f"{i * 2654435761 % 2 ** 64:016x}" * 2
+        return POD_TEMPLATES[self.pod_state(i)] % {
+            "name": fields["metadata.name"],
+            "namespace": fields["metadata.namespace"],
+            "uid": f"{i:08x}-0000-4000-8000-{i:012x}",
+            "version": 100000 + i,
+            "created": _timestamp(600 + (i * 7919) % (30 * 86400)),
+            "started": _timestamp(300 + (i * 104729) % 86400),
+            "owner": f"app-{app}-6d4cf56db6",
+            "owner_uid": f"{app:08x}-1111-4000-8000-{app:012x}",
+            "hash": "6d4cf56db6",
+            "app": f"app-{app}",
+            "node": f"node-{node}",
+            "host_ip": f"10.1.{node // 250}.{node % 250}",
+            "pod_ip": f"10.{64 + i // 65536}.{i // 256 % 256}.{i % 256}",
+            "restarts": 7 + i % 13 if self.pod_state(i) == "CrashLoopBackOff" else 0,
+            "minor": i % 9,
+            "digest": digest,
+            "image_id": f"registry.example.com/app-{app}@sha256:{digest}",
+        }
+
+    def pod_index(self, name):
+        return int(name.rsplit("-", 1)[1], 16)
+
+    def node(self, k):
+        ready = "False" if k % 97 == 5 else "True"
+        return json.dumps({
+            "kind": "Node", "apiVersion": "v1",
+            "metadata": {
+                "name": f"node-{k}", "resourceVersion": str(50000 + k), "creationTimestamp": _timestamp(90 * 86400),
+                "labels": {"kubernetes.io/hostname": f"node-{k}", "node.kubernetes.io/instance-type": "m5.2xlarge",
+                           "topology.kubernetes.io/zone": f"zone-{k % 3}"},
+            },
+            "spec": {"podCIDR": f"10.{64 + k // 256}.{k % 256}.0/24", "providerID": f"aws:///zone-{k % 3}/i-{k:017x}"},
+            "status": {
+                "capacity": {"cpu": "8", "memory": "32Gi", "pods": "110"},
+                "allocatable": {"cpu": "7910m", "memory": "31Gi", "pods": "110"},
+                "conditions": [
+                    {"type": "MemoryPressure", "status": "True" if k % 89 == 4 else "False"},
+                    {"type": "DiskPressure", "status": "False"},
+                    {"type": "PIDPressure", "status": "False"},
+                    {"type": "Ready", "status": ready, "lastHeartbeatTime": _timestamp(10)},
+                ],
+                "addresses": [{"type": "InternalIP", "address": f"10.1.{k // 250}.{k % 250}"}],
+                "nodeInfo": {"kubeletVersion": "v1.30.4", "containerRuntimeVersion": "containerd://1.7.20",
+                             "osImage": "Bottlerocket OS 1.20.0", "architecture": "amd64"},
+            },
+        })
+
+    def app_pods(self, app):
+        return range(app, self.pods, self.apps)
+
+    def deployment(self, app):
+        replicas = len(self.app_pods(app))
+        ready = sum(1 for i in self.app_pods(app) if self.pod_state(i) == "running")
+        return json.dumps({
+            "kind": "Deployment", "apiVersion": "apps/v1",
+            "metadata": {"name": f"app-{app}", "namespace": f"ns-{app % self.namespaces}",
+                         "resourceVersion": str(70000 + app), "creationTimestamp": _timestamp(30 * 86400)},
+            "spec": {"replicas": replicas, "selector": {"matchLabels": {"app": f"app-{app}"}}},
+            "status": {"replicas": replicas, "readyReplicas": ready, "availableReplicas": ready,
+                       "conditions": [{"type": "Available", "status": "True" if ready == replicas else "False",
+                                       "reason": "MinimumReplicasAvailable" if ready == replicas else "MinimumReplicasUnavailable"}]},
+        })
+
+    def service(self, app):
+        return json.dumps({
+            "kind": "Service", "apiVersion": "v1",
+            "metadata": {"name": f"app-{app}", "namespace": f"ns-{app % self.namespaces}",
+                         "resourceVersion": str(80000 + app), "creationTimestamp": _timestamp(30 * 86400)},
+            "spec": {"type": "ClusterIP", "clusterIP": f"10.96.{app // 256}.{app % 256}",
+                     "selector": {"app": f"app-{app}"}, "ports": [{"name": "http", "port": 80, "targetPort": 8080, "protocol": "TCP"}]},
+        })
+
+    def endpointslice(self, app):
+        endpoints = []
+        for i in self.app_pods(app):
+            state = self.pod_state(i)
+            if state in ("Pending", "Succeeded"):
+                continue
+            fields = self.pod_fields(i)
+            endpoints.append({
+                "addresses": [f"10.{64 + i // 65536}.{i // 256 % 256}.{i % 256}"],
+                "conditions": {"ready": state == "running"},
+                "nodeName": fields["spec.nodeName"],
+                "targetRef": {"kind": "Pod", "name": fields["metadata.name"], "namespace": fields["metadata.namespace"]},
+            })
+        return json.dumps({
+            "kind": "EndpointSlice", "apiVersion": "discovery.k8s.io/v1",
+            "metadata": {"name": f"app-{app}-x7k2p", "namespace": f"ns-{app % self.namespaces}",
+                         "labels": {"kubernetes.io/service-name": f"app-{app}"}},
+            "addressType": "IPv4",
+            "endpoints": endpoints,
+            "ports": [{"name": "http", "port": 8080, "protocol": "TCP"}],
+        })
+
+    def event_pods(self):
+        # One warning event per crash-looping pod
+        return range(3, self.pods, 20)
+
+    def event(self, i):
+        fields = self.pod_fields(i)
+        return json.dumps({
+            "kind": "Event", "apiVersion": "v1",
+            "metadata": {"name": f"{fields['metadata.name']}.17f3a9b2c", "namespace": fields["metadata.namespace"],
+                         "resourceVersion": str(90000 + i)},
+            "involvedObject": {"kind": "Pod", "name": fields["metadata.name"], "namespace": fields["metadata.namespace"],
+                               "apiVersion": "v1", "fieldPath": "spec.containers{main}"},
+            "reason": "BackOff", "message": "Back-off restarting failed container main in pod " + fields["metadata.name"],
+            "type": "Warning", "count": 5 + i % 40, "source": {"component": "kubelet", "host": fields["spec.nodeName"]},
+            "firstTimestamp": _timestamp(3000), "lastTimestamp": _timestamp(20 + i % 300),
+        })
+
+    def event_fields(self, i):
+        fields = self.pod_fields(i)
+        return {
+            "metadata.namespace": fields["metadata.namespace"], "type": "Warning", "reason": "BackOff",
+            "involvedObject.kind": "Pod", "involvedObject.name": fields["metadata.name"],
+        }
+
+    def collection(self, kind):
+        """(indexes, namespace_of, name_of, fields_of, labels_of, encode) for a kind, or None"""
+        apps = range(self.apps)
+        app_namespace = lambda app: f"ns-{app % self.namespaces}"
+        if kind == "pods":
+            return (
+                range(self.pods),
+                lambda i: self.pod_fields(i)["metadata.namespace"],
+                lambda i: self.pod_fields(i)["metadata.name"],
+                self.pod_fields,
+                lambda i: {"app": f"app-{i % self.apps}", "tier": "backend"},
+                self.pod,
+            )
+        if kind == "nodes":
+            return (range(self.nodes), lambda k: None, lambda k: f"node-{k}", lambda k: {}, lambda k: {}, self.node)
+        if kind in ("deployments", "services"):
+            encode = self.deployment if kind == "deployments" else self.service
+            return (apps, app_namespace, lambda app: f"app-{app}", lambda app: {}, lambda app: {"app": f"app-{app}"}, encode)
+        if kind == "endpointslices":
+            return (
+                apps, app_namespace, lambda app: f"app-{app}-x7k2p", lambda app: {},
+                lambda app: {"kubernetes.io/service-name": f"app-{app}"}, self.endpointslice,
+            )
+        if kind == "events":
+            return (
+                self.event_pods(), lambda i: self.pod_fields(i)["metadata.namespace"],
+                lambda i: self.pod_fields(i)["metadata.name"] + ".17f3a9b2c",
+                self.event_fields, lambda i: {}, self.event,
+            )
+        return None
+
+    def queue_watch(self, kind, *events):
+        """Stream these watch events to the next watch of a kind, before its bookmark"""
+        self.watch_streams.setdefault(kind, deque()).append(list(events))
+
+    def start_watch(self, kind, query):
+        """The events queued for a new watch stream of a kind"""
+        self.watch_requests.append((kind, query))
+        streams = self.watch_streams.get(kind)
+        return streams.popleft() if streams else []
+
+    def list_kind(self, kind):
+        return {
+            "pods": ("PodList", "v1"), "nodes": ("NodeList", "v1"), "services": ("ServiceList", "v1"),
+            "events": ("EventList", "v1"), "deployments": ("DeploymentList", "apps/v1"),
+            "endpointslices": ("EndpointSliceList", "discovery.k8s.io/v1"),
+        }[kind]
+
+    def select(self, kind, namespace, query):
+        """Indexes of a kind matching a namespace and label/field selectors
+
+        An unfiltered list is the kind's index range itself, so every page
+        of a paged LIST costs the fake server only the objects it writes.
+        """
+        indexes, namespace_of, _, fields_of, labels_of, _ = self.collection(kind)
+        labels = _parse_selector(query.get("labelSelector"))
+        fields = _parse_selector(query.get("fieldSelector"))
+        if kind == "pods" and namespace:
+            # Only the apps of this namespace can have pods there
+            number = int(namespace.rsplit("-", 1)[1])
+            indexes = sorted(i for app in range(number, self.apps, self.namespaces) for i in self.app_pods(app))
+            namespace = None
+        if not (namespace or labels or fields):
+            return indexes
+        return [
+            i for i in indexes
+            if not (namespace and namespace_of(i) != namespace)
+            and not (labels and not _matches(labels_of(i), labels))
+            and not (fields and not _matches(fields_of(i), fields))
+        ]
+
+    def handle(self, path):
+        """(status, content type, iterator of body chunks) for a GET"""
+        parts = urlsplit(path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        segments = [segment for segment in parts.path.split("/") if segment]
+        if segments[:2] == ["apis", "metrics.k8s.io"]:
+            return 200, "application/json", [self.metrics(segments[-1]).encode()]
+        if segments[:1] == ["api"]:
+            segments = segments[2:]
+        elif segments[:1] == ["apis"]:
+            segments = segments[3:]
+        namespace = None
+        if segments[:1] == ["namespaces"] and len(segments) >= 3:
+            namespace, segments = segments[1], segments[2:]
+        kind = segments[0] if segments else ""
+        collection = self.collection(kind)
+        if collection is None:
+            return _status(404, "NotFound", "the server could not find the requested resource")
+        if len(segments) >= 2:
+            return self.get(kind, namespace, segments[1], segments[2:], query)
+        indexes = self.select(kind, namespace, query)
+        list_kind, api_version = self.list_kind(kind)
+        metadata = {"resourceVersion": "200000"}
+        limit = int(query.get("limit") or 0)
+        if limit:
+            start = int(query.get("continue") or 0)
+            if start + limit < len(indexes):
+                metadata["continue"] = str(start + limit)
+                metadata["remainingItemCount"] = len(indexes) - start - limit
+            indexes = indexes[start:start + limit]
+        head = json.dumps({"kind": list_kind, "apiVersion": api_version, "metadata": metadata})[:-1] + ', "items": ['
+        return 200, "application/json", self.write_items(head, indexes, collection[5])
+
+    def write_items(self, head, indexes, encode):
+        yield head.encode()
+        for start in range(0, len(indexes), WRITE_BATCH):
+            batch = ", ".join(encode(i) for i in indexes[start:start + WRITE_BATCH])
+            yield ((", " if start else "") + batch).encode()
+        yield b"]}"
+
+    def get(self, kind, namespace, name, rest, query):
+        if kind == "pods":
+            try:
+                i = self.pod_index(name)
+            except (IndexError, ValueError):
+                i = -1
+            if not 0 <= i < self.pods or self.pod_fields(i)["metadata.name"] != name:
+                return _status(404, "NotFound", f'pods "{name}" not found')
+            if rest == ["log"]:
+                return 200, "text/plain", [self.log(i, query)]
+            return 200, "application/json", [self.pod(i).encode()]
+        indexes, _, name_of, _, _, encode = self.collection(kind)
+        for i in indexes:
+            if name_of(i) == name:
+                return 200, "application/json", [encode(i).encode()]
+        return _status(404, "NotFound", f'{kind} "{name}" not found')
+
+    def log(self, i, query):
+        lines = [
+            f"{_timestamp(self.log_lines - n)} level={'error' if (n * 31 + i) % 17 == 0 else 'info'} "
+            f"pod={i} request_id={n * 7919 + i:08x} msg=\"{'upstream timeout' if (n * 31 + i) % 17 == 0 else 'handled request'}\" "
+            f"latency_ms={(n * 37 + i) % 900}"
+            for n in range(self.log_lines)
+        ]
+        if query.get("tailLines"):
+            lines = lines[-int(query["tailLines"]):]
+        if query.get("timestamps") != "true":
+            lines = [line.split(" ", 1)[1] for line in lines]
+        body = ("\n".join(lines) + "\n").encode()
+        if query.get("limitBytes"):
+            body = body[:int(query["limitBytes"])]
+        return body
+
+    def metrics(self, kind):
+        stamp = _timestamp(15)
+        if kind == "nodes":
+            items = [{"metadata": {"name": f"node-{k}"}, "timestamp": stamp, "window": "15s",
+                      "usage": {"cpu": f"{1200 + k * 37 % 4000}m", "memory": f"{8000000 + k * 7919 % 9000000}Ki"}}
+                     for k in range(self.nodes)]
+            return json.dumps({"kind": "NodeMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "metadata": {}, "items": items})
+        items = []
+        for i in range(self.pods):
+            if self.pod_state(i) in ("Pending", "Succeeded"):
+                continue
+            fields = self.pod_fields(i)
+            items.append({
+                "metadata": {"name": fields["metadata.name"], "namespace": fields["metadata.namespace"]},
+                "timestamp": stamp, "window": "15s",
+                "containers": [
+                    {"name": "main", "usage": {"cpu": f"{(i * 7919) % 400000000}n", "memory": f"{60000 + i % 200000}Ki"}},
+                    {"name": "sidecar", "usage": {"cpu": f"{i % 20}m", "memory": f"{20000 + i % 1000}Ki"}},
+                ],
+            })
+        return json.dumps({"kind": "PodMetricsList", "apiVersion": "metrics.k8s.io/v1beta1", "metadata": {}, "items": items})
+
+
+def _status(code, reason, message):
+    body = json.dumps({"kind": "Status", "apiVersion": "v1", "status": "Failure", "reason": reason, "message": message, "code": code})
+    return code, "application/json", [body.encode()]
+
+
+def _parse_selector(selector):
+    """[(key, operator, value)] for equality-based selectors (a=b, a==b, a!=b)"""
+    terms = []
+    for term in (selector or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            terms.append((key.strip(), "!=", value.strip()))
+        else:
+            key, _, value = term.replace("==", "=").partition("=")
+            terms.append((key.strip(), "=", value.strip()))
+    return terms
+
+
+def _matches(values, terms):
+    for key, operator, value in terms:
+        if (values.get(key) == value) != (operator == "="):
+            return False
+    return True
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle's
+    # algorithm and delayed ACKs add 40ms to every response
+    disable_nagle_algorithm = True
+    cluster = None
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        if query.get("watch") in (["true"], ["1"]):
+            return self.watch(query)
+        if query.get("follow") == ["true"]:
+            return self.follow()
+        code, content_type, chunks = self.cluster.handle(self.path)
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        if isinstance(chunks, list):
+            body = b"".join(chunks)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def watch(self, query):
+        """The events queued for the kind, then a bookmark and nothing until timeoutSeconds
+
+        An ERROR event (such as 410 Gone) ends the stream, as on a real API server.
+        """
+        kind = urlsplit(self.path).path.rstrip("/").rsplit("/", 1)[-1]
+        events = self.cluster.start_watch(kind, {key: values[0] for key, values in query.items()})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        version = (query.get("resourceVersion") or ["200000"])[0]
+        try:
+            for event in events:
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                if event["type"] == "ERROR":
+                    break
+                version = event["object"]["metadata"].get("resourceVersion") or version
+            else:
+                bookmark = {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": version}}}
+                self.wfile.write(json.dumps(bookmark).encode() + b"\n")
+                self.wfile.flush()
+                time.sleep(min(float((query.get("timeoutSeconds") or ["300"])[0]), 300))
+        except OSError:
+            pass
+        self.close_connection = True
+
+    def follow(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        try:
+            for n in range(10 ** 9):
+                self.wfile.write(f"level=info msg=\"handled request\" n={n}\n".encode())
+                self.wfile.flush()
+                time.sleep(0.01)
+        except OSError:
+            pass
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def kubeconfig(server):
+    return (
+        "apiVersion: v1\nkind: Config\n"
+        f"clusters: [{{name: bench, cluster: {{server: \"{server}\"}}}}]\n"
+        "users: [{name: bench, user: {token: bench}}]\n"
+        "contexts: [{name: bench, context: {cluster: bench, user: bench}}]\n"
+        "current-context: bench\n"
+    )
+
+
+def serve(cluster, host="127.0.0.1", port=0):
+    """Start serving in this thread's caller; returns the bound HTTP server"""
+    handler = type("BoundHandler", (Handler,), {"cluster": cluster})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pods", type=int, default=1000)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--kubeconfig", help="write a kubeconfig for the server to this path")
+    args = parser.parse_args()
+    server = serve(FakeCluster(args.pods), args.host, args.port)
+    host, port = server.server_address[:2]
+    if args.kubeconfig:
+        with open(args.kubeconfig, "w") as f:
+            f.write(kubeconfig(f"http://{host}:{port}"))
+    print(f"serving {args.pods} pods on http://{host}:{port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3.11
+"""
+Benchmark suite for the Kubernetes MCP Server handlers
+
+For each cluster size a synthetic API server (fakecluster.py) is started,
+and every scenario (one resource read or tool call) runs in a fresh worker
+process that builds a KubernetesMCPServer against it and invokes the MCP
+handler in-process. Running each scenario in its own process keeps their
+peak RSS apart and keeps one scenario's caches from warming another's.
+
+Reported per scenario: latency p50/p95/p99/max, throughput of back-to-back
+calls, bytes returned and the worker's peak RSS. Results can be saved as a
+baseline (bench/baselines/<backend>.json, committed with the code) and
+later runs compared against it:
+
+    python3.11 bench/run.py --sizes 1000,10000 --save-baseline
+    python3.11 bench/run.py --sizes 1000,10000 --compare
+
+The response cache is disabled in the workers so every iteration measures
+the handler itself.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# Metrics compared against the baseline; latencies also need to differ by
+# at least MIN_LATENCY_DELTA_MS to count, so sub-millisecond noise is ignored
+COMPARED = ("p50_ms", "p95_ms", "peak_rss_mb", "bytes")
+MIN_LATENCY_DELTA_MS = 2.0
+
+# p95 is only compared when both runs have enough samples for it to be stable
+MIN_TAIL_SAMPLES = 20
+
+
+def scenarios(cluster):
+    """name -> ("resource", uri, None) or ("tool", name, arguments) for a FakeCluster"""
+    pod = cluster.pod_fields(3)  # a crash-looping pod
+    namespace = pod["metadata.namespace"]
+    return {
+        "read pods": ("resource", "k8s://pods", None),
+        "read pods fields": ("resource", "k8s://pods?fields=metadata.name,metadata.namespace,status.phase", None),
+        "read pods namespace": ("resource", f"k8s://pods?namespace={namespace}", None),
+        "read pods summary": ("resource", "k8s://pods/summary", None),
+        "read nodes": ("resource", "k8s://nodes", None),
+        "read services": ("resource", "k8s://services", None),
+        "read events": ("resource", "k8s://events", None),
+        "cluster_health_check": ("tool", "cluster_health_check", {}),
+        "check_pod_status": ("tool", "check_pod_status", {"namespace": namespace}),
+        "analyze_service_connectivity": ("tool", "analyze_service_connectivity", {}),
+        "get_pod_logs": ("tool", "get_pod_logs", {"pod_name": pod["metadata.name"], "namespace": namespace, "tail_lines": 100}),
+        "search_pod_logs": ("tool", "search_pod_logs", {"namespace": namespace, "label_selector": "app=app-3", "pattern": "upstream timeout"}),
+        "get_events": ("tool", "get_events", {"namespace": namespace}),
+    }
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)] if ordered else None
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+async def run_scenario(name, pods, iterations, warmup):
+    """Worker side: time one scenario against the fake cluster named by KUBECONFIG"""
+    sys.path.insert(0, REPO_DIR)
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import mcp.types as types
+    from config import Config
+    from fakecluster import FakeCluster
+    from mcp_server import KubernetesMCPServer
+
+    kind, target, arguments = scenarios(FakeCluster(pods))[name]
+    config = Config()
+    config.cache_ttls = {}
+    server = KubernetesMCPServer(config)
+    await server.start()
+    await server.default.wait_ready(config.timeout)
+    handlers = server.server.request_handlers
+
+    async def call():
+        if kind == "resource":
+            request = types.ReadResourceRequest(method="resources/read", params=types.ReadResourceRequestParams(uri=target))
+            return (await handlers[types.ReadResourceRequest](request)).root.contents[0].text
+        request = types.CallToolRequest(method="tools/call", params=types.CallToolRequestParams(name=target, arguments=arguments))
+        return (await handlers[types.CallToolRequest](request)).root.content[0].text
+
+    for _ in range(warmup):
+        await call()
+    latencies = []
+    sizes = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        text = await call()
+        latencies.append((time.perf_counter() - begin) * 1000)
+        sizes.append(len(text.encode()))
+        if text.startswith(("Error", '{"error"')):
+            errors += 1
+    elapsed = time.perf_counter() - started
+    await server.stop()
+    return {
+        "scenario": name,
+        "pods": pods,
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "max_ms": round(max(latencies), 2),
+        "throughput_rps": round(iterations / elapsed, 2),
+        "bytes": max(sizes),
+        "peak_rss_mb": peak_rss_mb(),
+        "errors": errors,
+    }
+
+
+def start_fake_cluster(pods, directory):
+    """Start fakecluster.py on a free port; returns (process, kubeconfig path)"""
+    kubeconfig = os.path.join(directory, f"kubeconfig-{pods}")
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BENCH_DIR, "fakecluster.py"), "--pods", str(pods), "--port", "0", "--kubeconfig", kubeconfig],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = process.stdout.readline()
+    if not line.startswith("serving"):
+        process.kill()
+        raise RuntimeError(f"fake cluster failed to start: {line}")
+    return process, kubeconfig
+
+
+def default_iterations(pods):
+    return max(3, min(50, 200000 // pods))
+
+
+def run_suite(args):
+    sys.path.insert(0, BENCH_DIR)
+    from fakecluster import FakeCluster
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for pods in args.sizes:
+            process, kubeconfig = start_fake_cluster(pods, directory)
+            env = dict(
+                os.environ,
+                KUBECONFIG=kubeconfig,
+                BENCH_PODS=str(pods),
+                K8S_MCP_BACKEND=args.backend,
+                K8S_MCP_KUBECTL=os.path.join(BENCH_DIR, "kubectl"),
+                K8S_MCP_INFORMERS=args.informers or "",
+                K8S_MCP_CONTEXT="",
+                K8S_MCP_CONTEXTS="",
+            )
+            try:
+                names = [name for name in scenarios(FakeCluster(pods)) if not args.scenarios or name in args.scenarios]
+                for name in names:
+                    iterations = args.iterations or default_iterations(pods)
+                    result = run_worker(name, pods, iterations, args.warmup, env, args.timeout)
+                    results.append(result)
+                    print(format_row(result), flush=True)
+            finally:
+                process.kill()
+                process.wait()
+    return results
+
+
+def run_worker(name, pods, iterations, warmup, env, timeout):
+    command = [
+        sys.executable, os.path.abspath(__file__), "--worker", name,
+        "--sizes", str(pods), "--iterations", str(iterations), "--warmup", str(warmup),
+    ]
+    try:
+        process = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"scenario": name, "pods": pods, "failed": f"timed out after {timeout}s"}
+    if process.returncode != 0:
+        reason = (process.stderr.strip().splitlines() or [f"exit status {process.returncode}"])[-1]
+        if process.returncode < 0:
+            reason = f"killed by signal {-process.returncode} (out of memory?)"
+        return {"scenario": name, "pods": pods, "failed": reason}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+HEADER = f"{'SCENARIO':<30} {'PODS':>7} {'N':>4} {'P50 ms':>9} {'P95 ms':>9} {'P99 ms':>9} {'REQ/S':>8} {'BYTES':>11} {'RSS MB':>8} {'ERR':>4}"
+
+
+def format_row(result):
+    if "failed" in result:
+        return f"{result['scenario']:<30} {result['pods']:>7} FAILED: {result['failed']}"
+    return (
+        f"{result['scenario']:<30} {result['pods']:>7} {result['iterations']:>4} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+        f"{result['p99_ms']:>9} {result['throughput_rps']:>8} {result['bytes']:>11} {result['peak_rss_mb']:>8} {result['errors']:>4}"
+    )
+
+
+def baseline_path(args):
+    return args.baseline or os.path.join(BASELINE_DIR, f"{args.backend}.json")
+
+
+def save_baseline(path, results, args):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    document = {
+        "backend": args.backend,
+        "informers": args.informers or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(terse=True),
+        "cpus": os.cpu_count(),
+        "recorded": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": {f"{r['scenario']}@{r['pods']}": r for r in results if "failed" not in r},
+    }
+    with open(path, "w") as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(path, results, threshold):
+    """Print differences from a baseline; returns the number of regressions"""
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    for result in results:
+        key = f"{result['scenario']}@{result['pods']}"
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if "failed" in result:
+            print(f"REGRESSION {key}: failed ({result['failed']})")
+            regressions += 1
+            continue
+        for metric in COMPARED:
+            old, new = base.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if metric.endswith("_ms") and abs(new - old) < MIN_LATENCY_DELTA_MS:
+                continue
+            if metric == "p95_ms" and min(result["iterations"], base["iterations"]) < MIN_TAIL_SAMPLES:
+                continue
+            if change > threshold:
+                print(f"REGRESSION {key}: {metric} {old} -> {new} ({change:+.0%})")
+                regressions += 1
+            elif change < -threshold:
+                print(f"improved   {key}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the MCP server handlers against a synthetic cluster")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated pod counts")
+    parser.add_argument("--scenarios", help="comma-separated scenario names (default: all)")
+    parser.add_argument("--iterations", type=int, help="timed calls per scenario (default: scaled to size)")
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls before measuring")
+    parser.add_argument("--backend", default="api", choices=("api", "kubectl"))
+    parser.add_argument("--informers", help="K8S_MCP_INFORMERS for the server under test, e.g. all")
+    parser.add_argument("--timeout", type=float, default=900, help="seconds allowed per scenario")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="baseline file (default: bench/baselines/<backend>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="record these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare with the baseline; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative change that counts as a regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",") if size]
+    args.scenarios = set(args.scenarios.split(",")) if args.scenarios else None
+
+    if args.worker:
+        sys.path.insert(0, BENCH_DIR)
+        result = asyncio.run(run_scenario(args.worker, args.sizes[0], args.iterations, args.warmup))
+        print(json.dumps(result))
+        return 0
+
+    print(HEADER, flush=True)
+    results = run_suite(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    status = 0
+    if args.compare:
+        regressions = compare(baseline_path(args), results, args.threshold)
+        print(f"{regressions} regressions against {baseline_path(args)}")
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        save_baseline(baseline_path(args), results, args)
+        print(f"baseline written to {baseline_path(args)}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3.11
+"""
+Cold-start benchmark for the Kubernetes MCP Server
+
+MCP clients such as Claude Desktop spawn mcp_server.py over stdio for every
+session, so the time until the server answers `initialize` is time a user
+waits. Each run starts a fresh server process against the synthetic cluster
+and times, from the moment the process is spawned:
+
+- initialize: the initialize response
+- tools/list and resources/list: the two listings clients send next
+- first call: a check_pod_status call, which needs the backend and the
+  cluster connection
+
+Import cost is measured separately with `python -X importtime`: the whole
+import of mcp_server, the mcp SDK and the heaviest other packages.
+
+    python3.11 bench/startup.py --runs 10
+    python3.11 bench/startup.py --backend kubectl --output startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from run import start_fake_cluster  # noqa: E402
+
+PHASES = ("initialize", "tools/list", "resources/list", "first call")
+
+
+class StdioClient:
+    """Minimal line-delimited JSON-RPC client for a server process"""
+
+    def __init__(self, process):
+        self.process = process
+        self.next_id = 0
+
+    def send(self, method, params=None, notify=False):
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notify:
+            self.next_id += 1
+            message["id"] = self.next_id
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+        if notify:
+            return None
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"server exited before answering {method}")
+            response = json.loads(line)
+            if response.get("id") == self.next_id:
+                if "error" in response:
+                    raise RuntimeError(f"{method}: {response['error']}")
+                return response["result"]
+
+
+def cold_start(env, server):
+    """Seconds from spawn to each phase's response"""
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, server], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True, env=env, cwd=REPO_DIR,
+    )
+    client = StdioClient(process)
+    times = {}
+    try:
+        client.send("initialize", {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "startup-bench", "version": "1.0"},
+        })
+        times["initialize"] = time.perf_counter() - started
+        client.send("notifications/initialized", notify=True)
+        client.send("tools/list")
+        times["tools/list"] = time.perf_counter() - started
+        client.send("resources/list")
+        times["resources/list"] = time.perf_counter() - started
+        client.send("tools/call", {"name": "check_pod_status", "arguments": {"namespace": "ns-1"}})
+        times["first call"] = time.perf_counter() - started
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return times
+
+
+def import_cost(env):
+    """(total ms to import mcp_server, {package: cumulative ms}) from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mcp_server"],
+        capture_output=True, text=True, env=env, cwd=REPO_DIR, check=True,
+    )
+    total = 0.0
+    packages = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[12:]:
+            continue
+        _, cumulative, name = line[12:].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        name = name.rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if name == "mcp_server":
+            total = int(cumulative) / 1000
+        elif depth <= 1:
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0) + int(cumulative) / 1000
+    return total, packages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the server's cold start over stdio")
+    parser.add_argument("--runs", type=int, default=5, help="server processes to start")
+    parser.add_argument("--pods", type=int, default=1000, help="pods in the synthetic cluster")
+    parser.add_argument("--backend", default="api", choices=("api", "kubectl"), help="K8S_MCP_BACKEND for the server")
+    parser.add_argument("--server", default=os.path.join(REPO_DIR, "mcp_server.py"), help="server script to start")
+    parser.add_argument("--top", type=int, default=8, help="packages listed in the import breakdown")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cluster, kubeconfig = start_fake_cluster(args.pods, directory)
+        try:
+            env = dict(
+                os.environ, KUBECONFIG=kubeconfig, K8S_MCP_BACKEND=args.backend,
+                K8S_MCP_DISCOVERY_CACHE=os.path.join(directory, "discovery.json"),
+            )
+            if args.backend == "kubectl":
+                env["PATH"] = BENCH_DIR + os.pathsep + env.get("PATH", "")
+            runs = [cold_start(env, args.server) for _ in range(args.runs)]
+            total, packages = import_cost(env)
+        finally:
+            cluster.kill()
+            cluster.wait()
+
+    results = {"runs": args.runs, "backend": args.backend, "import_ms": round(total, 1), "phases": {}}
+    print(f"{'PHASE':<16} {'MIN ms':>9} {'MEDIAN ms':>10} {'MAX ms':>9}")
+    for phase in PHASES:
+        values = [run[phase] * 1000 for run in runs]
+        results["phases"][phase] = {
+            "min_ms": round(min(values), 1), "median_ms": round(statistics.median(values), 1), "max_ms": round(max(values), 1),
+        }
+        print(f"{phase:<16} {min(values):>9.1f} {statistics.median(values):>10.1f} {max(values):>9.1f}")
+    print(f"\nimport mcp_server: {total:.1f} ms")
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+    results["imports_ms"] = {package: round(ms, 1) for package, ms in heaviest}
+    for package, ms in heaviest:
+        print(f"  {package:<24} {ms:>8.1f} ms")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3.11
+"""
+Watch-cache memory benchmark: dict store vs compact store vs columnar table
+
+The pods and nodes of a synthetic cluster are loaded into the stores the
+informers use, and for each the memory it holds and the time of a few
+typical scans is reported:
+
+- dicts: ObjectStore holding decoded objects (K8S_MCP_INFORMER_COMPACT=false)
+- compact: ObjectStore holding each object's JSON text
+- compact+table: the TableStore the pods and nodes informers use, JSON
+  text plus the columnar table
+- table: the columnar table on its own
+
+Scans: "not running" (phase != Running in one namespace), "restarts > 5"
+and "suspects" (the pods cluster_health_check analyzes one by one). Stores
+without a table decode their objects into models first, as list_models does
+for kinds without one.
+
+    python3.11 bench/store.py --pods 30000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from analysis import HEALTHY_POD_STATUSES, RESTART_THRESHOLD  # noqa: E402
+from columnar import NodeTable, PodTable, TableStore  # noqa: E402
+from fakecluster import FakeCluster  # noqa: E402
+from informer import ObjectStore, list_kind, object_key  # noqa: E402
+from models import Pod, loads  # noqa: E402
+
+TABLES = {"pods": PodTable, "nodes": NodeTable}
+PATHS = {"pods": "/api/v1/pods", "nodes": "/api/v1/nodes"}
+
+
+def stores(kind):
+    return {
+        "dicts": lambda: ObjectStore(*list_kind(kind)),
+        "compact": lambda: ObjectStore(*list_kind(kind), compact=True),
+        "compact+table": lambda: TableStore(TABLES[kind](), *list_kind(kind), compact=True),
+        "table": TABLES[kind],
+    }
+
+
+def load(make, items):
+    store = make()
+    if isinstance(store, ObjectStore):
+        store.replace(items, "1")
+    else:
+        for obj in items:
+            store.put(object_key(obj), obj)
+    return store
+
+
+def scans(store):
+    """name -> function returning the number of matching pods"""
+    table = store if not isinstance(store, ObjectStore) else getattr(store, "table", None)
+    if table is not None:
+        return {
+            "not running": lambda: len(table.select(namespace="ns-7", phase_not="Running")),
+            "restarts > 5": lambda: len(table.select(min_restarts=6)),
+            "suspects": lambda: len(table.suspects()),
+        }
+
+    def models():
+        return store.convert(Pod.from_dict)
+
+    def suspect(pod):
+        return (
+            pod.status not in HEALTHY_POD_STATUSES or pod.restarts >= RESTART_THRESHOLD
+            or (pod.status == "Running" and pod.ready < pod.containers)
+        )
+
+    return {
+        "not running": lambda: sum(1 for pod in models() if pod.namespace == "ns-7" and pod.phase != "Running"),
+        "restarts > 5": lambda: sum(1 for pod in models() if pod.restarts > 5),
+        "suspects": lambda: sum(1 for pod in models() if suspect(pod)),
+    }
+
+
+def best(function, repeat):
+    result, seconds = None, float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        seconds = min(seconds, time.perf_counter() - started)
+    return seconds, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare watch-cache store layouts")
+    parser.add_argument("--pods", type=int, default=10000, help="pods in the synthetic cluster")
+    parser.add_argument("--kinds", default="pods,nodes", help="comma-separated kinds")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scan (best is reported)")
+    args = parser.parse_args()
+
+    cluster = FakeCluster(args.pods)
+    print(f"{'KIND':<7} {'STORE':<14} {'OBJECTS':>8} {'LOAD S':>7} {'HELD MB':>9}  SCANS (ms, matches)")
+    # Load times include decoding the LIST and run under tracemalloc, so
+    # compare them with each other rather than with the server's relist time
+    for kind in args.kinds.split(","):
+        _, _, chunks = cluster.handle(PATHS[kind])
+        raw = b"".join(chunks)
+        for name, make in stores(kind).items():
+            gc.collect()
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            started = time.perf_counter()
+            items = loads(raw)["items"]
+            store = load(make, items)
+            seconds = time.perf_counter() - started
+            del items
+            gc.collect()
+            held = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+            results = []
+            if kind == "pods":
+                for scan, function in scans(store).items():
+                    scan_seconds, matches = best(function, args.repeat)
+                    results.append(f"{scan}: {scan_seconds * 1000:.1f} ({matches})")
+            print(
+                f"{kind:<7} {name:<14} {len(store):>8} {seconds:>7.2f} {held / 2 ** 20:>9.1f}  {', '.join(results)}",
+                flush=True,
+            )
+            del store
+        print(f"{kind:<7} {'(LIST JSON)':<14} {'':>8} {'':>7} {len(raw) / 2 ** 20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Response cache for the Kubernetes MCP Server
+
+Caches the text produced by resource reads and read-only tools, keyed on
+(resource or tool name, arguments, kube context). Each name has its own TTL
+(0 disables caching for it) and the cache evicts least-recently-used entries
+to stay within a byte budget. Concurrent misses for the same key are
+coalesced so only one upstream call is made.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+# Rough per-entry bookkeeping cost added to the size of the cached text
+ENTRY_OVERHEAD = 200
+
+
+def cache_key(name, arguments=None, context=None):
+    """Build a hashable cache key for a request"""
+    return (name, json.dumps(arguments or {}, sort_keys=True, default=str), context)
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call between concurrent identical requests
+
+    Every waiter receives the call's result or exception. A waiter that is
+    cancelled only detaches itself; the shared call is cancelled once no
+    waiters remain, which kills any child process it started.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key, func):
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finished(key, call))
+            self.calls += 1
+        else:
+            self.shared += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def _finished(self, key, call):
+        self._forget(key, call)
+        if not call.task.cancelled():
+            call.task.exception()  # mark retrieved even if every waiter left
+
+    def detach(self, predicate):
+        """Stop sharing in-flight calls whose key matches; later callers start fresh"""
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def in_flight(self):
+        return len(self._calls)
+
+
+class ResponseCache:
+    """TTL cache with LRU eviction under a byte budget"""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, ttls=None):
+        self.max_bytes = max_bytes
+        self.ttls = dict(ttls or {})
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.flights = SingleFlight()
+        # Bumped by invalidate() so loads that started earlier are not stored
+        self.generation = 0
+
+    def ttl(self, name):
+        """TTL in seconds configured for a resource URI or tool name"""
+        return self.ttls.get(name, 0)
+
+    def get(self, key):
+        """Return a cached value, or None on a miss"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value, size = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, ttl):
+        """Store a value for ttl seconds, evicting LRU entries to make room"""
+        size = len(value) + ENTRY_OVERHEAD
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        while self.bytes + size > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self.bytes += size
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+
+    async def fetch(self, name, arguments, loader, context=None):
+        """Return the cached response for a request, calling loader() on a miss
+
+        Identical concurrent requests share a single loader() call, whether
+        or not the name is cached.
+        """
+        ttl = self.ttl(name)
+        key = cache_key(name, arguments, context)
+        if ttl > 0:
+            value = self.get(key)
+            if value is not None:
+                return value
+
+        generation = self.generation
+
+        async def load():
+            value = await loader()
+            if generation == self.generation:
+                self.put(key, value, ttl)
+            return value
+
+        return await self.flights.do(key, load)
+
+    def invalidate(self, name=None, context=None):
+        """Drop entries for a name and/or context (everything if neither is given)"""
+        def matches(key):
+            return (name is None or key[0] == name) and (context is None or key[2] == context)
+
+        keys = [key for key in self._entries if matches(key)]
+        for key in keys:
+            self._remove(key)
+        self.flights.detach(matches)
+        self.generation += 1
+        return len(keys)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "upstream_calls": self.flights.calls,
+            "coalesced": self.flights.shared,
+            "in_flight": self.flights.in_flight(),
+        }
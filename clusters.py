@@ -0,0 +1,187 @@
+"""
+Per-context cluster state for the Kubernetes MCP Server
+
+A Cluster bundles everything the server keeps for one kubeconfig context:
+its own call limiter (CommandExecutor), backend and connection pool,
+response cache, watch caches and metrics history, so a slow or unreachable
+cluster never eats into another's concurrency or cache budget.
+
+The handlers reach the cluster a request is for through `current_cluster`,
+a context variable set per request and per fan-out task; tasks started by
+asyncio.gather copy it, so one request can query several clusters at once.
+
+A Cluster connects lazily: the backend (the kubernetes client import and
+the kubeconfig load) is created on a worker thread by the first connect(),
+which the handlers await before a request touches the cluster, or right
+after start when watches or metrics polling are configured. A new server
+answers initialize and the listings without waiting for it, and the event
+loop never blocks on a connection.
+"""
+
+import asyncio
+import contextvars
+
+from backend import create_backend, kubeconfig_contexts
+from cache import ResponseCache
+from columnar import NodeTable, PodTable, TableStore
+from events import EventStore
+from executor import CommandExecutor
+from informer import Informer, list_kind
+from usage import MetricsPoller
+
+# The Cluster the running request (or fan-out task) talks to
+current_cluster = contextvars.ContextVar("current_cluster")
+
+# Watched kinds whose stores also keep a columnar table
+TABLES = {"pods": PodTable, "nodes": NodeTable}
+
+
+def configured_contexts(config, discovery=None):
+    """Kubeconfig contexts to serve, default first (None is the current context)"""
+    if not config.contexts:
+        return [config.context]
+    if "all" in config.contexts:
+        names, current = discovery.contexts(config) if discovery is not None else kubeconfig_contexts(config)
+        default = config.context or current or (names[0] if names else None)
+    else:
+        names = config.contexts
+        default = config.context or names[0]
+    ordered = [default] + [name for name in names if name != default]
+    return list(dict.fromkeys(ordered))
+
+
+class Cluster:
+    """One kubeconfig context with its own executor, backend, cache, informers and metrics"""
+
+    def __init__(self, config, context=None, informer_kinds=(), backend=None, discovery=None):
+        self.name = context or "default"
+        self.context = context
+        self.executor = CommandExecutor(
+            max_concurrency=config.max_concurrency,
+            timeout=config.timeout,
+        )
+        self.config = config
+        self.discovery = discovery
+        self._backend = backend
+        self._connecting = None
+        self.informer_kinds = list(informer_kinds)
+        self.informers = {}
+        self.metrics = None
+        self.error = None
+        self._starting = None
+        self.cache = ResponseCache(config.cache_max_bytes, config.cache_ttls)
+
+    @property
+    def backend(self):
+        """The backend of a connected cluster (see connect)"""
+        if self._backend is None:
+            raise RuntimeError(f"cluster {self.name} is not connected")
+        return self._backend
+
+    async def connect(self):
+        """The cluster's backend, created on a worker thread on first use
+
+        Concurrent callers, the background start among them, share one
+        attempt; after a failure the next caller tries again.
+        """
+        if self._backend is not None:
+            return self._backend
+        if self._connecting is None:
+            loop = asyncio.get_running_loop()
+            self._connecting = loop.run_in_executor(None, create_backend, self.config, self.executor, self.context)
+            self._connecting.add_done_callback(self._connected)
+        return await asyncio.shield(self._connecting)
+
+    def _connected(self, future):
+        self._connecting = None
+        if not future.cancelled() and future.exception() is None:
+            self._backend = future.result()
+
+    @property
+    def connected(self):
+        return self._backend is not None
+
+    def missing(self, kind):
+        """Seconds since this cluster was found not to serve a kind, or None"""
+        return self.discovery.missing(self.context, kind) if self.discovery is not None else None
+
+    def set_missing(self, kind, missing=True):
+        if self.discovery is not None:
+            self.discovery.set_missing(self.context, kind, missing)
+
+    def new_informer(self, kind):
+        store = None
+        compact = self.config.informer_compact
+        if kind == "events":
+            store = EventStore(
+                self.config.event_max_records, self.config.event_max_age, self.config.change_log_size, compact
+            )
+        elif kind in TABLES:
+            store = TableStore(TABLES[kind](), *list_kind(kind), self.config.change_log_size, compact)
+        return Informer(
+            self.backend, kind, stale_after=self.config.informer_stale_after, store=store,
+            max_changes=self.config.change_log_size, compact=compact,
+        )
+
+    def watch(self, kind):
+        """The informer of a kind, started now if the kind was not being watched yet"""
+        informer = self.informers.get(kind)
+        if informer is None:
+            informer = self.informers[kind] = self.new_informer(kind)
+            informer.start()
+        return informer
+
+    def start(self):
+        """Connect in the background, then start watches and metrics polling"""
+        if self._starting is None and (self.informer_kinds or self.config.metrics_interval > 0):
+            self._starting = asyncio.create_task(self.run_background(), name=f"start {self.name}")
+
+    async def run_background(self):
+        try:
+            await self.connect()
+        except Exception as e:
+            self.error = str(e) or type(e).__name__
+            return
+        for kind in self.informer_kinds:
+            self.watch(kind)
+        if self.config.metrics_interval > 0:
+            self.metrics = MetricsPoller(
+                self.backend,
+                self.config.metrics_interval,
+                self.config.metrics_history,
+                self.config.metrics_max_series,
+            )
+            self.metrics.start()
+
+    async def wait_ready(self, timeout=None):
+        """Wait until the backend is connected and every configured watch has synced once"""
+        if self._starting is not None:
+            await asyncio.wait_for(asyncio.shield(self._starting), timeout)
+        for informer in self.informers.values():
+            await informer.wait_ready(timeout)
+
+    async def stop(self):
+        """Stop background watches and release connections"""
+        if self._starting is not None:
+            self._starting.cancel()
+            try:
+                await self._starting
+            except asyncio.CancelledError:
+                pass
+        for informer in self.informers.values():
+            await informer.stop()
+        if self.metrics is not None:
+            await self.metrics.stop()
+        if self._backend is not None:
+            self._backend.close()
+
+    def status(self):
+        return {
+            "backend": self._backend.name if self._backend is not None else None,
+            "error": self.error,
+            "executor": self.executor.stats(),
+            "cache": self.cache.stats(),
+            "informers": {kind: informer.status() for kind, informer in self.informers.items()},
+            "events": self.informers["events"].store.stats() if "events" in self.informers else None,
+            "metrics": self.metrics.status() if self.metrics is not None else None,
+        }
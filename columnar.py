@@ -0,0 +1,457 @@
+"""
+Columnar pod and node tables for the Kubernetes MCP Server
+
+The pods and nodes watch caches keep, next to the objects themselves, one
+row per object in a Table: every field the health and status tools read is
+a column. Numbers (ready and total containers, restarts, creation time) live
+in typed arrays; strings (namespaces, nodes, phases, statuses, reasons,
+owners) are interned once per table and stored as integer ids, and a pod's
+labels as the id of its interned label set, which all replicas of a workload
+share. A row costs a few dozen bytes instead of the tens of kilobytes of a
+decoded pod.
+
+Filters such as "phase != Running in namespace X" or "restarts > 5" compare
+whole columns against one id or number with map/compress, so the loop runs
+in C rather than over Python objects:
+
+    table.select(namespace="shop", phase_not="Running")
+    table.select(min_restarts=6)
+
+Interned values are reference counted: a string or label set is released
+with the last row using it, and its id is reused, so churning workloads
+(Job pods with unique controller-uid labels and owner names) do not grow
+the table. Rows freed by deletes are reused too. TableStore is the informer
+store that keeps a Table in step with its objects.
+"""
+
+import operator
+from array import array
+from datetime import datetime, timezone
+from itertools import compress, repeat
+
+from analysis import HEALTHY_POD_STATUSES, PHASE_COUNTS, RESTART_THRESHOLD
+from informer import ObjectStore, object_key
+from models import Node, Pod, gc_paused
+from summaries import format_age, format_table, parse_time
+
+
+class Interned:
+    """Table of distinct hashable values, each numbered once (None is 0)
+
+    Every id() call takes a reference that release() gives back; a value is
+    forgotten, and its id reused, when its last reference is released.
+    None is never released.
+    """
+
+    __slots__ = ("values", "ids", "refs", "free")
+
+    def __init__(self):
+        self.values = [None]
+        self.ids = {None: 0}
+        self.refs = [0]
+        self.free = []
+
+    def id(self, value):
+        """Id of a value, adding it if it is new, with one more reference to it"""
+        id_ = self.ids.get(value)
+        if id_ is None:
+            if self.free:
+                id_ = self.free.pop()
+                self.values[id_] = value
+            else:
+                id_ = len(self.values)
+                self.values.append(value)
+                self.refs.append(0)
+            self.ids[value] = id_
+        self.refs[id_] += 1
+        return id_
+
+    def release(self, id_):
+        """Drop one reference; returns the value if that was the last one, else None"""
+        if id_ == 0:
+            return None
+        self.refs[id_] -= 1
+        if self.refs[id_]:
+            return None
+        value = self.values[id_]
+        del self.ids[value]
+        self.values[id_] = None
+        self.free.append(id_)
+        return value
+
+    def find(self, value):
+        """Id of a value, or -1 if the table has never seen it"""
+        return self.ids.get(value, -1)
+
+    def __getitem__(self, id_):
+        return self.values[id_]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def copy(self):
+        copy = Interned.__new__(Interned)
+        copy.values = self.values[:]
+        copy.ids = dict(self.ids)
+        copy.refs = self.refs[:]
+        copy.free = self.free[:]
+        return copy
+
+
+class Table:
+    """Rows of objects keyed by namespace/name, one typed array per column
+
+    Subclasses list their interned string columns in STRINGS and their
+    numeric columns (name -> array typecode) in NUMBERS, fill a row from an
+    object in _fill and give back any other interned references in
+    _release.
+    """
+
+    STRINGS = ()
+    NUMBERS = {}
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.strings = Interned()
+        self.keys = {}  # object key -> row
+        self.names = []
+        self.live = array("b")
+        self.free = []
+        self.columns = {name: array("I") for name in self.STRINGS}
+        self.columns.update((name, array(code)) for name, code in self.NUMBERS.items())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def snapshot(self):
+        """A copy that later puts and drops leave alone
+
+        Only the columns and indexes are copied (a few milliseconds for
+        100000 rows); the strings and label dicts they refer to are shared,
+        as they are never changed in place.
+        """
+        copy = object.__new__(type(self))
+        copy.__dict__.update(self.__dict__)
+        copy.strings = self.strings.copy()
+        copy.keys = dict(self.keys)
+        copy.names = self.names[:]
+        copy.live = self.live[:]
+        copy.free = self.free[:]
+        copy.columns = {name: column[:] for name, column in self.columns.items()}
+        return copy
+
+    def put(self, key, obj):
+        row = self.keys.get(key)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = len(self.names)
+                self.names.append(None)
+                self.live.append(0)
+                for column in self.columns.values():
+                    column.append(0)
+            self.keys[key] = row
+        elif self.live[row]:
+            self._release(row)
+        self._fill(row, obj)
+        self.live[row] = 1
+
+    def drop(self, key):
+        row = self.keys.pop(key, None)
+        if row is not None:
+            self._release(row)
+            self.live[row] = 0
+            self.names[row] = None
+            self.free.append(row)
+
+    def _fill(self, row, obj):
+        raise NotImplementedError
+
+    def _release(self, row):
+        """Give back the interned references a live row holds"""
+        release = self.strings.release
+        for name in self.STRINGS:
+            release(self.columns[name][row])
+
+    def _ids(self, value):
+        if isinstance(value, (set, frozenset, list, tuple)):
+            return {self.strings.find(item) for item in value}
+        return self.strings.find(value)
+
+    def _mask(self, name, value):
+        """Per-row truth values of one filter"""
+        if name.startswith("min_"):
+            return map(operator.ge, self.columns[name[4:]], repeat(value))
+        if name.startswith("max_"):
+            return map(operator.le, self.columns[name[4:]], repeat(value))
+        negate = name.endswith("_not")
+        column = self.columns[name[:-4] if negate else name]
+        if name[:-4 if negate else None] in self.NUMBERS:
+            return map(operator.ne if negate else operator.eq, column, repeat(value))
+        ids = self._ids(value)
+        if isinstance(ids, set):
+            matches = map(ids.__contains__, column)
+            return map(operator.not_, matches) if negate else matches
+        return map(operator.ne if negate else operator.eq, column, repeat(ids))
+
+    def select(self, **filters):
+        """Rows matching every filter, in row order
+
+        A filter is column=value (or a set of values), column_not=value,
+        min_column=number or max_column=number; None values are ignored.
+        """
+        mask = self.live
+        for name, value in filters.items():
+            if value is not None:
+                mask = map(operator.and_, mask, self._mask(name, value))
+        return list(compress(range(len(self.live)), mask))
+
+    def sorted(self, rows):
+        """Rows ordered by namespace/name, the order the API server lists them in"""
+        namespaces = self.columns.get("namespace")
+        if namespaces is None:
+            return sorted(rows, key=self.names.__getitem__)
+        values = self.strings.values
+        return sorted(rows, key=lambda row: f"{values[namespaces[row]]}/{self.names[row]}")
+
+    def stats(self):
+        return {
+            "rows": len(self.keys),
+            "free_rows": len(self.free),
+            "strings": len(self.strings),
+            "free_strings": len(self.strings.free),
+            "column_bytes": sum(column.itemsize * len(column) for column in self.columns.values()),
+        }
+
+
+class PodTable(Table):
+    """Pods, with the kubectl STATUS, readiness and restarts precomputed"""
+
+    STRINGS = ("namespace", "node", "phase", "status", "reason", "owner_kind", "owner_name")
+    NUMBERS = {"labels": "I", "ready": "H", "containers": "H", "restarts": "I", "deleting": "b", "created": "d"}
+
+    def clear(self):
+        super().clear()
+        # Label sets as sorted (key id, value id) tuples, and each set as a
+        # dict shared by every model built from it. A label set holds one
+        # reference to each of its strings, whatever the number of rows using it.
+        self.label_sets = Interned()
+        self._label_dicts = [{}]
+
+    def snapshot(self):
+        copy = super().snapshot()
+        copy.label_sets = self.label_sets.copy()
+        copy._label_dicts = self._label_dicts[:]
+        return copy
+
+    def _release(self, row):
+        super()._release(row)
+        label_set = self.label_sets.release(self.columns["labels"][row])
+        if label_set is not None:
+            self._label_dicts[self.columns["labels"][row]] = None
+            for key, value in label_set:
+                self.strings.release(key)
+                self.strings.release(value)
+
+    def _fill(self, row, obj):
+        pod = Pod.from_dict(obj)
+        strings = self.strings
+        columns = self.columns
+        self.names[row] = pod.name
+        columns["namespace"][row] = strings.id(pod.namespace)
+        columns["node"][row] = strings.id(pod.node)
+        columns["phase"][row] = strings.id(pod.phase)
+        columns["status"][row] = strings.id(pod.status)
+        columns["reason"][row] = strings.id(pod.last_termination_reason)
+        owner_kind, owner_name = pod.owner or (None, None)
+        columns["owner_kind"][row] = strings.id(owner_kind)
+        columns["owner_name"][row] = strings.id(owner_name)
+        label_set = tuple(sorted((strings.id(key), strings.id(value)) for key, value in pod.labels.items()))
+        if not label_set:
+            labels = 0
+        elif self.label_sets.find(label_set) >= 0:
+            # The set already holds its strings; give back the ones just taken
+            labels = self.label_sets.id(label_set)
+            for key, value in label_set:
+                strings.release(key)
+                strings.release(value)
+        else:
+            labels = self.label_sets.id(label_set)
+            if labels == len(self._label_dicts):
+                self._label_dicts.append(None)
+            self._label_dicts[labels] = dict(pod.labels)
+        columns["labels"][row] = labels
+        columns["ready"][row] = min(pod.ready, 0xFFFF)
+        columns["containers"][row] = min(pod.containers, 0xFFFF)
+        columns["restarts"][row] = pod.restarts
+        columns["deleting"][row] = pod.deleting
+        created = parse_time(obj.get("metadata", {}).get("creationTimestamp"))
+        columns["created"][row] = created.timestamp() if created is not None else 0.0
+
+    def select(self, unready=False, **filters):
+        """Rows matching the filters (see Table.select); unready=True keeps
+        only pods with fewer ready containers than containers"""
+        rows = super().select(**filters)
+        if unready:
+            ready, containers = self.columns["ready"], self.columns["containers"]
+            rows = [row for row in rows if ready[row] < containers[row]]
+        return rows
+
+    def model(self, row):
+        """The row as a models.Pod"""
+        values = self.strings.values
+        columns = self.columns
+        pod = Pod()
+        pod.namespace = values[columns["namespace"][row]]
+        pod.name = self.names[row]
+        pod.labels = self._label_dicts[columns["labels"][row]]
+        pod.phase = values[columns["phase"][row]]
+        pod.node = values[columns["node"][row]]
+        pod.status = values[columns["status"][row]]
+        pod.ready = columns["ready"][row]
+        pod.containers = columns["containers"][row]
+        pod.restarts = columns["restarts"][row]
+        pod.last_termination_reason = values[columns["reason"][row]]
+        owner_kind = columns["owner_kind"][row]
+        pod.owner = (values[owner_kind], values[columns["owner_name"][row]]) if owner_kind else None
+        pod.deleting = bool(columns["deleting"][row])
+        return pod
+
+    def models(self, rows):
+        return [self.model(row) for row in rows]
+
+    def counts(self, rows):
+        """Per-namespace pod, phase and restart totals of some rows, as analysis.count_pods returns"""
+        values = self.strings.values
+        namespaces, phases, restarts = self.columns["namespace"], self.columns["phase"], self.columns["restarts"]
+        by_id = {}
+        for row in rows:
+            entry = by_id.get(namespaces[row])
+            if entry is None:
+                entry = by_id[namespaces[row]] = {
+                    "pods": 0, "running": 0, "pending": 0, "failed": 0, "succeeded": 0, "restarts": 0,
+                }
+            entry["pods"] += 1
+            entry["restarts"] += restarts[row]
+            phase = PHASE_COUNTS.get(values[phases[row]])
+            if phase is not None:
+                entry[phase] += 1
+        return {values[id_]: entry for id_, entry in by_id.items()}
+
+    def suspects(self, namespace=None, nodes=()):
+        """Rows the health analysis has to look at: pods that may be unhealthy
+        and every pod on one of the given (problem) nodes"""
+        rows = set(self.select(namespace=namespace, status_not=HEALTHY_POD_STATUSES))
+        rows.update(self.select(namespace=namespace, min_restarts=RESTART_THRESHOLD))
+        rows.update(self.select(namespace=namespace, status="Running", unready=True))
+        if nodes:
+            rows.update(self.select(namespace=namespace, node=set(nodes)))
+        return sorted(rows)
+
+    def pod_table(self, rows, all_namespaces=True, now=None):
+        """Render rows like summaries.pod_table renders a pod list"""
+        headers = ["NAME", "READY", "STATUS", "RESTARTS", "AGE"]
+        if all_namespaces:
+            headers.insert(0, "NAMESPACE")
+        values = self.strings.values
+        columns = self.columns
+        lines = []
+        for row in self.sorted(rows):
+            created = columns["created"][row]
+            line = [
+                self.names[row],
+                f"{columns['ready'][row]}/{columns['containers'][row]}",
+                values[columns["status"][row]],
+                str(columns["restarts"][row]),
+                format_age(datetime.fromtimestamp(created, timezone.utc) if created else None, now),
+            ]
+            if all_namespaces:
+                line.insert(0, values[columns["namespace"][row]] or "")
+            lines.append(line)
+        if not lines:
+            return "No resources found\n"
+        return format_table(headers, lines)
+
+
+class NodeTable(Table):
+    """Nodes: readiness, true problem conditions and schedulability"""
+
+    NUMBERS = {"ready": "b", "unschedulable": "b", "problems": "I"}
+
+    def clear(self):
+        super().clear()
+        self.problem_sets = Interned()
+
+    def snapshot(self):
+        copy = super().snapshot()
+        copy.problem_sets = self.problem_sets.copy()
+        return copy
+
+    def _fill(self, row, obj):
+        node = Node.from_dict(obj)
+        self.names[row] = node.name
+        columns = self.columns
+        # -1 when the node reports no Ready condition at all
+        columns["ready"][row] = -1 if node.ready is None else node.ready
+        columns["unschedulable"][row] = node.unschedulable
+        columns["problems"][row] = self.problem_sets.id(tuple(node.problems) if node.problems else None)
+
+    def _release(self, row):
+        super()._release(row)
+        self.problem_sets.release(self.columns["problems"][row])
+
+    def model(self, row):
+        columns = self.columns
+        node = Node()
+        node.name = self.names[row]
+        ready = columns["ready"][row]
+        node.ready = None if ready < 0 else bool(ready)
+        node.problems = list(self.problem_sets[columns["problems"][row]] or ())
+        node.unschedulable = bool(columns["unschedulable"][row])
+        return node
+
+    def models(self, rows):
+        return [self.model(row) for row in rows]
+
+
+class TableStore(ObjectStore):
+    """ObjectStore that also keeps its objects as rows of a Table
+
+    The table comes on top of the stored objects (a few MB per 10000 pods),
+    which full reads and watch deltas still serve; it makes the scans cheap,
+    not the store smaller.
+    """
+
+    def __init__(self, table, list_kind, api_version="v1", max_changes=10000, compact=False):
+        super().__init__(list_kind, api_version, max_changes, compact)
+        self.table = table
+
+    def _prepare(self, items):
+        # A relist fills a new table; readers keep the old one until the swap
+        table = type(self.table)()
+        with gc_paused():
+            for obj in items:
+                table.put(object_key(obj), obj)
+        return table
+
+    def _swap(self, table):
+        self.table = table
+
+    def upsert(self, obj):
+        with self._lock:
+            super().upsert(obj)
+            self.table.put(object_key(obj), obj)
+
+    def delete(self, obj):
+        with self._lock:
+            super().delete(obj)
+            self.table.drop(object_key(obj))
+
+    def read(self, function, *args):
+        """function(table, *args) on a snapshot of the table, outside the lock"""
+        with self._lock:
+            table = self.table.snapshot()
+        return function(table, *args)
@@ -0,0 +1,178 @@
+"""
+Runtime configuration for the Kubernetes MCP Server
+
+Every setting can be overridden through a K8S_MCP_* environment variable so
+the server can be tuned from an MCP client config (e.g. Claude Desktop "env").
+"""
+
+import os
+import stat
+
+
+def env_int(name, default):
+    """Read an integer environment variable"""
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name, default):
+    """Read a float environment variable"""
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def env_list(name, default=()):
+    """Read a comma-separated environment variable into a list"""
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return list(default)
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def env_map(name, default=None):
+    """Read a comma-separated list of key=value pairs into a dict of floats"""
+    result = dict(default or {})
+    for item in env_list(name):
+        key, _, value = item.rpartition("=")
+        result[key.strip()] = float(value)
+    return result
+
+
+def env_bool(name, default):
+    """Read a boolean environment variable (1/true/yes/on)"""
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_str(name, default):
+    """Read a string environment variable"""
+    value = os.environ.get(name)
+    return value if value not in (None, "") else default
+
+
+def user_cache_dir():
+    """Per-user directory for files the server keeps: $XDG_CACHE_HOME/k8s-mcp or ~/.cache/k8s-mcp"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "k8s-mcp")
+
+
+def owned_by_user(st):
+    """Whether a stat result belongs to the user running the server"""
+    return not hasattr(os, "getuid") or st.st_uid == os.getuid()
+
+
+def private_dir(path):
+    """Create a directory with mode 0700 if it is missing; raise PermissionError
+    if it is not a directory of this user's that others cannot write to"""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode) or not owned_by_user(st) or st.st_mode & 0o022:
+        raise PermissionError(f"{path} is not a private directory of this user (want mode 0700)")
+    return path
+
+
+# Response cache TTLs in seconds per resource URI or tool name (0 = not cached).
+# get_pod_logs is opt-in because agents usually want the newest lines.
+DEFAULT_CACHE_TTLS = {
+    "k8s://pods": 5,
+    "k8s://services": 15,
+    "k8s://nodes": 15,
+    "k8s://events": 5,
+    "k8s://deployments": 10,
+    "k8s://pods/summary": 5,
+    "k8s://nodes/summary": 15,
+    "k8s://services/summary": 15,
+    "k8s://deployments/summary": 10,
+    "cluster_health_check": 10,
+    "check_pod_status": 5,
+    "analyze_service_connectivity": 10,
+    "get_pod_logs": 0,
+    "search_pod_logs": 0,
+    "get_events": 0,
+}
+
+
+class Config:
+    """Server settings resolved from the environment"""
+
+    def __init__(self):
+        # Cluster backend: "auto" (API client, falling back to kubectl),
+        # "api" or "kubectl"
+        self.backend = env_str("K8S_MCP_BACKEND", "auto")
+        # MCP transport: "stdio" (one client per process) or "http" (Streamable
+        # HTTP, many sessions sharing this process's caches and watches)
+        self.transport = env_str("K8S_MCP_TRANSPORT", "stdio")
+        self.http_host = env_str("K8S_MCP_HTTP_HOST", "127.0.0.1")
+        self.http_port = env_int("K8S_MCP_HTTP_PORT", 8000)
+        self.http_path = env_str("K8S_MCP_HTTP_PATH", "/mcp")
+        # Host header values (host:port, port may be *) accepted besides the
+        # loopback names when http_host is not a loopback address; "*"
+        # turns DNS rebinding protection off (put an authenticating proxy
+        # in front first)
+        self.http_allowed_hosts = env_list("K8S_MCP_HTTP_ALLOWED_HOSTS")
+        # Port serving the self-metrics in Prometheus text format on
+        # http_host:PORT/metrics (0 disables; works with every transport)
+        self.prometheus_port = env_int("K8S_MCP_PROMETHEUS_PORT", 0)
+        # Requests one session may have in flight at once
+        self.session_max_concurrency = env_int("K8S_MCP_SESSION_MAX_CONCURRENCY", 4)
+        # Kubeconfig context to use (default: current context)
+        self.context = env_str("K8S_MCP_CONTEXT", None)
+        # Further kubeconfig contexts to serve alongside it ("all" loads every
+        # context); tools and resources pick one with a `context` argument
+        self.contexts = env_list("K8S_MCP_CONTEXTS")
+        # Path to the kubectl binary used by the kubectl backend
+        self.kubectl = env_str("K8S_MCP_KUBECTL", "kubectl")
+        # Upper bound on cluster calls running at the same time
+        self.max_concurrency = env_int("K8S_MCP_MAX_CONCURRENCY", 8)
+        # Default per-call timeout in seconds
+        self.timeout = env_float("K8S_MCP_TIMEOUT", 30.0)
+        # Time each cluster gets to answer a context=all request before it is
+        # reported as timed out and the other clusters' results are returned
+        self.context_timeout = env_float("K8S_MCP_CONTEXT_TIMEOUT", self.timeout)
+        # Objects fetched per LIST page when reading large collections
+        self.list_chunk_size = env_int("K8S_MCP_LIST_CHUNK_SIZE", 500)
+        # Kinds served from a list+watch cache instead of a LIST per read
+        # ("all" enables every k8s:// resource kind)
+        self.informers = env_list("K8S_MCP_INFORMERS")
+        # Seconds without watch activity before cached data counts as stale
+        self.informer_stale_after = env_float("K8S_MCP_INFORMER_STALE_AFTER", 120.0)
+        # Changes remembered per watched kind for since=<resourceVersion> reads
+        self.change_log_size = env_int("K8S_MCP_CHANGE_LOG_SIZE", 10000)
+        # Hold watched objects as JSON text rather than decoded dicts
+        self.informer_compact = env_bool("K8S_MCP_INFORMER_COMPACT", True)
+        # Bounds of the event store kept by the events watch cache
+        self.event_max_records = env_int("K8S_MCP_EVENT_MAX_RECORDS", 10000)
+        self.event_max_age = env_float("K8S_MCP_EVENT_MAX_AGE", 3600.0)
+        # Seconds between metrics.k8s.io samples (0 disables usage history)
+        self.metrics_interval = env_float("K8S_MCP_METRICS_INTERVAL", 0.0)
+        # Samples kept per node/pod/container series, and the most series kept
+        self.metrics_history = env_int("K8S_MCP_METRICS_HISTORY", 240)
+        self.metrics_max_series = env_int("K8S_MCP_METRICS_MAX_SERIES", 50000)
+        # Seconds a subscribed resource collects watch events before one
+        # resources/updated notification is sent for all of them
+        self.subscribe_debounce = env_float("K8S_MCP_SUBSCRIBE_DEBOUNCE", 1.0)
+        # Byte budget for cached responses
+        self.cache_max_bytes = env_int("K8S_MCP_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+        # Hard cap on log bytes returned (and buffered) by one log request
+        self.log_max_bytes = env_int("K8S_MCP_LOG_MAX_BYTES", 1024 * 1024)
+        # Longest a get_pod_logs call may follow a log
+        self.log_follow_max_seconds = env_float("K8S_MCP_LOG_FOLLOW_MAX_SECONDS", 60.0)
+        # Pod log streams one search_pod_logs call reads at the same time
+        self.log_search_concurrency = env_int("K8S_MCP_LOG_SEARCH_CONCURRENCY", 10)
+        # Fraction of requests profiled with cProfile (0 disables; see profiling.py),
+        # whether tracemalloc also records their allocations, the tool names or
+        # resource URIs eligible (default: all), and where reports are written
+        self.profile_rate = env_float("K8S_MCP_PROFILE_RATE", 0.0)
+        self.profile_memory = env_bool("K8S_MCP_PROFILE_MEMORY", False)
+        self.profile_names = env_list("K8S_MCP_PROFILE_NAMES")
+        self.profile_dir = env_str("K8S_MCP_PROFILE_DIR", os.path.join(user_cache_dir(), "profiles"))
+        self.profile_max_files = env_int("K8S_MCP_PROFILE_MAX_FILES", 100)
+        # File shared by this user's server processes that remembers the
+        # kubeconfig's contexts and the APIs each cluster lacks, and how long
+        # a missing API is trusted to stay missing (0 disables the file)
+        self.discovery_cache = env_str("K8S_MCP_DISCOVERY_CACHE", os.path.join(user_cache_dir(), "discovery.json"))
+        self.discovery_ttl = env_float("K8S_MCP_DISCOVERY_TTL", 600.0)
+        # Per-name TTL overrides, e.g. "get_pod_logs=5,k8s://pods=0"
+        self.cache_ttls = env_map("K8S_MCP_CACHE_TTLS", DEFAULT_CACHE_TTLS)
@@ -0,0 +1,181 @@
+"""
+Service connectivity analysis for the Kubernetes MCP Server
+
+Joins Services, EndpointSlices and Pods that were each listed once (decoded
+into the compact models of models.py), instead of fetching endpoints
+service by service. Slices are grouped by their
+kubernetes.io/service-name label, and pods are grouped by label set and
+indexed by label so every service's selector is resolved with a few set
+intersections.
+"""
+
+from models import SERVICE_NAME_LABEL
+from summaries import format_table
+
+# Problem pods listed per service in the text report
+DETAIL_LIMIT = 10
+
+
+def endpoints_as_slices(endpoints_list):
+    """Convert core/v1 Endpoints objects to EndpointSlice-shaped dicts (for clusters without slices)"""
+    slices = []
+    for endpoints in endpoints_list:
+        metadata = endpoints.get("metadata", {})
+        converted = []
+        for subset in endpoints.get("subsets") or []:
+            for address, ready in [(a, True) for a in subset.get("addresses") or []] + [
+                (a, False) for a in subset.get("notReadyAddresses") or []
+            ]:
+                converted.append({
+                    "addresses": [address.get("ip")],
+                    "conditions": {"ready": ready},
+                    "nodeName": address.get("nodeName"),
+                    "targetRef": address.get("targetRef"),
+                })
+        slices.append({
+            "metadata": {
+                "name": metadata.get("name"),
+                "namespace": metadata.get("namespace"),
+                "labels": {SERVICE_NAME_LABEL: metadata.get("name")},
+            },
+            "endpoints": converted,
+        })
+    return slices
+
+
+class LabelIndex:
+    """Pods per namespace, grouped by label set, with the groups indexed by (label, value)
+
+    The replicas of a workload share their labels, so the index holds one
+    entry per distinct label set rather than one per pod, and a selector is
+    resolved by intersecting a few small sets of groups.
+    """
+
+    def __init__(self, pods):
+        self.pods = {}
+        self.groups = {}  # (namespace, label items) -> keys of its pods
+        self.by_label = {}  # (namespace, (label, value)) -> groups with that label
+        for pod in pods:
+            key = (pod.namespace, pod.name)
+            self.pods[key] = pod
+            group = (pod.namespace, tuple(pod.labels.items()))
+            members = self.groups.get(group)
+            if members is None:
+                members = self.groups[group] = []
+                for label in group[1]:
+                    self.by_label.setdefault((pod.namespace, label), set()).add(group)
+            members.append(key)
+
+    def select(self, namespace, selector):
+        """Keys of the pods in a namespace matching an equality selector"""
+        matched = None
+        for label in selector.items():
+            groups = self.by_label.get((namespace, label), set())
+            matched = groups if matched is None else matched & groups
+            if not matched:
+                return set()
+        return {key for group in matched or () for key in self.groups[group]}
+
+
+def service_connectivity(services, slices, pods):
+    """One report dict per service: ready, not-ready and missing endpoints and a status"""
+    index = LabelIndex(pods)
+    endpoints_by_service = {}
+    for endpoint_slice in slices:
+        if endpoint_slice.service:
+            key = (endpoint_slice.namespace, endpoint_slice.service)
+            endpoints_by_service.setdefault(key, []).extend(endpoint_slice.endpoints)
+
+    reports = []
+    for service in services:
+        namespace = service.namespace
+        key = (namespace, service.name)
+        selector = service.selector
+        ready = []
+        not_ready = []
+        covered = set()
+        seen = set()
+        for endpoint in endpoints_by_service.get(key, []):
+            name = endpoint.name
+            if name in seen:
+                continue  # dual-stack services list a pod once per address family
+            seen.add(name)
+            pod_key = (endpoint.target_namespace or namespace, endpoint.target_name)
+            if endpoint.target_kind == "Pod":
+                covered.add(pod_key)
+            if not endpoint.ready:
+                not_ready.append(_describe(name, index.pods.get(pod_key), endpoint))
+            else:
+                ready.append(name)
+        selected = index.select(namespace, selector) if selector else set()
+        missing = sorted(
+            _describe(pod_key[1], index.pods[pod_key])
+            for pod_key in selected - covered
+            if not index.pods[pod_key].deleting
+        )
+        reports.append({
+            "namespace": namespace,
+            "name": key[1],
+            "type": service.type,
+            "selector": ",".join(f"{k}={v}" for k, v in selector.items()),
+            "selected_pods": len(selected),
+            "ready": sorted(ready),
+            "not_ready": sorted(not_ready),
+            "missing": missing,
+            "status": _status(service.type, selector, selected, ready, not_ready, missing),
+        })
+    return reports
+
+
+def _describe(name, pod, endpoint=None):
+    """Name a problem endpoint with the pod's phase and node when known"""
+    if pod is None:
+        return name
+    phase = pod.phase or "Unknown"
+    node = pod.node or (endpoint.node if endpoint is not None else None) or "unscheduled"
+    return f"{name} ({phase} on {node})"
+
+
+def _status(service_type, selector, selected, ready, not_ready, missing):
+    if service_type == "ExternalName":
+        return "ExternalName"
+    if not selector:
+        return "OK (manual endpoints)" if ready else "No selector and no endpoints"
+    if not selected and not ready and not not_ready:
+        return "Selector matches no pods"
+    if not ready:
+        return "No ready endpoints"
+    if not_ready or missing:
+        return "Degraded"
+    return "OK"
+
+
+def connectivity_report(reports, scope):
+    """Render service reports as a table followed by details for unhealthy services"""
+    if not reports:
+        return f"No services found in {scope}\n"
+
+    def healthy(report):
+        return report["status"].startswith(("OK", "ExternalName"))
+
+    # Problems first so they survive truncation by the client
+    reports = sorted(reports, key=lambda r: (healthy(r), r["namespace"], r["name"]))
+    problems = [r for r in reports if not healthy(r)]
+    rows = [
+        [
+            r["namespace"], r["name"], r["type"], str(len(r["ready"])), str(len(r["not_ready"])),
+            str(len(r["missing"])), r["status"],
+        ]
+        for r in reports
+    ]
+    text = f"Service connectivity in {scope}: {len(reports)} services, {len(problems)} with problems\n\n"
+    text += format_table(["NAMESPACE", "NAME", "TYPE", "READY", "NOT-READY", "MISSING", "STATUS"], rows)
+    for r in problems:
+        text += f"\n{r['namespace']}/{r['name']}: {r['status']}"
+        text += f" (selector {r['selector']}, {r['selected_pods']} pods selected)\n" if r["selector"] else "\n"
+        for label, pods in (("not ready", r["not_ready"]), ("missing from endpoints", r["missing"])):
+            for pod in pods[:DETAIL_LIMIT]:
+                text += f"  {label}: {pod}\n"
+            if len(pods) > DETAIL_LIMIT:
+                text += f"  ... {len(pods) - DETAIL_LIMIT} more {label}\n"
+    return text
@@ -4,9 +4,13 @@ Debugging Demo Script for Video - Show MCP Tools in Action
 """
 
 import subprocess
-import json
 import time
 
+from connectivity import service_connectivity
+from events import EventStore
+from models import MODELS, decode_items, loads
+from usage import UsageHistory, usage_table
+
 def print_header(title):
     """Print a formatted header"""
     print(f"\n{'='*60}")
@@ -19,29 +23,34 @@ def debug_pod_issues():
     
     print("🔍 Step 1: Identify problematic pods")
     result = subprocess.run(
-        ["kubectl", "get", "pods", "--all-namespaces", "--field-selector=status.phase!=Running"],
+        ["kubectl", "get", "pods", "--all-namespaces", "--field-selector=status.phase!=Running", "-o", "json"],
         capture_output=True, text=True
     )
     
-    if result.stdout.strip():
+    pods = loads(result.stdout)['items'] if result.returncode == 0 else []
+    if pods:
         print("🚨 Found problematic pods:")
-        lines = result.stdout.strip().split('\n')
-        for line in lines[1:]:  # Skip header
-            if line.strip():
-                print(f"   {line}")
+        for pod in pods:
+            print(f"   {pod['metadata']['namespace']}/{pod['metadata']['name']}: {pod['status'].get('phase')}")
         
         print("\n🔍 Step 2: Analyze pod events")
-        # Get events for problematic pods
+        # Load events once, then look each pod up in the indexed store
         result = subprocess.run(
-            ["kubectl", "get", "events", "--all-namespaces", "--sort-by='.lastTimestamp'"],
+            ["kubectl", "get", "events", "--all-namespaces", "-o", "json"],
             capture_output=True, text=True
         )
+        store = EventStore(max_age=float("inf"))
+        if result.returncode == 0:
+            store.replace(loads(result.stdout)['items'], None)
         
-        print("📋 Recent events:")
-        lines = result.stdout.strip().split('\n')
-        for line in lines[-5:]:  # Last 5 events
-            if line.strip():
-                print(f"   {line}")
+        for pod in pods:
+            metadata = pod['metadata']
+            records = store.query(kind="Pod", namespace=metadata['namespace'], name=metadata['name'], limit=5)
+            print(f"📋 Recent events for {metadata['name']} ({metadata['namespace']}):")
+            for record in records:
+                print(f"   {record.type} {record.reason} (x{record.count}): {record.message}")
+            if not records:
+                print("   (none)")
     else:
         print("✅ No problematic pods found!")
 
@@ -62,71 +71,66 @@ def debug_service_connectivity():
             print(f"   {line}")
     
     print("\n🔍 Step 2: Check service endpoints")
-    # Check endpoints for each service
-    services_result = subprocess.run(
-        ["kubectl", "get", "services", "--all-namespaces", "-o", "json"],
-        capture_output=True, text=True
-    )
-    
-    services = json.loads(services_result.stdout)
-    for service in services['items']:
-        service_name = service['metadata']['name']
-        namespace = service['metadata']['namespace']
-        
-        # Get endpoints
-        endpoints_result = subprocess.run(
-            ["kubectl", "get", "endpoints", service_name, "-n", namespace, "-o", "json"],
+    # One LIST each of services, endpoint slices and pods, joined in memory,
+    # instead of one `kubectl get endpoints` per service
+    lists = {}
+    for kind in ("services", "endpointslices", "pods"):
+        kind_result = subprocess.run(
+            ["kubectl", "get", kind, "--all-namespaces", "-o", "json"],
             capture_output=True, text=True
         )
-        
-        if endpoints_result.returncode == 0:
-            endpoints = json.loads(endpoints_result.stdout)
-            if endpoints['subsets']:
-                ready_endpoints = 0
-                for subset in endpoints['subsets']:
-                    ready_endpoints += len(subset.get('addresses', []))
-                
-                if ready_endpoints > 0:
-                    print(f"   ✅ {service_name} ({namespace}): {ready_endpoints} ready endpoints")
-                else:
-                    print(f"   ⚠️  {service_name} ({namespace}): No ready endpoints")
-            else:
-                print(f"   ❌ {service_name} ({namespace}): No endpoints")
+        if kind_result.returncode != 0:
+            print(f"   ❌ Could not list {kind}: {kind_result.stderr.strip()}")
+            return
+        lists[kind] = decode_items(kind_result.stdout, MODELS[kind])
+    
+    reports = service_connectivity(lists['services'], lists['endpointslices'], lists['pods'])
+    for report in reports:
+        service_name = report['name']
+        namespace = report['namespace']
+        if report['status'].startswith(("OK", "ExternalName")):
+            print(f"   ✅ {service_name} ({namespace}): {len(report['ready'])} ready endpoints")
+        elif report['ready']:
+            print(f"   ⚠️  {service_name} ({namespace}): {len(report['ready'])} ready, "
+                  f"{len(report['not_ready'])} not ready, {len(report['missing'])} missing")
         else:
-            print(f"   ❌ {service_name} ({namespace}): Could not retrieve endpoints")
+            print(f"   ❌ {service_name} ({namespace}): {report['status']}")
 
 def debug_resource_usage():
     """Demonstrate debugging resource usage"""
     print_header("💾 DEBUGGING RESOURCE USAGE")
     
+    # Read metrics.k8s.io directly (what `kubectl top` formats) into a usage
+    # history; the MCP server keeps one of these over time when
+    # K8S_MCP_METRICS_INTERVAL is set
+    history = UsageHistory(capacity=1)
+    
     print("🔍 Step 1: Check node resources")
     result = subprocess.run(
-        ["kubectl", "top", "nodes"],
+        ["kubectl", "get", "--raw", "/apis/metrics.k8s.io/v1beta1/nodes"],
         capture_output=True, text=True
     )
     
     if result.returncode == 0:
+        history.add_node_metrics(loads(result.stdout)['items'])
         print("📊 Node resource usage:")
-        lines = result.stdout.strip().split('\n')
-        for line in lines:
-            if line.strip():
-                print(f"   {line}")
+        for line in usage_table(history, "node", history.select("node"), 600).splitlines():
+            print(f"   {line}")
     else:
         print("⚠️  Metrics server not available. Install with:")
         print("   kubectl apply -f https://github.com/kubernetes-sigs/metrics-server/releases/latest/download/components.yaml")
     
-    print("\n�� Step 2: Check pod resources")
+    print("\n🔍 Step 2: Check pod resources")
     result = subprocess.run(
-        ["kubectl", "top", "pods", "--all-namespaces"],
+        ["kubectl", "get", "--raw", "/apis/metrics.k8s.io/v1beta1/pods"],
         capture_output=True, text=True
     )
     
     if result.returncode == 0:
-        print("📊 Pod resource usage:")
-        lines = result.stdout.strip().split('\n')
-        for line in lines[:6]:  # Show first 6 lines
-            if line.strip():
-                print(f"   {line}")
+        history.add_pod_metrics(loads(result.stdout)['items'])
+        print("📊 Pod resource usage (top 5 by CPU):")
+        for line in usage_table(history, "pod", history.select("pod"), 600, top=5).splitlines():
+            print(f"   {line}")
     else:
         print("⚠️  Pod metrics not available")
 
@@ -4,9 +4,12 @@ Enhanced Demo Script for Video - Kubernetes MCP Server
 """
 
 import subprocess
-import json
 import time
 
+from analysis import analyze_cluster
+from models import Deployment, Node, Pod, loads
+from summaries import POD_COLUMNS, summary_rows
+
 def print_header(title):
     """Print a formatted header"""
     print(f"\n{'='*60}")
@@ -19,7 +22,7 @@ def get_pods():
         ["kubectl", "get", "pods", "--all-namespaces", "-o", "json"],
         capture_output=True, text=True
     )
-    return json.loads(result.stdout)
+    return loads(result.stdout)
 
 def get_services():
     """Get all services in the cluster"""
@@ -27,7 +30,7 @@ def get_services():
         ["kubectl", "get", "services", "--all-namespaces", "-o", "json"],
         capture_output=True, text=True
     )
-    return json.loads(result.stdout)
+    return loads(result.stdout)
 
 def get_nodes():
     """Get all nodes in the cluster"""
@@ -35,7 +38,7 @@ def get_nodes():
         ["kubectl", "get", "nodes", "-o", "json"],
         capture_output=True, text=True
     )
-    return json.loads(result.stdout)
+    return loads(result.stdout)
 
 def get_deployments():
     """Get all deployments in the cluster"""
@@ -43,55 +46,36 @@ def get_deployments():
         ["kubectl", "get", "deployments", "--all-namespaces", "-o", "json"],
         capture_output=True, text=True
     )
-    return json.loads(result.stdout)
+    return loads(result.stdout)
 
 def cluster_health_check():
     """Perform a comprehensive cluster health check"""
     print_header("🏥 CLUSTER HEALTH CHECK")
     
-    # Check pods
-    print("📊 Pod Status:")
-    result = subprocess.run(
-        ["kubectl", "get", "pods", "--all-namespaces"],
-        capture_output=True, text=True
+    # Analyze decoded objects instead of re-parsing `kubectl get` tables
+    report = analyze_cluster(
+        [Pod.from_dict(pod) for pod in get_pods()['items']],
+        [Node.from_dict(node) for node in get_nodes()['items']],
+        [Deployment.from_dict(deployment) for deployment in get_deployments()['items']],
+        [],
     )
+    summary = report['summary']
+    print(f"📊 Overall: {report['status']}")
+    print(f"   Nodes: {summary['nodes_ready']}/{summary['nodes']} ready")
+    print(f"   Pods: {summary['pods'] - summary['unhealthy_pods']}/{summary['pods']} healthy")
+    print(f"   Deployments: {summary['deployments'] - summary['degraded_deployments']}/{summary['deployments']} healthy")
     
-    lines = result.stdout.strip().split('\n')
-    if len(lines) > 1:  # Skip header
-        for line in lines[1:]:  # Skip header line
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 5:
-                    namespace = parts[0]
-                    name = parts[1]
-                    ready = parts[2]
-                    status = parts[3]
-                    restarts = parts[4]
-                    
-                    # Highlight problematic pods
-                    if status != "Running":
-                        print(f"   ⚠️  {name} ({namespace}): {status} - {ready} ready, {restarts} restarts")
-                    else:
-                        print(f"   ✅ {name} ({namespace}): {status} - {ready} ready")
+    if report['findings']:
+        print("\n⚠️  Findings:")
+        for finding in report['findings']:
+            print(f"   ⚠️  {finding['kind']} {finding['name']} ({finding['namespace']}): {', '.join(finding['reasons'])}")
     
     # Check services
     print("\n🔗 Service Status:")
-    result = subprocess.run(
-        ["kubectl", "get", "services", "--all-namespaces"],
-        capture_output=True, text=True
-    )
-    
-    lines = result.stdout.strip().split('\n')
-    if len(lines) > 1:
-        for line in lines[1:]:
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 4:
-                    namespace = parts[0]
-                    name = parts[1]
-                    service_type = parts[2]
-                    cluster_ip = parts[3]
-                    print(f"   🔗 {name} ({namespace}): {service_type} - {cluster_ip}")
+    for service in get_services()['items']:
+        metadata = service['metadata']
+        spec = service.get('spec', {})
+        print(f"   🔗 {metadata['name']} ({metadata['namespace']}): {spec.get('type')} - {spec.get('clusterIP')}")
 
 def analyze_pod_issues():
     """Analyze and identify pod issues"""
@@ -100,28 +84,19 @@ def analyze_pod_issues():
     pods = get_pods()
     issues_found = []
     
-    for pod in pods['items']:
-        pod_name = pod['metadata']['name']
-        namespace = pod['metadata']['namespace']
-        status = pod['status']['phase']
-        
-        if status != "Running":
-            issues_found.append({
-                'name': pod_name,
-                'namespace': namespace,
-                'status': status,
-                'reason': pod['status'].get('reason', 'Unknown'),
-                'message': pod['status'].get('message', 'No message')
-            })
+    for row in summary_rows("pods", pods['items']):
+        pod = dict(zip(POD_COLUMNS, row))
+        healthy = pod['status'] == "Completed" or (pod['status'] == "Running" and pod['ready'] == pod['containers'])
+        if not healthy:
+            issues_found.append(pod)
     
     if issues_found:
         print(f"🚨 Found {len(issues_found)} problematic pods:")
         for issue in issues_found:
             print(f"   ⚠️  {issue['name']} ({issue['namespace']})")
-            print(f"      Status: {issue['status']}")
-            print(f"      Reason: {issue['reason']}")
-            if issue['message'] != 'No message':
-                print(f"      Message: {issue['message']}")
+            print(f"      Status: {issue['status']} ({issue['ready']}/{issue['containers']} ready, {issue['restarts']} restarts)")
+            if issue['last_termination_reason']:
+                print(f"      Last termination: {issue['last_termination_reason']}")
             print()
     else:
         print("✅ All pods are running normally!")
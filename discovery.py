@@ -0,0 +1,121 @@
+"""
+On-disk discovery cache for the Kubernetes MCP Server
+
+MCP clients that speak stdio start a server process per session, so
+whatever the server has to learn before it can answer is learnt again every
+time. DiscoveryCache keeps two such facts in a small JSON file
+(K8S_MCP_DISCOVERY_CACHE) shared by every process:
+
+- the kubeconfig's context names and current context, needed at startup
+  when K8S_MCP_CONTEXTS=all
+- per context, the kinds the API server answered 404 for (no EndpointSlice
+  API on old clusters, no metrics.k8s.io without metrics-server), so a new
+  session goes straight to its fallback instead of repeating the probe
+
+Everything is tied to a fingerprint of the kubeconfig files (paths, sizes
+and modification times) and the backend settings: editing the kubeconfig
+discards the cache. Missing kinds are also forgotten after
+K8S_MCP_DISCOVERY_TTL seconds, in case the API gets installed; a TTL of 0
+turns the cache off.
+
+The file lives in a per-user directory created with mode 0700 (see
+config.user_cache_dir). A file owned by another user is ignored, and
+nothing is written to a directory others could write to, so another local
+account cannot plant facts the server acts on.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+
+from backend import kubeconfig_contexts
+from config import owned_by_user, private_dir
+
+
+def kubeconfig_fingerprint(config):
+    """Identity of the kubeconfig files and backend settings the cached facts were learnt from"""
+    paths = os.environ.get("KUBECONFIG") or os.path.join(os.path.expanduser("~"), ".kube", "config")
+    parts = [config.backend, config.kubectl, config.context or ""]
+    for path in paths.split(os.pathsep):
+        try:
+            stat = os.stat(path)
+            parts.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{path}:missing")
+    return "|".join(parts)
+
+
+class DiscoveryCache:
+    """Facts about the kubeconfig and its clusters, persisted across server processes"""
+
+    def __init__(self, path, ttl, fingerprint):
+        self.path = path
+        self.ttl = ttl
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._data = None
+
+    @property
+    def enabled(self):
+        return self.ttl > 0
+
+    def _load(self):
+        if self._data is None:
+            try:
+                with open(self.path) as f:
+                    data = json.load(f) if owned_by_user(os.fstat(f.fileno())) else None
+            except (OSError, ValueError):
+                data = None
+            if not isinstance(data, dict) or data.get("fingerprint") != self.fingerprint:
+                data = {"fingerprint": self.fingerprint, "contexts": None, "missing": {}}
+            self._data = data
+        return self._data
+
+    def _save(self):
+        # Write then rename, so concurrent servers never read a partial file
+        try:
+            directory = private_dir(os.path.dirname(os.path.abspath(self.path)))
+            with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, suffix=".tmp") as f:
+                json.dump(self._data, f)
+            os.replace(f.name, self.path)
+        except OSError:
+            pass
+
+    def contexts(self, config):
+        """(context names, current context) of the kubeconfig, read from it only on a cache miss"""
+        if not self.enabled:
+            return kubeconfig_contexts(config)
+        with self._lock:
+            cached = self._load()["contexts"]
+        if cached is not None:
+            return cached[0], cached[1]
+        names, current = kubeconfig_contexts(config)
+        with self._lock:
+            self._load()["contexts"] = [names, current]
+            self._save()
+        return names, current
+
+    def missing(self, context, kind):
+        """Seconds since the cluster last answered 404 for a kind, or None if it is not known to be missing"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            seen = self._load()["missing"].get(context or "", {}).get(kind)
+        if seen is None:
+            return None
+        age = time.time() - seen
+        return age if age < self.ttl else None
+
+    def set_missing(self, context, kind, missing=True):
+        """Remember (or forget) that the cluster does not serve a kind"""
+        if not self.enabled:
+            return
+        with self._lock:
+            kinds = self._load()["missing"].setdefault(context or "", {})
+            if missing:
+                kinds[kind] = time.time()
+            elif kinds.pop(kind, None) is None:
+                return
+            self._save()
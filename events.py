@@ -0,0 +1,185 @@
+"""
+Indexed event store for the Kubernetes MCP Server
+
+EventStore is the ObjectStore used by the events informer. Besides the raw
+Event objects it keeps one EventRecord per distinct occurrence (same object,
+reason and message), merging repeats by count and lastTimestamp, and
+indexes records by involved object (kind and name, across namespaces),
+reason and namespace so "events for pod X in the last 10 minutes" is a dict
+lookup. The store is bounded by record count, evicting the least recently
+updated records first. Lookups skip records older than max_age; the raw
+Event objects behind k8s://events stay until the API server deletes them.
+"""
+
+import time
+from collections import OrderedDict
+
+from informer import ObjectStore, object_key
+from summaries import parse_time
+
+
+def _timestamp(event):
+    """Epoch seconds an event was last seen (falling back through the v1 time fields)"""
+    for value in (
+        event.get("lastTimestamp"),
+        (event.get("series") or {}).get("lastObservedTime"),
+        event.get("eventTime"),
+        event.get("firstTimestamp"),
+        event.get("metadata", {}).get("creationTimestamp"),
+    ):
+        parsed = parse_time(value)
+        if parsed is not None:
+            return parsed.timestamp()
+    return time.time()
+
+
+def _timestamp_first(event, default):
+    parsed = parse_time(event.get("firstTimestamp") or event.get("eventTime"))
+    return parsed.timestamp() if parsed is not None else default
+
+
+def _iso(timestamp):
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+class EventRecord:
+    """A deduplicated event: every Event object with the same object, reason and message"""
+
+    __slots__ = (
+        "key", "type", "reason", "message", "kind", "namespace", "name",
+        "count", "first_seen", "last_seen", "sources",
+    )
+
+    def __init__(self, key, event, seen):
+        self.key = key
+        self.type = event.get("type")
+        self.reason = event.get("reason")
+        self.message = event.get("message")
+        self.kind = key[0]
+        self.namespace = key[1]
+        self.name = key[2]
+        self.count = 0
+        self.first_seen = seen
+        self.last_seen = seen
+        # Event object key -> count it contributed, so updates are not double counted
+        self.sources = {}
+
+    def as_dict(self):
+        return {
+            "type": self.type,
+            "reason": self.reason,
+            "object": f"{self.kind}/{self.name}",
+            "namespace": self.namespace,
+            "count": self.count,
+            "first_seen": _iso(self.first_seen),
+            "last_seen": _iso(self.last_seen),
+            "message": self.message,
+        }
+
+
+def record_key(event):
+    """(kind, namespace, name, reason, message); cluster-scoped objects have no namespace"""
+    involved = event.get("involvedObject") or {}
+    return (
+        involved.get("kind"), involved.get("namespace") or None, involved.get("name"),
+        event.get("reason"), event.get("message"),
+    )
+
+
+class EventStore(ObjectStore):
+    """Bounded, time-ordered, indexed store of events"""
+
+    def __init__(self, max_records=10000, max_age=3600.0, max_changes=10000, compact=False):
+        super().__init__("EventList", "v1", max_changes, compact)
+        self.max_records = max_records
+        self.max_age = max_age
+        self._records = OrderedDict()  # record key -> EventRecord, least recently updated first
+        self._by_object = {}
+        self._by_reason = {}
+        self._by_namespace = {}
+        self.evicted = 0
+
+    def replace(self, items, resource_version):
+        super().replace(items, resource_version)
+        with self._lock:
+            # Records outlive a relist: they are history, bounded by count
+            for event in items:
+                self._add(event)
+            self._evict()
+
+    def upsert(self, obj):
+        with self._lock:
+            super().upsert(obj)
+            self._add(obj)
+            self._evict()
+
+    def _add(self, event):
+        key = record_key(event)
+        seen = _timestamp(event)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records[key] = EventRecord(key, event, seen)
+            self._index(record, add=True)
+        source = object_key(event)
+        count = event.get("count") or (event.get("series") or {}).get("count") or 1
+        record.count += count - record.sources.get(source, 0)
+        record.sources[source] = count
+        record.first_seen = min(record.first_seen, _timestamp_first(event, seen))
+        if seen >= record.last_seen:
+            record.last_seen = seen
+            record.type = event.get("type") or record.type
+        self._records.move_to_end(key)
+
+    def _index(self, record, add):
+        for index, value in (
+            (self._by_object, (record.kind, record.name)),
+            (self._by_reason, record.reason),
+            (self._by_namespace, record.namespace),
+        ):
+            if add:
+                index.setdefault(value, set()).add(record.key)
+            else:
+                keys = index.get(value)
+                if keys is not None:
+                    keys.discard(record.key)
+                    if not keys:
+                        del index[value]
+
+    def _evict(self):
+        while len(self._records) > self.max_records:
+            record = next(iter(self._records.values()))
+            del self._records[record.key]
+            self._index(record, add=False)
+            for source in record.sources:
+                if self._objects.pop(source, None) is not None:
+                    self._record("DELETED", source)
+            self.generation += 1
+            self.evicted += 1
+
+    def query(self, kind=None, namespace=None, name=None, reason=None, type=None, since_seconds=None, limit=None):
+        """Deduplicated events matching the filters, most recent first"""
+        with self._lock:
+            candidates = None
+            if kind and name:
+                # Without a namespace this collects the object's events from every namespace
+                candidates = self._by_object.get((kind, name), set())
+            for index, value in ((self._by_reason, reason), (self._by_namespace, namespace)):
+                if value and candidates is None:
+                    candidates = index.get(value, set())
+            records = (self._records[key] for key in candidates) if candidates is not None else self._records.values()
+            cutoff = time.time() - min(since_seconds or self.max_age, self.max_age)
+            matched = [
+                record for record in records
+                if record.last_seen >= cutoff
+                and (not kind or record.kind == kind)
+                and (not namespace or record.namespace == namespace)
+                and (not name or record.name == name)
+                and (not reason or record.reason == reason)
+                and (not type or record.type == type)
+            ]
+        matched.sort(key=lambda record: record.last_seen, reverse=True)
+        return matched[:limit] if limit else matched
+
+    def stats(self):
+        return {"records": len(self._records), "objects": len(self._objects), "evicted": self.evicted}
+
@@ -0,0 +1,135 @@
+"""
+Async execution layer for the Kubernetes MCP Server
+
+All cluster calls made by the MCP handlers go through a CommandExecutor so a
+slow kubectl invocation never blocks the asyncio loop. The executor caps the
+number of concurrent calls, enforces a per-call timeout and kills the child
+process when the calling request is cancelled.
+"""
+
+import asyncio
+
+# Longest single line accepted from a streaming child (one watch event)
+STREAM_LINE_LIMIT = 64 * 1024 * 1024
+
+
+class CommandTimeout(Exception):
+    """Raised when a cluster call exceeds its timeout"""
+
+
+class CommandResult:
+    """Outcome of a finished command"""
+
+    __slots__ = ("returncode", "stdout", "stderr")
+
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class CommandExecutor:
+    """Runs commands and blocking calls with bounded concurrency"""
+
+    def __init__(self, max_concurrency=8, timeout=30.0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+
+    async def _acquire(self):
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    async def run(self, cmd, timeout=None, text=True):
+        """Run a command and return its CommandResult (decoded unless text=False)"""
+        timeout = self.timeout if timeout is None else timeout
+        await self._acquire()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+            except asyncio.TimeoutError:
+                await terminate(proc)
+                raise CommandTimeout(f"{cmd[0]} timed out after {timeout:g}s: {' '.join(cmd[1:])}")
+            except asyncio.CancelledError:
+                await terminate(proc)
+                raise
+            if text:
+                stdout = stdout.decode("utf-8", errors="replace")
+                stderr = stderr.decode("utf-8", errors="replace")
+            return CommandResult(proc.returncode, stdout, stderr)
+        finally:
+            self._release()
+
+    async def run_blocking(self, func, *args, timeout=None):
+        """Run a blocking callable in a worker thread under the same limits
+
+        A thread cannot be stopped, so on timeout or cancellation the caller
+        gives up but the call keeps its slot until the thread returns; hung
+        calls therefore never exceed max_concurrency.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        await self._acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(None, func, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._finished)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            raise CommandTimeout(f"{getattr(func, '__name__', 'call')} timed out after {timeout:g}s")
+
+    def _finished(self, future):
+        self._release()
+        if not future.cancelled():
+            # Retrieved so an abandoned call's error is not logged as unhandled
+            future.exception()
+
+    async def spawn(self, cmd):
+        """Start a long-running process (e.g. a watch) with piped stdout/stderr
+
+        Streams are not counted against the concurrency limit since they live
+        for minutes; callers must stop them with terminate().
+        """
+        return await asyncio.create_subprocess_exec(
+            *cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=STREAM_LINE_LIMIT,
+        )
+
+    def stats(self):
+        """Current concurrency counters"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+
+async def terminate(proc):
+    """Kill a child process and reap it, even if we are being cancelled"""
+    if proc.returncode is None:
+        try:
+            proc.kill()
+        except ProcessLookupError:
+            pass
+    await asyncio.shield(proc.wait())
@@ -0,0 +1,392 @@
+"""
+Informer-style list+watch cache for the Kubernetes MCP Server
+
+An Informer performs one LIST for its kind and then keeps an in-memory
+ObjectStore up to date from a WATCH, tracking the last seen resourceVersion so
+reconnects resume where they left off. When the API server reports that the
+version has expired (410 Gone) the informer relists. read_resource can then
+answer from the store without any API round-trip, and listeners (resource
+subscriptions) hear about every change as it is applied.
+
+A compact store keeps each object as its JSON encoding rather than as nested
+dicts, which takes about 4.5 times less memory (548 MB -> 121 MB for 30000
+synthetic pods, including the pods table TableStore adds; bench/store.py).
+Serving the whole list then only joins strings; reads that need the objects
+themselves decode them on demand.
+"""
+
+import asyncio
+import contextlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+
+from backend import KINDS, BackendError
+from models import dumps, gc_paused, loads
+
+
+def _version(obj):
+    return obj.get("metadata", {}).get("resourceVersion")
+
+
+def object_key(obj):
+    """Store key for an object: namespace/name (or just name if cluster-scoped)"""
+    metadata = obj.get("metadata", {})
+    namespace = metadata.get("namespace")
+    name = metadata.get("name", "")
+    return f"{namespace}/{name}" if namespace else name
+
+
+def list_kind(kind):
+    """(List kind, apiVersion) of a backend kind's LIST responses"""
+    prefix, _, _, object_kind = KINDS[kind]
+    return object_kind + "List", prefix.split("/", 2)[-1]
+
+
+class ObjectStore:
+    """Thread-safe map of objects keyed by namespace/name
+
+    Every change is also appended to a bounded change log, so callers holding
+    a resourceVersion the store has served can ask for just the objects
+    changed since (see changes_since). With compact=True objects are held
+    JSON-encoded.
+    """
+
+    def __init__(self, list_kind, api_version="v1", max_changes=10000, compact=False):
+        self.list_kind = list_kind
+        self.api_version = api_version
+        self.compact = compact
+        self._lock = threading.RLock()
+        self._objects = {}  # key -> object, or its JSON text if compact
+        self.resource_version = None
+        # Bumped on every change so encoded snapshots can be reused
+        self.generation = 0
+        self._snapshot = None
+        self._snapshot_generation = -1
+        # (sequence, "ADDED"/"MODIFIED"/"DELETED", key), oldest first
+        self._changes = deque(maxlen=max_changes)
+        self._sequence = 0
+        # resourceVersion -> sequence of the last change applied at that version
+        self._versions = OrderedDict()
+        self.max_changes = max_changes
+
+    def _pack(self, obj):
+        return dumps(obj) if self.compact else obj
+
+    def _unpack(self, value):
+        return loads(value) if self.compact and value is not None else value
+
+    def _changed(self, old, new):
+        # Encodings of the same resourceVersion are identical
+        return old != new if self.compact else _version(old) != _version(new)
+
+    def replace(self, items, resource_version):
+        """Swap in the result of a full LIST
+
+        Encoding and comparing with the old objects happen outside the lock,
+        which is only held to copy the old map and to swap in the new one.
+        Relists and watch events come from one informer, so nothing changes
+        the store in between.
+        """
+        with gc_paused():
+            objects = {object_key(obj): self._pack(obj) for obj in items}
+        prepared = self._prepare(items)
+        with self._lock:
+            previous = dict(self._objects) if self.resource_version is not None else None
+        changes = []
+        if previous is not None:
+            # A relist: log the difference so delta readers stay in sync
+            for key, obj in objects.items():
+                old = previous.get(key)
+                if old is None:
+                    changes.append(("ADDED", key))
+                elif self._changed(old, obj):
+                    changes.append(("MODIFIED", key))
+            changes += [("DELETED", key) for key in previous.keys() - objects.keys()]
+        with self._lock:
+            for change, key in changes:
+                self._record(change, key)
+            self._objects = objects
+            self._swap(prepared)
+            self.resource_version = resource_version
+            self._mark(resource_version)
+            self.generation += 1
+
+    def _prepare(self, items):
+        """Whatever a subclass builds from a full LIST before the swap (outside the lock)"""
+        return None
+
+    def _swap(self, prepared):
+        """Install what _prepare built, under the lock"""
+
+    def upsert(self, obj):
+        with self._lock:
+            key = object_key(obj)
+            self._record("MODIFIED" if key in self._objects else "ADDED", key)
+            self._objects[key] = self._pack(obj)
+            self._set_version(obj)
+
+    def delete(self, obj):
+        with self._lock:
+            key = object_key(obj)
+            if self._objects.pop(key, None) is not None:
+                self._record("DELETED", key)
+            self._set_version(obj)
+
+    def apply(self, event_type, obj):
+        """Apply an ADDED, MODIFIED or DELETED watch event"""
+        if event_type == "DELETED":
+            self.delete(obj)
+        else:
+            self.upsert(obj)
+
+    def try_apply(self, event_type, obj):
+        """apply() if no reader holds the lock right now; returns False otherwise"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self.apply(event_type, obj)
+        finally:
+            self._lock.release()
+        return True
+
+    def _set_version(self, obj):
+        version = _version(obj)
+        if version:
+            self.resource_version = version
+            self._mark(version)
+        self.generation += 1
+
+    def _record(self, change, key):
+        self._sequence += 1
+        self._changes.append((self._sequence, change, key))
+
+    def _mark(self, version):
+        if not version:
+            return
+        self._versions[version] = self._sequence
+        self._versions.move_to_end(version)
+        # Forget versions whose changes have left the log (and cap bookmark-only versions)
+        oldest = self._changes[0][0] if self._changes else self._sequence + 1
+        while self._versions and (
+            next(iter(self._versions.values())) < oldest - 1 or len(self._versions) > 2 * self.max_changes + 1
+        ):
+            self._versions.popitem(last=False)
+
+    def changes_since(self, version):
+        """(changes, objects, resourceVersion) since a served resourceVersion, or None if it is unknown or evicted
+
+        changes maps each changed key to its (first, last) change type;
+        objects holds the current object of each key still present.
+        """
+        with self._lock:
+            sequence = self._versions.get(version)
+            oldest = self._changes[0][0] if self._changes else self._sequence + 1
+            if sequence is None or sequence < oldest - 1:
+                return None
+            changes = {}
+            for _, change, key in islice(self._changes, sequence - oldest + 1, None):
+                changes[key] = (changes[key][0] if key in changes else change, change)
+            values = {key: self._objects[key] for key in changes if key in self._objects}
+            resource_version = self.resource_version
+        with gc_paused():
+            objects = {key: self._unpack(value) for key, value in values.items()}
+        return changes, objects, resource_version
+
+    def bookmark(self, resource_version):
+        with self._lock:
+            self.resource_version = resource_version
+            self._mark(resource_version)
+
+    def get(self, key):
+        with self._lock:
+            return self._unpack(self._objects.get(key))
+
+    def items(self, namespace=None):
+        """Snapshot of all stored objects (of one namespace)"""
+        values = self._values(namespace)
+        if not self.compact:
+            return values
+        # Decoding into a heap of live objects would trigger collection after collection
+        with gc_paused():
+            return [loads(value) for value in values]
+
+    def convert(self, function, namespace=None):
+        """function(obj) of every stored object (of one namespace), decoding one object at a time"""
+        values = self._values(namespace)
+        with gc_paused():
+            return [function(self._unpack(value)) for value in values]
+
+    def encoded(self, namespace=None):
+        """JSON text of every stored object (of one namespace)"""
+        values = self._values(namespace)
+        return values if self.compact else [json.dumps(obj) for obj in values]
+
+    def _values(self, namespace):
+        # Only the copy is taken under the lock; the namespace filter runs outside it
+        with self._lock:
+            if not namespace:
+                return list(self._objects.values())
+            keys, values = list(self._objects), list(self._objects.values())
+        prefix = namespace + "/"
+        return [value for key, value in zip(keys, values) if key.startswith(prefix)]
+
+    def __len__(self):
+        return len(self._objects)
+
+    def to_json(self):
+        """Encode the store as a List response, reusing the last encoding if unchanged
+
+        The lock is only held to take the values; encoding happens outside it.
+        """
+        with self._lock:
+            if self._snapshot_generation == self.generation:
+                return self._snapshot
+            generation = self.generation
+            resource_version = self.resource_version
+            values = list(self._objects.values())
+        head = {
+            "kind": self.list_kind,
+            "apiVersion": self.api_version,
+            "metadata": {"resourceVersion": resource_version or ""},
+        }
+        if self.compact:
+            snapshot = json.dumps(head)[:-1] + ', "items": [' + ", ".join(values) + "]}"
+        else:
+            snapshot = json.dumps(dict(head, items=values))
+        with self._lock:
+            if generation > self._snapshot_generation:
+                self._snapshot = snapshot
+                self._snapshot_generation = generation
+        return snapshot
+
+
+class Informer:
+    """Keeps an ObjectStore for one kind in sync through list+watch"""
+
+    def __init__(self, backend, kind, stale_after=120.0, watch_timeout=300, store=None, max_changes=10000, compact=False):
+        self.backend = backend
+        self.kind = kind
+        self.stale_after = stale_after
+        self.watch_timeout = watch_timeout
+        self.store = store if store is not None else ObjectStore(*list_kind(kind), max_changes, compact)
+        self.ready = asyncio.Event()
+        # time.monotonic() of the last moment we knew the store was current
+        self.last_sync = None
+        self.relists = 0
+        self.last_error = None
+        # Callbacks f(event_type, obj) run on every change; obj is None after a relist
+        self.listeners = []
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name=f"informer {self.kind}")
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def wait_ready(self, timeout=None):
+        await asyncio.wait_for(self.ready.wait(), timeout)
+
+    @property
+    def staleness(self):
+        """Seconds since the store was last confirmed current (None before first sync)"""
+        if self.last_sync is None:
+            return None
+        return time.monotonic() - self.last_sync
+
+    @property
+    def fresh(self):
+        """True if the store can be served in place of a live LIST"""
+        staleness = self.staleness
+        return self.ready.is_set() and staleness is not None and staleness <= self.stale_after
+
+    def status(self):
+        staleness = self.staleness
+        return {
+            "kind": self.kind,
+            "ready": self.ready.is_set(),
+            "fresh": self.fresh,
+            "staleness_seconds": round(staleness, 3) if staleness is not None else None,
+            "resource_version": self.store.resource_version,
+            "objects": len(self.store),
+            "relists": self.relists,
+            "last_error": self.last_error,
+            "compact": self.store.compact,
+            "table": self.store.table.stats() if hasattr(self.store, "table") else None,
+        }
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            try:
+                await self.relist()
+                backoff = 1.0
+                while await self.watch():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+
+    async def relist(self):
+        result = await self.backend.list(self.kind)
+        # Encoding and indexing a large list would stall the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            None, self.store.replace, result.get("items", []), result.get("metadata", {}).get("resourceVersion")
+        )
+        self.relists += 1
+        self.last_sync = time.monotonic()
+        self.last_error = None
+        self.ready.set()
+        if self.relists > 1:
+            # Anything may have changed while the watch was down
+            self._notify("RELIST", None)
+
+    def _notify(self, event_type, obj):
+        for listener in self.listeners:
+            try:
+                listener(event_type, obj)
+            except Exception as e:
+                self.last_error = f"listener failed: {e}"
+
+    async def watch(self):
+        """Consume one watch stream; returns False when a relist is required"""
+        events = self.backend.watch(self.kind, self.store.resource_version, self.watch_timeout)
+        try:
+            async with contextlib.aclosing(events):
+                async for event in events:
+                    event_type = event.get("type")
+                    obj = event.get("object", {})
+                    if event_type in ("ADDED", "MODIFIED", "DELETED"):
+                        if not self.store.try_apply(event_type, obj):
+                            # Wait for the lock in a thread, not on the event loop
+                            await asyncio.get_running_loop().run_in_executor(None, self.store.apply, event_type, obj)
+                        self._notify(event_type, obj)
+                    elif event_type == "BOOKMARK":
+                        self.store.bookmark(obj.get("metadata", {}).get("resourceVersion"))
+                    elif event_type == "ERROR":
+                        if obj.get("code") == 410:
+                            return False
+                        raise BackendError(obj.get("message", "watch error"), obj.get("code"))
+                    self.last_sync = time.monotonic()
+        except BackendError as e:
+            if e.status == 410:
+                return False
+            raise
+        # The server closed the stream after timeoutSeconds; it was live until now
+        self.last_sync = time.monotonic()
+        return True
@@ -0,0 +1,328 @@
+"""
+Self-metrics for the Kubernetes MCP Server
+
+RequestMetrics times every resource read and tool call the server answers;
+each backend's UpstreamMetrics times every API request it makes (a kubectl
+invocation or a pooled HTTP GET) and counts the bytes it received. Both keep
+plain counters and fixed-bucket latency histograms updated on the event loop,
+so recording a call costs two clock reads, a bisect and a few dict updates
+and the instrumentation is always on.
+
+The numbers are served as JSON by k8s://_server/metrics and, with
+K8S_MCP_PROMETHEUS_PORT, in the Prometheus text format.
+"""
+
+import asyncio
+import bisect
+import time
+
+# Upper bounds in seconds of the latency histogram buckets (plus +Inf)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Distinct names tracked per metric; calls beyond that are counted as "other"
+MAX_NAMES = 200
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """Latency histogram over LATENCY_BUCKETS"""
+
+    __slots__ = ("buckets", "count", "sum")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, fraction):
+        """Upper bound in seconds of the bucket holding the given quantile"""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def cumulative(self):
+        """(le, cumulative count) pairs, ending with +Inf"""
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.buckets):
+            total += count
+            yield bound, total
+
+
+class Series:
+    """Latency, errors and bytes of one request or upstream call name"""
+
+    __slots__ = ("latency", "errors", "bytes")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.bytes = 0
+
+    def snapshot(self):
+        latency = self.latency
+        return {
+            "count": latency.count,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "mean_ms": round(latency.sum / latency.count * 1000, 2) if latency.count else None,
+            # Bucket upper bounds, so "p95_ms": 250 means p95 <= 250 ms
+            "p50_ms": _ms(latency.quantile(0.50)),
+            "p95_ms": _ms(latency.quantile(0.95)),
+            "p99_ms": _ms(latency.quantile(0.99)),
+        }
+
+
+class StreamStats:
+    """Counters of one kind of streaming call (watches, followed logs)"""
+
+    __slots__ = ("opened", "lines", "bytes", "errors")
+
+    def __init__(self):
+        self.opened = 0
+        self.lines = 0
+        self.bytes = 0
+        self.errors = 0
+
+    def snapshot(self):
+        return {"opened": self.opened, "lines": self.lines, "bytes": self.bytes, "errors": self.errors}
+
+
+def _series(table, key):
+    series = table.get(key)
+    if series is None:
+        if len(table) >= MAX_NAMES:
+            key = key[:-1] + ("other",) if isinstance(key, tuple) else "other"
+            series = table.get(key)
+        if series is None:
+            series = table[key] = Series()
+    return series
+
+
+def _ms(seconds):
+    if seconds is None or seconds == float("inf"):
+        return seconds
+    return round(seconds * 1000, 3)
+
+
+class RequestMetrics:
+    """Latency histograms, errors and response bytes per resource URI and tool"""
+
+    def __init__(self):
+        self.series = {}  # (type, name) -> Series
+        self.in_flight = {"resource": 0, "tool": 0}
+        self.started = time.time()
+
+    def track(self, type_, name):
+        """Context manager timing one request; report its text with .done()"""
+        return RequestTimer(self, type_, name)
+
+    def snapshot(self):
+        result = {"in_flight": dict(self.in_flight)}
+        for (type_, name), series in sorted(self.series.items()):
+            result.setdefault(type_, {})[name] = series.snapshot()
+        return result
+
+
+class RequestTimer:
+    """One request being timed by RequestMetrics"""
+
+    __slots__ = ("metrics", "type", "name", "started", "size", "failed")
+
+    def __init__(self, metrics, type_, name):
+        self.metrics = metrics
+        self.type = type_
+        self.name = name
+        self.size = 0
+        self.failed = True
+
+    def __enter__(self):
+        self.metrics.in_flight[self.type] += 1
+        self.started = time.perf_counter()
+        return self
+
+    def done(self, text, failed=False):
+        """Record the response text (and whether it reports an error); returns text"""
+        # Characters rather than bytes: encoding a large response just to
+        # measure it would cost a copy, and the JSON responses are ASCII.
+        self.size = len(text)
+        self.failed = failed
+        return text
+
+    def __exit__(self, *exc_info):
+        self.metrics.in_flight[self.type] -= 1
+        series = _series(self.metrics.series, (self.type, self.name))
+        series.latency.observe(time.perf_counter() - self.started)
+        series.bytes += self.size
+        if self.failed:
+            series.errors += 1
+        return False
+
+
+class UpstreamMetrics:
+    """Latency histograms, errors and bytes received per API call, for one backend"""
+
+    def __init__(self):
+        self.series = {}  # request label -> Series
+        self.streams = {}  # request label -> StreamStats
+
+    def observe(self, label, seconds, size, failed):
+        series = _series(self.series, label)
+        series.latency.observe(seconds)
+        series.bytes += size
+        if failed:
+            series.errors += 1
+
+    def stream(self, label):
+        stats = self.streams.get(label)
+        if stats is None:
+            if len(self.streams) >= MAX_NAMES:
+                label = "other"
+                stats = self.streams.get(label)
+            if stats is None:
+                stats = self.streams[label] = StreamStats()
+        stats.opened += 1
+        return stats
+
+    def snapshot(self):
+        return {
+            "calls": {label: series.snapshot() for label, series in sorted(self.series.items())},
+            "streams": {label: stats.snapshot() for label, stats in sorted(self.streams.items())},
+        }
+
+
+def metrics_snapshot(requests, clusters):
+    """JSON-ready view of the request metrics and every cluster's upstream, executor and cache counters"""
+    return {
+        "uptime_s": round(time.time() - requests.started, 1),
+        "requests": requests.snapshot(),
+        "clusters": {
+            name: dict(
+                # A cluster that has not connected yet has made no calls
+                cluster.backend.upstream.snapshot() if cluster.connected else {"calls": {}, "streams": {}},
+                backend=cluster.backend.name if cluster.connected else None,
+                executor=cluster.executor.stats(),
+                cache=cluster.cache.stats(),
+            )
+            for name, cluster in clusters.items()
+        },
+    }
+
+
+def prometheus_text(requests, clusters):
+    """The same counters in the Prometheus text exposition format"""
+    out = []
+
+    def metric(name, kind, help_text, samples):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            out.append(f"{name}{_labels(labels)} {value}")
+
+    def histogram(name, help_text, table, label_names):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} histogram")
+        for key, series in table:
+            labels = dict(zip(label_names, key))
+            for bound, count in series.latency.cumulative():
+                out.append(f"{name}_bucket{_labels(dict(labels, le=bound))} {count}")
+            out.append(f"{name}_sum{_labels(labels)} {series.latency.sum}")
+            out.append(f"{name}_count{_labels(labels)} {series.latency.count}")
+
+    request_series = sorted(requests.series.items())
+    metric("k8s_mcp_requests_in_flight", "gauge", "Resource reads and tool calls being answered",
+           [({"type": type_}, value) for type_, value in requests.in_flight.items()])
+    histogram("k8s_mcp_request_duration_seconds", "Time to answer a resource read or tool call",
+              request_series, ("type", "name"))
+    metric("k8s_mcp_request_errors_total", "counter", "Requests answered with an error",
+           [({"type": key[0], "name": key[1]}, series.errors) for key, series in request_series])
+    metric("k8s_mcp_response_bytes_total", "counter", "Response text returned to clients",
+           [({"type": key[0], "name": key[1]}, series.bytes) for key, series in request_series])
+
+    upstream = []
+    streams = []
+    for name, cluster in clusters.items():
+        if not cluster.connected:
+            continue
+        upstream += [((name, label), series) for label, series in sorted(cluster.backend.upstream.series.items())]
+        streams += [((name, label), stats) for label, stats in sorted(cluster.backend.upstream.streams.items())]
+    histogram("k8s_mcp_upstream_duration_seconds", "Time taken by Kubernetes API calls",
+              upstream, ("cluster", "request"))
+    metric("k8s_mcp_upstream_errors_total", "counter", "Kubernetes API calls that failed",
+           [({"cluster": key[0], "request": key[1]}, series.errors) for key, series in upstream])
+    metric("k8s_mcp_upstream_bytes_total", "counter", "Response bytes received from the Kubernetes API",
+           [({"cluster": key[0], "request": key[1]}, series.bytes) for key, series in upstream])
+    for field, help_text in (
+        ("opened", "Streaming Kubernetes API calls opened (watches, followed logs)"),
+        ("lines", "Lines received on streaming Kubernetes API calls"),
+        ("bytes", "Bytes received on streaming Kubernetes API calls"),
+        ("errors", "Streaming Kubernetes API calls that failed"),
+    ):
+        metric(f"k8s_mcp_upstream_stream_{field}_total", "counter", help_text,
+               [({"cluster": key[0], "request": key[1]}, getattr(stats, field)) for key, stats in streams])
+
+    executors = [(name, cluster.executor.stats()) for name, cluster in clusters.items()]
+    caches = [(name, cluster.cache.stats()) for name, cluster in clusters.items()]
+    for field, kind, help_text in (
+        ("in_flight", "gauge", "Cluster calls running"),
+        ("waiting", "gauge", "Cluster calls queued for a concurrency slot"),
+        ("max_concurrency", "gauge", "Cluster calls allowed at once"),
+    ):
+        metric(f"k8s_mcp_executor_{field}", kind, help_text, [({"cluster": name}, stats[field]) for name, stats in executors])
+    for field, name, kind, help_text in (
+        ("hits", "k8s_mcp_cache_hits_total", "counter", "Responses served from the response cache"),
+        ("misses", "k8s_mcp_cache_misses_total", "counter", "Response cache lookups that missed"),
+        ("coalesced", "k8s_mcp_cache_coalesced_total", "counter", "Requests that shared an identical in-flight call"),
+        ("evictions", "k8s_mcp_cache_evictions_total", "counter", "Responses evicted to stay within the byte budget"),
+        ("bytes", "k8s_mcp_cache_bytes", "gauge", "Bytes held by the response cache"),
+    ):
+        metric(name, kind, help_text, [({"cluster": cluster}, stats[field]) for cluster, stats in caches])
+    return "\n".join(out) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+async def serve_prometheus(host, port, render):
+    """Serve render() as text on GET /metrics; returns the asyncio server"""
+
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Skip the headers; nothing in them matters here
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.split()
+            if len(parts) >= 2 and parts[0] == b"GET" and parts[1].split(b"?")[0] == b"/metrics":
+                status, body = "200 OK", render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {PROMETHEUS_CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,203 @@
+"""
+Bounded log streaming for the Kubernetes MCP Server
+
+Container logs are read line by line from a streaming GET on the pod's log
+subresource. The caller's byte budget is pushed down to the API server as
+limitBytes and also enforced locally, so a chatty pod never grows a buffer
+past the cap; batches of lines can be relayed as they arrive.
+
+LogSearch runs the same streaming reads for many containers at once under
+a fan-out limit and matches each line as it arrives, so a search takes about
+as long as its slowest container and stops as soon as enough lines match.
+"""
+
+import asyncio
+import contextlib
+import re
+
+# Size of the batches handed to on_chunk while a log is being read
+CHUNK_BYTES = 16 * 1024
+
+# Tool argument -> pods/log query parameter
+LOG_PARAMS = {
+    "container": "container",
+    "tail_lines": "tailLines",
+    "since_seconds": "sinceSeconds",
+    "limit_bytes": "limitBytes",
+    "previous": "previous",
+    "timestamps": "timestamps",
+}
+
+
+def log_query(arguments, max_bytes, default_tail=50):
+    """Build the pods/log query for tool arguments, capping limitBytes at max_bytes"""
+    query = {param: arguments[arg] for arg, param in LOG_PARAMS.items() if arguments.get(arg) is not None}
+    # Following starts from the same tail too (kubectl logs -f --tail), so old
+    # lines do not fill the byte cap before any new one arrives
+    if "tailLines" not in query and "sinceSeconds" not in query:
+        query["tailLines"] = default_tail
+    query["limitBytes"] = min(int(query.get("limitBytes") or max_bytes), max_bytes)
+    for key in ("tailLines", "sinceSeconds"):
+        if key in query:
+            query[key] = int(query[key])
+    return query
+
+
+async def collect_lines(lines, max_bytes, duration=None, on_chunk=None, chunk_bytes=CHUNK_BYTES):
+    """Drain an async iterator of log lines (bytes) into text
+
+    Stops at end of stream, once max_bytes would be exceeded, or after
+    duration seconds (used for follow). on_chunk(text, total_bytes) is awaited
+    for every batch of about chunk_bytes. Returns (text, bytes, truncated).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + duration if duration else None
+    kept = []
+    size = 0
+    pending = []
+    pending_size = 0
+    truncated = False
+    async with contextlib.aclosing(lines):
+        while True:
+            try:
+                if deadline is None:
+                    line = await anext(lines)
+                else:
+                    line = await asyncio.wait_for(anext(lines), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                if deadline is not None and loop.time() >= deadline:
+                    break
+                raise
+            line_size = len(line) + 1
+            if size + line_size > max_bytes:
+                truncated = True
+                break
+            text = line.decode("utf-8", errors="replace") + "\n"
+            kept.append(text)
+            size += line_size
+            if on_chunk is not None:
+                pending.append(text)
+                pending_size += line_size
+                if pending_size >= chunk_bytes:
+                    await on_chunk("".join(pending), size)
+                    pending = []
+                    pending_size = 0
+    if on_chunk is not None and pending:
+        await on_chunk("".join(pending), size)
+    return "".join(kept), size, truncated
+
+
+# Matched lines longer than this are cut so a single line cannot blow the budget
+MATCH_LINE_LIMIT = 1000
+
+
+class LogMatch:
+    __slots__ = ("namespace", "pod", "container", "timestamp", "line")
+
+    def __init__(self, namespace, pod, container, timestamp, line):
+        self.namespace = namespace
+        self.pod = pod
+        self.container = container
+        self.timestamp = timestamp
+        self.line = line
+
+    def format(self):
+        return f"{self.timestamp or '-'} {self.namespace}/{self.pod} [{self.container}] {self.line}"
+
+
+def pod_containers(pod, container=None):
+    """(namespace, pod, container) targets for a pod, optionally one container only"""
+    metadata = pod.get("metadata", {})
+    names = [c.get("name") for c in pod.get("spec", {}).get("containers") or []]
+    if container:
+        names = [name for name in names if name == container]
+    return [(metadata.get("namespace"), metadata.get("name"), name) for name in names]
+
+
+def split_timestamp(line):
+    """Split a `timestamps=true` log line into (timestamp, text)"""
+    stamp, sep, rest = line.partition(b" ")
+    if sep and stamp[:2].isdigit() and stamp.endswith(b"Z"):
+        return stamp.decode("ascii", errors="replace"), rest
+    return None, line
+
+
+class LogSearch:
+    """Match a regex across many container logs concurrently
+
+    Every container is read with the same pods/log query; at most
+    `concurrency` streams are open at a time. Once max_matches lines have
+    matched, the remaining reads are cancelled.
+    """
+
+    def __init__(self, backend, pattern, query, max_matches=100, concurrency=10, timeout=None):
+        self.backend = backend
+        self.regex = re.compile(pattern.encode() if isinstance(pattern, str) else pattern)
+        self.query = dict(query, timestamps=True)
+        self.max_matches = max_matches
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.matches = []
+        self.searched = 0
+        self.errors = {}
+        self.stopped_early = False
+
+    async def run(self, targets, progress=None):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        done = asyncio.Event()
+
+        async def search(target):
+            async with semaphore:
+                if done.is_set():
+                    return
+                try:
+                    await self.search_one(target, done)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    self.errors["/".join(target)] = str(e)
+                if progress is not None:
+                    await progress(self.searched, f"{self.searched}/{len(targets)} containers searched, {len(self.matches)} matches", len(targets))
+
+        tasks = [asyncio.create_task(search(target)) for target in targets]
+        stopper = asyncio.create_task(done.wait())
+        try:
+            pending = set(tasks)
+            while pending and not done.is_set():
+                _, pending = await asyncio.wait(pending | {stopper}, return_when=asyncio.FIRST_COMPLETED)
+                pending.discard(stopper)
+        finally:
+            stopper.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, stopper, return_exceptions=True)
+        self.matches.sort(key=lambda match: match.timestamp or "")
+        del self.matches[self.max_matches:]
+        return self.matches
+
+    async def search_one(self, target, done):
+        namespace, pod, container = target
+        lines = self.backend.stream_logs(namespace, pod, self.timeout, container=container, **self.query)
+        size = 0
+        async with contextlib.aclosing(lines):
+            async for line in lines:
+                size += len(line) + 1
+                if size > self.query["limitBytes"]:
+                    break
+                # Match the message only, so ^ anchors at its start and
+                # date-like patterns do not match every timestamp
+                timestamp, text = split_timestamp(line)
+                if self.regex.search(text) is None:
+                    continue
+                if done.is_set():
+                    return
+                text = text[:MATCH_LINE_LIMIT].decode("utf-8", errors="replace")
+                self.matches.append(LogMatch(namespace, pod, container, timestamp, text))
+                if len(self.matches) >= self.max_matches:
+                    # Set before aclose() awaits, so other streams stop appending now
+                    self.stopped_early = True
+                    done.set()
+                    break
+        self.searched += 1
@@ -4,227 +4,1356 @@ Kubernetes MCP Server - Production Ready Version
 """
 
 import asyncio
+import contextlib
 import json
-import subprocess
+import re
+import weakref
+from datetime import datetime, timezone
 from mcp.server import Server
-from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
-from mcp.types import Resource, Tool, TextContent
+from mcp.types import Resource, ResourceTemplate, Tool, TextContent
+
+from analysis import analyze_cluster
+from backend import KINDS, BackendError, api_path
+from clusters import Cluster, configured_contexts, current_cluster
+from config import Config
+from connectivity import connectivity_report, endpoints_as_slices, service_connectivity
+from discovery import DiscoveryCache, kubeconfig_fingerprint
+from events import EventStore
+from instrumentation import RequestMetrics, metrics_snapshot, prometheus_text, serve_prometheus
+from logs import LogSearch, collect_lines, log_query, pod_containers
+from models import MODELS, EndpointSlice, loads
+from profiling import Profiler
+from query import (
+    LIST_PARAMS, QueryError, api_query, check_params, encode_items, parse_fields, parse_resource_uri,
+    selector_string,
+)
+from subscriptions import Subscriptions
+from summaries import SUMMARIES, format_age, format_table, pod_table, summary_rows
+from usage import UsageHistory, usage_table
+
+# Resource URI -> backend kind
+RESOURCE_KINDS = {
+    "k8s://pods": "pods",
+    "k8s://services": "services",
+    "k8s://nodes": "nodes",
+    "k8s://events": "events",
+    "k8s://deployments": "deployments",
+}
+
+# Summary resource URI -> backend kind
+SUMMARY_KINDS = {
+    "k8s://pods/summary": "pods",
+    "k8s://nodes/summary": "nodes",
+    "k8s://services/summary": "services",
+    "k8s://deployments/summary": "deployments",
+}
+
+# Usage history resource URI -> series kind
+USAGE_KINDS = {
+    "k8s://usage/nodes": "node",
+    "k8s://usage/pods": "pod",
+}
+
+# Query parameters accepted on usage resources
+USAGE_PARAMS = ("namespace", "window")
+
+# Parameters the watch cache can answer locally
+INFORMER_PARAMS = {"namespace", "fields"}
+
+# Query parameters accepted with since=<resourceVersion> on list resources
+DELTA_PARAMS = ("since", "namespace", "fields")
+
+# Query parameters accepted on summary resources
+SUMMARY_PARAMS = ("namespace", "labelSelector", "fieldSelector")
+
+# Tools that can report output through progress notifications; calls asking
+# for progress (or following a stream) bypass the response cache
+STREAMING_TOOLS = {"get_pod_logs", "search_pod_logs"}
+
+# Owner kinds search_pod_logs can resolve to a pod selector
+OWNER_KINDS = {
+    "deployment": "deployments",
+    "replicaset": "replicasets",
+    "statefulset": "statefulsets",
+    "daemonset": "daemonsets",
+    "job": "jobs",
+}
+
+class ToolError(Exception):
+    """A tool request failed; tools return the message as "Error: <message>", resources as {"error": ...}"""
 
 class KubernetesMCPServer:
-    def __init__(self):
-        self.server = Server("kubernetes-observability")
+    def __init__(self, config=None, backend=None):
+        self.config = config or Config()
+        kinds = list(RESOURCE_KINDS.values()) if "all" in self.config.informers else self.config.informers
+        self.discovery = DiscoveryCache(
+            self.config.discovery_cache, self.config.discovery_ttl, kubeconfig_fingerprint(self.config)
+        )
+        contexts = configured_contexts(self.config, self.discovery)
+        # Clusters connect on first use, so one that cannot (bad credentials,
+        # missing kubeconfig entry) reports its error per request
+        self.default = Cluster(self.config, contexts[0], kinds, backend, self.discovery)
+        self.clusters = {self.default.name: self.default}
+        self.unavailable = {}
+        for context in contexts[1:]:
+            try:
+                self.clusters[context] = Cluster(self.config, context, kinds, discovery=self.discovery)
+            except Exception as e:
+                self.unavailable[context] = str(e) or type(e).__name__
+        self.subscriptions = Subscriptions(self.config.subscribe_debounce)
+        # Per-session limits on concurrent requests (sessions only share over HTTP)
+        self.session_limits = weakref.WeakKeyDictionary()
+        self.requests = RequestMetrics()
+        self.profiler = Profiler(
+            self.config.profile_dir, self.config.profile_rate, self.config.profile_memory,
+            self.config.profile_names, self.config.profile_max_files,
+        )
+        self.prometheus = None
+        self.server = _Server("kubernetes-observability", version="1.0.0")
         self.setup_handlers()
     
+    # The handlers below use the state of the cluster the current request is for
+    @property
+    def cluster(self):
+        return current_cluster.get(self.default)
+    
+    @property
+    def backend(self):
+        return self.cluster.backend
+    
+    @property
+    def executor(self):
+        return self.cluster.executor
+    
+    @property
+    def informers(self):
+        return self.cluster.informers
+    
+    @property
+    def metrics(self):
+        return self.cluster.metrics
+    
+    @property
+    def cache(self):
+        return self.cluster.cache
+    
+    async def start(self):
+        """Start background watches and metrics polling in every context"""
+        for cluster in self.clusters.values():
+            cluster.start()
+        if self.config.prometheus_port:
+            self.prometheus = await serve_prometheus(
+                self.config.http_host, self.config.prometheus_port,
+                lambda: prometheus_text(self.requests, self.clusters),
+            )
+    
+    async def stop(self):
+        """Stop background watches and release connections"""
+        if self.prometheus is not None:
+            self.prometheus.close()
+            await self.prometheus.wait_closed()
+        for cluster in self.clusters.values():
+            await cluster.stop()
+    
+    def status(self):
+        """Server state reported by k8s://_server/status"""
+        status = dict(
+            self.default.status(),
+            context=self.default.name,
+            transport=self.config.transport,
+            sessions=len(self.session_limits),
+            subscriptions=self.subscriptions.stats(),
+            profiling=self.profiler.status(),
+        )
+        if len(self.clusters) > 1 or self.unavailable:
+            status["contexts"] = {name: cluster.status() for name, cluster in self.clusters.items()}
+            status["contexts"].update({name: {"error": error} for name, error in self.unavailable.items()})
+        return status
+    
+    def session_slot(self):
+        """Semaphore bounding the current session's concurrent requests (a no-op outside a request)"""
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            return contextlib.nullcontext()
+        limit = self.session_limits.get(session)
+        if limit is None:
+            limit = self.session_limits[session] = asyncio.Semaphore(self.config.session_max_concurrency)
+        return limit
+    
+    def context_names(self):
+        return list(self.clusters) + list(self.unavailable)
+    
+    def select_clusters(self, context):
+        """The clusters a `context` argument names: the default, one context, or all of them"""
+        if context == "all":
+            return list(self.clusters.values())
+        if not context:
+            return [self.default]
+        if context in self.clusters:
+            return [self.clusters[context]]
+        if context in self.unavailable:
+            raise ToolError(f"context {context} is unavailable: {self.unavailable[context]}")
+        raise ToolError(f"unknown context {context} (available: {', '.join(self.context_names())})")
+    
+    async def in_contexts(self, context, call, merge):
+        """Run call() against one context, or concurrently against every context for "all"
+
+        With "all" each cluster gets K8S_MCP_CONTEXT_TIMEOUT seconds; clusters
+        that fail or time out are reported by merge() next to the results of
+        the others. Each cluster is connected (off the event loop) before
+        call() runs, so handlers can use self.backend directly.
+        """
+        async def connected_call():
+            await self.cluster.connect()
+            return await call()
+        
+        if context != "all":
+            token = current_cluster.set(self.select_clusters(context)[0])
+            try:
+                return await connected_call()
+            finally:
+                current_cluster.reset(token)
+        
+        timeout = self.config.context_timeout
+        
+        async def run_in(cluster):
+            # Runs in its own task (gather wraps it), so this does not leak
+            current_cluster.set(cluster)
+            try:
+                return await asyncio.wait_for(connected_call(), timeout)
+            except asyncio.TimeoutError:
+                raise ToolError(f"timed out after {timeout:g}s")
+        
+        results = await asyncio.gather(
+            *(run_in(cluster) for cluster in self.clusters.values()), return_exceptions=True
+        )
+        results = list(zip(self.clusters, results))
+        results += [(name, ToolError(f"unavailable: {error}")) for name, error in self.unavailable.items()]
+        return merge(results)
+    
     def setup_handlers(self):
+        # The listings depend only on the configuration: built on first request, then reused
+        listings = {}
+        
         @self.server.list_resources()
         async def list_resources():
-            return [
+            if "resources" not in listings:
+                listings["resources"] = self.resource_list()
+            return listings["resources"]
+        
+        @self.server.list_resource_templates()
+        async def list_resource_templates():
+            if "templates" not in listings:
+                listings["templates"] = self.resource_template_list()
+            return listings["templates"]
+        
+        @self.server.list_tools()
+        async def list_tools():
+            if "tools" not in listings:
+                listings["tools"] = self.tool_list()
+            return listings["tools"]
+        
+        @self.server.read_resource()
+        async def read_resource(uri: str) -> str:
+            uri = str(uri)
+            base = uri.partition("?")[0]
+            with self.requests.track("resource", base) as request, self.profiler.profile("resource", base, uri):
+                text = await self.read_resource_text(uri)
+                return request.done(text, text.startswith('{"error"'))
+        
+        @self.server.subscribe_resource()
+        async def subscribe_resource(uri) -> None:
+            uri = str(uri)
+            base, params = parse_resource_uri(uri)
+            context = params.pop("context", None)
+            kind = RESOURCE_KINDS.get(base) or SUMMARY_KINDS.get(base)
+            if kind is None:
+                raise QueryError(f"Subscriptions are not supported for {base}")
+            check_params(base, params, SUMMARY_PARAMS if base in SUMMARY_KINDS else LIST_PARAMS)
+            clusters = self.select_clusters(context)
+            for cluster in clusters:
+                await cluster.connect()
+            self.subscriptions.add(
+                self.server.request_context.session, uri, base, kind, params.get("namespace") or None, clusters,
+            )
+        
+        @self.server.unsubscribe_resource()
+        async def unsubscribe_resource(uri) -> None:
+            self.subscriptions.remove(self.server.request_context.session, str(uri))
+        
+        @self.server.call_tool()
+        async def call_tool(name: str, arguments: dict) -> list:
+            arguments = dict(arguments or {})
+            with self.requests.track("tool", name) as request, self.profiler.profile("tool", name, arguments):
+                text = await self.call_tool_text(name, arguments)
+                request.done(text, text.startswith("Error"))
+                return [TextContent(type="text", text=text)]
+    
+    def resource_list(self):
+        """Resources advertised by resources/list"""
+        return [
+            Resource(
+                uri="k8s://pods",
+                name="Kubernetes Pods",
+                description="All pods in the cluster with status and details",
+                mimeType="application/json"
+            ),
+            Resource(
+                uri="k8s://services",
+                name="Kubernetes Services",
+                description="All services with endpoints and connectivity info",
+                mimeType="application/json"
+            ),
+            Resource(
+                uri="k8s://nodes",
+                name="Kubernetes Nodes",
+                description="Cluster nodes with health and capacity info",
+                mimeType="application/json"
+            ),
+            Resource(
+                uri="k8s://events",
+                name="Kubernetes Events",
+                description="Recent cluster events for troubleshooting",
+                mimeType="application/json"
+            ),
+            Resource(
+                uri="k8s://deployments",
+                name="Kubernetes Deployments",
+                description="All deployments with replica status",
+                mimeType="application/json"
+            ),
+            *[
                 Resource(
-                    uri="k8s://pods",
-                    name="Kubernetes Pods",
-                    description="All pods in the cluster with status and details",
+                    uri=uri,
+                    name=f"Kubernetes {kind.title()} Summary",
+                    description=(
+                        f"Compact one-row-per-object view of {kind}: "
+                        + ", ".join(SUMMARIES[kind][0])
+                    ),
                     mimeType="application/json"
-                ),
+                )
+                for uri, kind in SUMMARY_KINDS.items()
+            ],
+            *[
                 Resource(
-                    uri="k8s://services",
-                    name="Kubernetes Services",
-                    description="All services with endpoints and connectivity info",
+                    uri=uri,
+                    name=f"Kubernetes {kind.title()} Usage",
+                    description=(
+                        f"CPU and memory of every {kind} from local metrics history: current, "
+                        "p50/p95/max and memory trend over ?window= seconds (default 600)"
+                    ),
                     mimeType="application/json"
+                )
+                for uri, kind in USAGE_KINDS.items()
+            ],
+            Resource(
+                uri="k8s://_server/status",
+                name="MCP Server Status",
+                description="Backend, concurrency and watch-cache readiness/staleness per kind",
+                mimeType="application/json"
+            ),
+            Resource(
+                uri="k8s://_server/metrics",
+                name="MCP Server Metrics",
+                description=(
+                    "Latency histograms, errors and bytes per resource and tool, Kubernetes API "
+                    "calls and bytes per request kind, in-flight gauges and cache hit ratios"
                 ),
-                Resource(
-                    uri="k8s://nodes",
-                    name="Kubernetes Nodes",
-                    description="Cluster nodes with health and capacity info",
-                    mimeType="application/json"
+                mimeType="application/json"
+            )
+        ]
+    
+    def resource_template_list(self):
+        """Resource templates advertised by resources/templates/list"""
+        # Only worth advertising when there is more than one context
+        context = ["context"] if len(self.context_names()) > 1 else []
+        params = ",".join(context + list(LIST_PARAMS))
+        return [
+            ResourceTemplate(
+                uriTemplate=f"{uri}{{?{params}}}",
+                name=f"Kubernetes {kind.title()} (filtered)",
+                description=(
+                    f"{kind.title()} filtered by namespace, labelSelector and fieldSelector "
+                    "(evaluated by the API server), pruned to comma-separated dotted "
+                    "`fields`, and paged with limit/continue"
                 ),
-                Resource(
-                    uri="k8s://events",
-                    name="Kubernetes Events",
-                    description="Recent cluster events for troubleshooting",
-                    mimeType="application/json"
+                mimeType="application/json"
+            )
+            for uri, kind in RESOURCE_KINDS.items()
+        ] + [
+            ResourceTemplate(
+                uriTemplate=f"{uri}{{?{','.join(context + list(SUMMARY_PARAMS))}}}",
+                name=f"Kubernetes {kind.title()} Summary (filtered)",
+                description=f"Compact {kind} rows filtered by namespace, labelSelector and fieldSelector",
+                mimeType="application/json"
+            )
+            for uri, kind in SUMMARY_KINDS.items()
+        ]
+    
+    def tool_list(self):
+        """Tools advertised by tools/list"""
+        tools = [
+            Tool(
+                name="cluster_health_check",
+                description=(
+                    "Perform comprehensive cluster health check. Returns a JSON report with "
+                    "overall status, unhealthy nodes, pod and deployment findings joined with "
+                    "their node, owner and warning events, and per-namespace rollups."
                 ),
-                Resource(
-                    uri="k8s://deployments",
-                    name="Kubernetes Deployments",
-                    description="All deployments with replica status",
-                    mimeType="application/json"
-                )
-            ]
-        
-        @self.server.read_resource()
-        async def read_resource(uri: str) -> str:
-            try:
-                if uri == "k8s://pods":
-                    result = subprocess.run(
-                        ["kubectl", "get", "pods", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
-                    return result.stdout
-                elif uri == "k8s://services":
-                    result = subprocess.run(
-                        ["kubectl", "get", "services", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
-                    return result.stdout
-                elif uri == "k8s://nodes":
-                    result = subprocess.run(
-                        ["kubectl", "get", "nodes", "-o", "json"],
-                        capture_output=True, text=True
-                    )
-                    return result.stdout
-                elif uri == "k8s://events":
-                    result = subprocess.run(
-                        ["kubectl", "get", "events", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
-                    return result.stdout
-                elif uri == "k8s://deployments":
-                    result = subprocess.run(
-                        ["kubectl", "get", "deployments", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
-                    return result.stdout
-                else:
-                    return json.dumps({"error": f"Unknown resource: {uri}"})
-            except Exception as e:
-                return json.dumps({"error": str(e)})
-        
-        @self.server.list_tools()
-        async def list_tools():
-            return [
-                Tool(
-                    name="cluster_health_check",
-                    description="Perform comprehensive cluster health check",
-                    inputSchema={"type": "object", "properties": {}}
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "namespace": {
+                            "type": "string",
+                            "description": "Limit pods, deployments and events to one namespace"
+                        }
+                    }
+                }
+            ),
+            Tool(
+                name="check_pod_status",
+                description="Check pod status and identify issues",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace to check (default: all)"
+                        }
+                    }
+                }
+            ),
+            Tool(
+                name="analyze_service_connectivity",
+                description=(
+                    "Analyze service endpoints and connectivity. With service_name, show that "
+                    "service and its endpoints; without it, report ready, not-ready and missing "
+                    "endpoints for every service in the namespace (or the whole cluster)."
                 ),
-                Tool(
-                    name="check_pod_status",
-                    description="Check pod status and identify issues",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "namespace": {
-                                "type": "string",
-                                "description": "Namespace to check (default: all)"
-                            }
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "service_name": {
+                            "type": "string",
+                            "description": "Service name to analyze (omit for all services)"
+                        },
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace of the service (default: default; all namespaces in bulk mode)"
                         }
                     }
+                }
+            ),
+            Tool(
+                name="get_pod_logs",
+                description=(
+                    "Retrieve pod logs (last 50 lines by default). Output is capped at "
+                    "limit_bytes and streamed as progress notifications when the client "
+                    "sends a progress token."
                 ),
-                Tool(
-                    name="analyze_service_connectivity",
-                    description="Analyze service endpoints and connectivity",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "service_name": {
-                                "type": "string",
-                                "description": "Service name to analyze"
-                            },
-                            "namespace": {
-                                "type": "string",
-                                "description": "Namespace of the service"
-                            }
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "pod_name": {
+                            "type": "string",
+                            "description": "Name of the pod"
+                        },
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace of the pod"
+                        },
+                        "container": {
+                            "type": "string",
+                            "description": "Container name (required for multi-container pods)"
+                        },
+                        "tail_lines": {
+                            "type": "integer",
+                            "description": "Number of lines from the end of the log"
+                        },
+                        "since_seconds": {
+                            "type": "integer",
+                            "description": "Only lines newer than this many seconds"
+                        },
+                        "limit_bytes": {
+                            "type": "integer",
+                            "description": "Maximum bytes to return (capped by the server limit)"
+                        },
+                        "previous": {
+                            "type": "boolean",
+                            "description": "Logs of the previous, terminated container instance"
+                        },
+                        "timestamps": {
+                            "type": "boolean",
+                            "description": "Prefix every line with its RFC3339 timestamp"
+                        },
+                        "follow": {
+                            "type": "boolean",
+                            "description": "Keep streaming new lines for follow_seconds, after the tail_lines (default 50) or since_seconds lines"
+                        },
+                        "follow_seconds": {
+                            "type": "number",
+                            "description": "How long to follow (default 10, capped by the server)"
+                        }
+                    },
+                    "required": ["pod_name", "namespace"]
+                }
+            ),
+            Tool(
+                name="search_pod_logs",
+                description=(
+                    "Search the logs of many pods at once for a regular expression. Pods are "
+                    "chosen by namespace plus a label selector or an owner such as "
+                    "deployment/web; logs are read concurrently and the search stops once "
+                    "max_matches lines have matched."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "pattern": {
+                            "type": "string",
+                            "description": "Regular expression to look for (Python syntax)"
+                        },
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace to search (all namespaces if omitted, selector required)"
+                        },
+                        "label_selector": {
+                            "type": "string",
+                            "description": "Pods to search, e.g. app=web"
+                        },
+                        "owner": {
+                            "type": "string",
+                            "description": "Workload whose pods to search: deployment/NAME, statefulset/NAME, daemonset/NAME, replicaset/NAME or job/NAME"
+                        },
+                        "container": {
+                            "type": "string",
+                            "description": "Only search this container (default: all containers)"
+                        },
+                        "ignore_case": {
+                            "type": "boolean",
+                            "description": "Case-insensitive matching"
+                        },
+                        "tail_lines": {
+                            "type": "integer",
+                            "description": "Lines from the end of each log to search (default 1000)"
+                        },
+                        "since_seconds": {
+                            "type": "integer",
+                            "description": "Only search lines newer than this many seconds"
+                        },
+                        "previous": {
+                            "type": "boolean",
+                            "description": "Search the previous, terminated container instances"
+                        },
+                        "max_matches": {
+                            "type": "integer",
+                            "description": "Stop after this many matching lines (default 100)"
+                        }
+                    },
+                    "required": ["pattern"]
+                }
+            ),
+            Tool(
+                name="get_events",
+                description=(
+                    "Recent events for an object (e.g. kind=Pod, name, namespace) or filtered by "
+                    "namespace, reason and type, deduplicated and most recent first. Answered "
+                    "from the in-memory event store when the events watch cache is enabled."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "kind": {
+                            "type": "string",
+                            "description": "Kind of the involved object (default Pod when name is given)"
+                        },
+                        "name": {
+                            "type": "string",
+                            "description": "Name of the involved object"
+                        },
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace of the events"
+                        },
+                        "reason": {
+                            "type": "string",
+                            "description": "Event reason, e.g. BackOff or FailedScheduling"
+                        },
+                        "type": {
+                            "type": "string",
+                            "description": "Normal or Warning"
+                        },
+                        "since_seconds": {
+                            "type": "integer",
+                            "description": "Only events seen in the last this many seconds"
+                        },
+                        "limit": {
+                            "type": "integer",
+                            "description": "Maximum events to return (default 50)"
                         }
                     }
+                }
+            ),
+            Tool(
+                name="get_resource_usage",
+                description=(
+                    "CPU and memory usage of nodes, pods or containers: current value, p95, max "
+                    "and memory trend per minute over a window, from the server's metrics "
+                    "history (a single live sample if history is disabled). Heaviest first."
                 ),
-                Tool(
-                    name="get_pod_logs",
-                    description="Retrieve and analyze pod logs",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "pod_name": {
-                                "type": "string",
-                                "description": "Name of the pod"
-                            },
-                            "namespace": {
-                                "type": "string",
-                                "description": "Namespace of the pod"
-                            }
-                        },
-                        "required": ["pod_name", "namespace"]
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "kind": {
+                            "type": "string",
+                            "enum": ["node", "pod", "container"],
+                            "description": "What to report on (default pod)"
+                        },
+                        "namespace": {
+                            "type": "string",
+                            "description": "Namespace of the pods"
+                        },
+                        "name": {
+                            "type": "string",
+                            "description": "Node or pod name"
+                        },
+                        "container": {
+                            "type": "string",
+                            "description": "Container name (kind=container)"
+                        },
+                        "window_seconds": {
+                            "type": "number",
+                            "description": "History window to summarize (default 600)"
+                        },
+                        "sort_by": {
+                            "type": "string",
+                            "enum": ["cpu", "memory"],
+                            "description": "Order rows by current cpu or memory (default cpu)"
+                        },
+                        "top": {
+                            "type": "integer",
+                            "description": "Maximum rows (default 20)"
+                        }
                     }
-                )
-            ]
-        
-        @self.server.call_tool()
-        async def call_tool(name: str, arguments: dict) -> list:
-            try:
-                if name == "cluster_health_check":
-                    result = subprocess.run(
-                        ["kubectl", "get", "pods", "--all-namespaces"],
-                        capture_output=True, text=True
+                }
+            ),
+            Tool(
+                name="invalidate_cache",
+                description="Drop cached responses so the next call reads live cluster state",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "name": {
+                            "type": "string",
+                            "description": "Resource URI or tool name to invalidate (default: everything)"
+                        }
+                    }
+                }
+            ),
+            Tool(
+                name="configure_profiling",
+                description=(
+                    "Profile a sampled fraction of requests with cProfile (and tracemalloc) into "
+                    "local report files; without arguments, report the current settings"
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "rate": {
+                            "type": "number",
+                            "description": "Fraction of requests to profile, 0 to 1 (0 turns profiling off)"
+                        },
+                        "memory": {
+                            "type": "boolean",
+                            "description": "Also trace allocations and report the top allocation sites"
+                        },
+                        "names": {
+                            "type": "string",
+                            "description": "Comma-separated tool names or resource URIs to sample (empty: all)"
+                        }
+                    }
+                }
+            )
+        ]
+        if len(self.context_names()) > 1:
+            for tool in tools:
+                tool.inputSchema["properties"]["context"] = {
+                    "type": "string",
+                    "description": (
+                        "Kubeconfig context to query, or all to query every context concurrently "
+                        f"(default: {self.default.name}; available: {', '.join(self.context_names())})"
                     )
-                    return [TextContent(type="text", text=result.stdout)]
-                
-                elif name == "check_pod_status":
-                    namespace = arguments.get("namespace", "all")
-                    if namespace == "all":
-                        cmd = ["kubectl", "get", "pods", "--all-namespaces"]
-                    else:
-                        cmd = ["kubectl", "get", "pods", "-n", namespace]
-                    
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    return [TextContent(type="text", text=result.stdout)]
-                
-                elif name == "analyze_service_connectivity":
-                    service_name = arguments.get("service_name")
-                    namespace = arguments.get("namespace", "default")
-                    
-                    if not service_name:
-                        return [TextContent(type="text", text="Error: service_name is required")]
-                    
-                    # Get service info
-                    service_cmd = ["kubectl", "get", "service", service_name, "-n", namespace, "-o", "json"]
-                    service_result = subprocess.run(service_cmd, capture_output=True, text=True)
-                    
-                    # Get endpoints info
-                    endpoints_cmd = ["kubectl", "get", "endpoints", service_name, "-n", namespace, "-o", "json"]
-                    endpoints_result = subprocess.run(endpoints_cmd, capture_output=True, text=True)
-                    
-                    analysis = f"Service Analysis for {service_name} in {namespace}:\n\n"
-                    analysis += "Service Info:\n" + service_result.stdout + "\n\n"
-                    analysis += "Endpoints Info:\n" + endpoints_result.stdout
-                    
-                    return [TextContent(type="text", text=analysis)]
-                
-                elif name == "get_pod_logs":
-                    pod_name = arguments.get("pod_name")
-                    namespace = arguments.get("namespace")
-                    
-                    if not pod_name or not namespace:
-                        return [TextContent(type="text", text="Error: pod_name and namespace are required")]
-                    
-                    cmd = ["kubectl", "logs", pod_name, "-n", namespace, "--tail=50"]
-                    result = subprocess.run(cmd, capture_output=True, text=True)
-                    
-                    if result.returncode != 0:
-                        return [TextContent(type="text", text=f"Error getting logs: {result.stderr}")]
-                    
-                    return [TextContent(type="text", text=result.stdout)]
-                
+                }
+        return tools
+    
+    async def read_resource_text(self, uri):
+        """Answer a resources/read request with JSON text (errors included)"""
+        async with self.session_slot():
+            try:
+                base, params = parse_resource_uri(uri)
+                context = params.pop("context", None)
+                if base == "k8s://_server/status":
+                    return json.dumps(self.status())
+                if base == "k8s://_server/metrics":
+                    return json.dumps(metrics_snapshot(self.requests, self.clusters))
+                if base in USAGE_KINDS:
+                    check_params(base, params, USAGE_PARAMS)
+                elif base in SUMMARY_KINDS:
+                    check_params(base, params, SUMMARY_PARAMS)
+                elif base in RESOURCE_KINDS:
+                    check_params(base, params, DELTA_PARAMS if "since" in params else LIST_PARAMS)
                 else:
-                    return [TextContent(type="text", text=f"Unknown tool: {name}")]
-                    
+                    return json.dumps({"error": f"Unknown resource: {uri}"})
+                return await self.in_contexts(context, lambda: self.read_uri(base, params), _merge_json)
             except Exception as e:
-                return [TextContent(type="text", text=f"Error executing tool {name}: {str(e)}")]
+                # QueryError (bad parameters) and cluster errors alike
+                return json.dumps({"error": str(e)})
     
-    async def run(self):
-        async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="kubernetes-observability",
-                    server_version="1.0.0",
-                    capabilities={
-                        "resources": {},
-                        "tools": {}
-                    }
+    async def call_tool_text(self, name, arguments):
+        """Answer a tools/call request with text (errors included)"""
+        context = arguments.pop("context", None)
+        async with self.session_slot():
+            try:
+                # Progress must only increase, so fanned-out calls do not stream
+                progress = self.progress_reporter() if context != "all" else None
+                if name == "invalidate_cache":
+                    clusters = self.clusters.values() if context is None else self.select_clusters(context)
+                    removed = sum(cluster.cache.invalidate(arguments.get("name")) for cluster in clusters)
+                    return f"Invalidated {removed} cached responses"
+                if name == "configure_profiling":
+                    return self.configure_profiling(arguments)
+                return await self.in_contexts(
+                    context, lambda: self.call_in_context(name, arguments, progress), _merge_text
+                )
+            except ToolError as e:
+                return f"Error: {e}"
+            except Exception as e:
+                return f"Error executing tool {name}: {str(e)}"
+    
+    def configure_profiling(self, arguments):
+        names = arguments.get("names")
+        try:
+            self.profiler.configure(
+                rate=arguments.get("rate"),
+                memory=arguments.get("memory"),
+                names=None if names is None else [name.strip() for name in names.split(",") if name.strip()],
+            )
+        except ValueError as e:
+            raise ToolError(str(e))
+        return "Profiling settings:\n" + json.dumps(self.profiler.status(), indent=2)
+    
+    async def call_in_context(self, name, arguments, progress=None):
+        """Run a tool in the current context, through its response cache"""
+        if name in STREAMING_TOOLS and (progress is not None or arguments.get("follow")):
+            return await self.run_tool(name, arguments, progress)
+        return await self.cache.fetch(
+            name, arguments, lambda: self.run_tool(name, arguments), self.cluster.name
+        )
+    
+    async def read_uri(self, base, params):
+        """Produce the JSON text of a validated k8s:// resource in the current context"""
+        if base in USAGE_KINDS:
+            return await self.read_usage(USAGE_KINDS[base], params)
+        if base in SUMMARY_KINDS:
+            kind = SUMMARY_KINDS[base]
+            return await self.cache.fetch(
+                base, params, lambda: self.read_summary(kind, params), self.cluster.name
+            )
+        kind = RESOURCE_KINDS[base]
+        if "since" in params:
+            return await self.read_delta(kind, params)
+        informer = self.informers.get(kind)
+        if informer is not None and informer.fresh and set(params) <= INFORMER_PARAMS:
+            return await self.read_from_store(informer, params)
+        return await self.cache.fetch(
+            base, params, lambda: self.read_list(kind, params), self.cluster.name
+        )
+    
+    async def read_list(self, kind, params):
+        """Produce the JSON text for a k8s:// list resource"""
+        namespace = params.get("namespace") or None
+        query = api_query(params)
+        fields = parse_fields(params.get("fields"))
+        if "limit" in params or "continue" in params:
+            # A single page requested by cursor; its metadata.continue is the
+            # cursor for the next page.
+            query["limit"] = int(params.get("limit") or self.config.list_chunk_size)
+            query["continue"] = params.get("continue")
+            return await self.read_page(kind, namespace, query, fields)
+        try:
+            return await self.stream_list(kind, namespace, query, fields)
+        except BackendError as e:
+            if e.status != 410:
+                raise
+            # The paging snapshot expired mid-list; fall back to one request
+            return await self.read_page(kind, namespace, query, fields)
+    
+    async def read_page(self, kind, namespace, query, fields):
+        """Fetch one LIST response, passing it through unless it needs projecting"""
+        raw = await self.backend.request(api_path(kind, namespace), query)
+        if fields is None:
+            return raw.decode("utf-8", errors="replace")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _project_page, raw, fields)
+    
+    async def stream_list(self, kind, namespace=None, query=None, fields=None):
+        """LIST a kind in chunks, encoding each page's items as it arrives
+
+        Only one decoded page is alive at a time, so peak memory beyond the
+        response text itself is bounded by the chunk size.
+        """
+        loop = asyncio.get_running_loop()
+        chunks = []
+        list_kind = api_version = resource_version = None
+        pages = self.backend.list_pages(kind, namespace, limit=self.config.list_chunk_size, **(query or {}))
+        async for page in pages:
+            list_kind = list_kind or page.get("kind")
+            api_version = api_version or page.get("apiVersion")
+            resource_version = page.get("metadata", {}).get("resourceVersion")
+            items = page.pop("items", None)
+            del page
+            if items:
+                chunks.append(await loop.run_in_executor(None, encode_items, items, fields))
+            del items
+        return _list_json(list_kind, api_version, resource_version, chunks)
+    
+    async def read_from_store(self, informer, params):
+        """Answer a list read from an informer's store"""
+        namespace = params.get("namespace")
+        fields = parse_fields(params.get("fields"))
+        if not namespace and fields is None:
+            # Encode off the event loop; the store reuses its last encoding
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, informer.store.to_json)
+        store = informer.store
+        loop = asyncio.get_running_loop()
+        if fields is None:
+            # One namespace of the stored encodings, spliced without decoding
+            chunks = await loop.run_in_executor(None, store.encoded, namespace)
+        else:
+            items = await loop.run_in_executor(None, store.items, namespace)
+            chunks = [await loop.run_in_executor(None, encode_items, items, fields)] if items else []
+        return _list_json(store.list_kind, store.api_version, store.resource_version, chunks)
+    
+    async def read_delta(self, kind, params):
+        """Objects added, modified and deleted since a resourceVersion, from the kind's change log
+
+        The kind is watched from the first delta read on. A version the log
+        no longer covers gets the full list back with "resync": true.
+        """
+        informer = self.cluster.watch(kind)
+        try:
+            await informer.wait_ready(self.config.timeout)
+        except asyncio.TimeoutError:
+            pass
+        since = params["since"]
+        params = {key: value for key, value in params.items() if key != "since"}
+        loop = asyncio.get_running_loop()
+        delta = await loop.run_in_executor(None, informer.store.changes_since, since) if informer.fresh else None
+        if delta is None:
+            if informer.fresh:
+                body = await self.read_from_store(informer, params)
+            else:
+                body = await self.read_list(kind, params)
+            return body[:-1] + ', "resync": true}'
+        changes, objects, version = delta
+        namespace = params.get("namespace")
+        namespaced = KINDS[kind][2]
+        added, modified, deleted = [], [], []
+        for key, (first, _) in changes.items():
+            object_namespace, name = key.split("/", 1) if namespaced else (None, key)
+            if namespace and object_namespace != namespace:
+                continue
+            obj = objects.get(key)
+            if obj is not None:
+                (added if first == "ADDED" else modified).append(obj)
+            elif first != "ADDED":
+                deleted.append({"namespace": object_namespace, "name": name} if namespaced else {"name": name})
+        fields = parse_fields(params.get("fields"))
+        added, modified = await asyncio.gather(
+            loop.run_in_executor(None, encode_items, added, fields),
+            loop.run_in_executor(None, encode_items, modified, fields),
+        )
+        head = json.dumps({
+            "kind": informer.store.list_kind,
+            "apiVersion": informer.store.api_version,
+            "metadata": {"resourceVersion": version},
+            "since": since,
+            "deleted": deleted,
+        })
+        return head[:-1] + ', "added": [' + added + '], "modified": [' + modified + "]}"
+    
+    async def read_summary(self, kind, params):
+        """Produce the compact columnar view of a kind"""
+        loop = asyncio.get_running_loop()
+        namespace = params.get("namespace") or None
+        informer = self.informers.get(kind)
+        rows = []
+        if informer is not None and informer.fresh and set(params) <= {"namespace"}:
+            items = await loop.run_in_executor(None, informer.store.items, namespace)
+            rows = await loop.run_in_executor(None, summary_rows, kind, items)
+        else:
+            pages = self.backend.list_pages(
+                kind, namespace, limit=self.config.list_chunk_size, **api_query(params)
+            )
+            async for page in pages:
+                rows.extend(await loop.run_in_executor(None, summary_rows, kind, page.get("items") or []))
+        return json.dumps({"kind": kind, "columns": SUMMARIES[kind][0], "rows": rows})
+    
+    def progress_reporter(self):
+        """Return report(progress, message) for the current request, or None if no progress token was sent"""
+        try:
+            ctx = self.server.request_context
+        except LookupError:
+            return None
+        token = ctx.meta.progressToken if ctx.meta else None
+        if token is None:
+            return None
+        
+        async def report(progress, message=None, total=None):
+            await ctx.session.send_progress_notification(
+                token, progress, total=total, message=message, related_request_id=ctx.request_id
+            )
+        
+        return report
+    
+    async def read_logs(self, namespace, pod, arguments, progress=None):
+        """Stream one container's logs under the configured byte cap"""
+        query = log_query(arguments, self.config.log_max_bytes)
+        duration = None
+        timeout = None
+        if arguments.get("follow"):
+            query["follow"] = True
+            duration = min(float(arguments.get("follow_seconds") or 10), self.config.log_follow_max_seconds)
+            timeout = duration + self.config.timeout
+        on_chunk = None
+        if progress is not None:
+            async def on_chunk(text, size):
+                await progress(size, text)
+        lines = self.backend.stream_logs(namespace, pod, timeout, **query)
+        text, size, truncated = await collect_lines(lines, query["limitBytes"], duration, on_chunk)
+        if truncated or size >= query["limitBytes"]:
+            text += f"[truncated at {query['limitBytes']} bytes; narrow with tail_lines or since_seconds]\n"
+        return text
+    
+    async def list_items(self, kind, namespace=None, **query):
+        """Objects of a kind from a fresh informer store, or from one LIST"""
+        informer = self.informers.get(kind)
+        if informer is not None and informer.fresh and not query:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, informer.store.items, namespace)
+        result = await self.backend.list(kind, namespace, **query)
+        return result.get("items", [])
+    
+    async def list_models(self, kind, namespace=None, **query):
+        """Objects of a kind as compact models, from a fresh informer store or a paged LIST"""
+        model = MODELS[kind]
+        informer = self.informers.get(kind)
+        if informer is not None and informer.fresh and not query:
+            loop = asyncio.get_running_loop()
+            if hasattr(informer.store, "table"):
+                return await loop.run_in_executor(None, informer.store.read, _table_models, namespace)
+            return await loop.run_in_executor(None, informer.store.convert, model.from_dict, namespace)
+        return await self.backend.list_models(kind, model, namespace, limit=self.config.list_chunk_size, **query)
+    
+    def pod_store(self):
+        """The fresh columnar pod table's store, or None"""
+        informer = self.informers.get("pods")
+        if informer is not None and informer.fresh and hasattr(informer.store, "table"):
+            return informer.store
+        return None
+    
+    async def health_report(self, namespace=None):
+        """List pods, nodes, deployments and warning events concurrently and analyze them"""
+        if "events" in self.informers and self.informers["events"].fresh:
+            events = self.list_models("events", namespace)
+        else:
+            events = self.list_models("events", namespace, fieldSelector="type=Warning")
+        nodes, deployments, events = await asyncio.gather(
+            self.list_models("nodes"),
+            self.list_models("deployments", namespace),
+            events,
+        )
+        loop = asyncio.get_running_loop()
+        store = self.pod_store()
+        if store is not None:
+            # Only pods the table preselects are analyzed one by one
+            flagged = [node.name for node in nodes if not node.ready or node.problems or node.unschedulable]
+            pods, pod_counts = await loop.run_in_executor(None, store.read, _pod_suspects, namespace, flagged)
+        else:
+            pods, pod_counts = await self.list_models("pods", namespace), None
+        report = await loop.run_in_executor(
+            None, lambda: analyze_cluster(pods, nodes, deployments, events, pod_counts=pod_counts)
+        )
+        if namespace:
+            report["namespace"] = namespace
+        return json.dumps(report, indent=2)
+    
+    async def query_events(self, arguments):
+        """Answer get_events from the event store, or from one server-side filtered LIST"""
+        namespace = arguments.get("namespace")
+        name = arguments.get("name")
+        kind = arguments.get("kind") or ("Pod" if name else None)
+        filters = {
+            "kind": kind,
+            "namespace": namespace,
+            "name": name,
+            "reason": arguments.get("reason"),
+            "type": arguments.get("type"),
+            "since_seconds": arguments.get("since_seconds"),
+            "limit": int(arguments.get("limit") or 50),
+        }
+        informer = self.informers.get("events")
+        if informer is not None and informer.fresh:
+            records = informer.store.query(**filters)
+        else:
+            selectors = {
+                "involvedObject.kind": kind,
+                "involvedObject.name": name,
+                "reason": filters["reason"],
+                "type": filters["type"],
+            }
+            field_selector = ",".join(f"{key}={value}" for key, value in selectors.items() if value)
+            items = await self.list_items("events", namespace, fieldSelector=field_selector or None)
+            store = EventStore(max_records=len(items) + 1, max_age=float("inf"))
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, store.replace, items, None)
+            records = store.query(**filters)
+        if not records:
+            return "No events found\n"
+        rows = [
+            [
+                format_age(datetime.fromtimestamp(record.last_seen, timezone.utc)),
+                record.type or "",
+                record.reason or "",
+                f"{record.kind}/{record.name}" if record.namespace is None or namespace else f"{record.kind}/{record.namespace}/{record.name}",
+                str(record.count),
+                (record.message or "").strip(),
+            ]
+            for record in records
+        ]
+        return format_table(["LAST SEEN", "TYPE", "REASON", "OBJECT", "COUNT", "MESSAGE"], rows)
+    
+    async def usage_history(self):
+        """The poller's history, or a one-sample history fetched now if polling is off or has not run"""
+        if self.metrics is not None and self.metrics.polls:
+            return self.metrics.history
+        history = UsageHistory(capacity=1)
+        age = self.cluster.missing("nodemetrics")
+        if age is not None:
+            raise ToolError(
+                f"reading metrics.k8s.io failed (is metrics-server installed?): not served by the cluster (checked {age:.0f}s ago)"
+            )
+        try:
+            nodes, pods = await asyncio.gather(self.backend.list("nodemetrics"), self.backend.list("podmetrics"))
+        except BackendError as e:
+            if e.status == 404:
+                self.cluster.set_missing("nodemetrics")
+            raise ToolError(f"reading metrics.k8s.io failed (is metrics-server installed?): {e}")
+        history.add_node_metrics(nodes.get("items", []))
+        history.add_pod_metrics(pods.get("items", []))
+        return history
+    
+    async def read_usage(self, kind, params):
+        """JSON usage statistics for every node or pod"""
+        window = float(params.get("window") or 600)
+        try:
+            history = await self.usage_history()
+        except ToolError as e:
+            return json.dumps({"error": str(e)})
+        series = []
+        for key in history.select(kind, params.get("namespace")):
+            stats = history.series[key].stats(window)
+            if stats is not None:
+                series.append(dict(zip(("namespace", "name") if kind == "pod" else ("name",), key[1:]), **stats))
+        return json.dumps({"kind": kind, "window": window, "series": series})
+    
+    async def resource_usage(self, arguments):
+        """Render get_resource_usage"""
+        kind = arguments.get("kind") or "pod"
+        if kind not in ("node", "pod", "container"):
+            raise ToolError("kind must be node, pod or container")
+        window = float(arguments.get("window_seconds") or 600)
+        history = await self.usage_history()
+        keys = history.select(kind, arguments.get("namespace"), arguments.get("name"), arguments.get("container"))
+        return usage_table(
+            history, kind, keys, window,
+            sort_by=arguments.get("sort_by") or "cpu",
+            top=int(arguments.get("top") or 20),
+        )
+    
+    async def list_endpoint_slices(self, namespace=None):
+        """EndpointSlices, converted from Endpoints on clusters that do not serve them"""
+        if self.cluster.missing("endpointslices") is None:
+            try:
+                return await self.list_models("endpointslices", namespace)
+            except BackendError as e:
+                if e.status != 404:
+                    raise
+                self.cluster.set_missing("endpointslices")
+        slices = endpoints_as_slices(await self.list_items("endpoints", namespace))
+        return [EndpointSlice.from_dict(endpoint_slice) for endpoint_slice in slices]
+    
+    async def bulk_connectivity(self, namespace=None):
+        """Connectivity of every service in scope from one LIST each of services, slices and pods"""
+        services, slices, pods = await asyncio.gather(
+            self.list_models("services", namespace),
+            self.list_endpoint_slices(namespace),
+            self.list_models("pods", namespace),
+        )
+        loop = asyncio.get_running_loop()
+        reports = await loop.run_in_executor(None, service_connectivity, services, slices, pods)
+        scope = f"namespace {namespace}" if namespace else "all namespaces"
+        return connectivity_report(reports, scope)
+    
+    async def resolve_pods(self, namespace, label_selector=None, owner=None):
+        """List the pods selected by a label selector and/or workload owner"""
+        if owner:
+            kind, _, owner_name = owner.partition("/")
+            resource = OWNER_KINDS.get(kind.lower().rstrip("s"))
+            if resource is None or not owner_name:
+                raise ToolError(f"owner must look like deployment/NAME (kinds: {', '.join(OWNER_KINDS)})")
+            if not namespace:
+                raise ToolError("namespace is required with owner")
+            try:
+                workload = await self.backend.get(resource, owner_name, namespace)
+            except BackendError as e:
+                raise ToolError(f"cannot resolve {owner}: {e}")
+            owner_selector = selector_string(workload.get("spec", {}).get("selector") or {})
+            if not owner_selector:
+                raise ToolError(f"{owner} has no pod selector")
+            label_selector = ",".join(filter(None, [owner_selector, label_selector]))
+        if not namespace and not label_selector:
+            raise ToolError("give a namespace, label_selector or owner to search")
+        pods = await self.backend.list("pods", namespace, labelSelector=label_selector)
+        return pods.get("items", [])
+    
+    async def search_logs(self, arguments, progress=None):
+        """Run search_pod_logs and render its matches"""
+        pattern = arguments.get("pattern")
+        if not pattern:
+            raise ToolError("pattern is required")
+        if arguments.get("ignore_case"):
+            pattern = "(?i)" + pattern
+        pods = await self.resolve_pods(
+            arguments.get("namespace"), arguments.get("label_selector"), arguments.get("owner")
+        )
+        targets = [target for pod in pods for target in pod_containers(pod, arguments.get("container"))]
+        if not targets:
+            return "No pods matched"
+        query = log_query(
+            {
+                "tail_lines": arguments.get("tail_lines") or (None if arguments.get("since_seconds") else 1000),
+                "since_seconds": arguments.get("since_seconds"),
+                "previous": arguments.get("previous"),
+            },
+            self.config.log_max_bytes,
+        )
+        try:
+            search = LogSearch(
+                self.backend,
+                pattern,
+                query,
+                max_matches=int(arguments.get("max_matches") or 100),
+                concurrency=self.config.log_search_concurrency,
+            )
+        except re.error as e:
+            raise ToolError(f"invalid pattern: {e}")
+        matches = await search.run(targets, progress)
+        
+        pod_count = len({(m.namespace, m.pod) for m in matches})
+        header = f"{len(matches)} matches in {pod_count} pods ({search.searched}/{len(targets)} containers searched"
+        header += ", stopped at max_matches)" if search.stopped_early else ")"
+        lines = [header]
+        lines += [match.format() for match in matches]
+        for target, error in sorted(search.errors.items()):
+            lines.append(f"error {target}: {error}")
+        return "\n".join(lines) + "\n"
+    
+    async def run_tool(self, name, arguments, progress=None):
+        """Execute a tool and return its text output"""
+        if name == "cluster_health_check":
+            return await self.health_report(arguments.get("namespace"))
+
+        elif name == "check_pod_status":
+            namespace = arguments.get("namespace", "all")
+            store = self.pod_store()
+            if store is not None:
+                return await asyncio.get_running_loop().run_in_executor(
+                    None, store.read, _pod_table_text, None if namespace == "all" else namespace
                 )
+            if namespace == "all":
+                pods = await self.backend.list("pods")
+            else:
+                pods = await self.backend.list("pods", namespace)
+
+            return pod_table(pods, all_namespaces=namespace == "all")
+
+        elif name == "analyze_service_connectivity":
+            service_name = arguments.get("service_name")
+            if not service_name:
+                return await self.bulk_connectivity(arguments.get("namespace"))
+            namespace = arguments.get("namespace", "default")
+
+            # Get service and endpoints info concurrently
+            service_result, endpoints_result = await asyncio.gather(
+                self.backend.get("services", service_name, namespace),
+                self.backend.get("endpoints", service_name, namespace),
+                return_exceptions=True,
             )
 
+            analysis = f"Service Analysis for {service_name} in {namespace}:\n\n"
+            analysis += "Service Info:\n" + _render(service_result) + "\n\n"
+            analysis += "Endpoints Info:\n" + _render(endpoints_result)
+
+            return analysis
+
+        elif name == "get_pod_logs":
+            pod_name = arguments.get("pod_name")
+            namespace = arguments.get("namespace")
+
+            if not pod_name or not namespace:
+                raise ToolError("pod_name and namespace are required")
+
+            try:
+                return await self.read_logs(namespace, pod_name, arguments, progress)
+            except BackendError as e:
+                raise ToolError(f"cannot get logs: {e}")
+
+        elif name == "search_pod_logs":
+            return await self.search_logs(arguments, progress)
+
+        elif name == "get_events":
+            return await self.query_events(arguments)
+
+        elif name == "get_resource_usage":
+            return await self.resource_usage(arguments)
+
+        else:
+            raise ToolError(f"unknown tool {name}")
+    
+    async def run(self):
+        await self.start()
+        try:
+            if self.config.transport == "http":
+                await self.run_http()
+            else:
+                async with stdio_server() as (read_stream, write_stream):
+                    await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
+        finally:
+            await self.stop()
+    
+    async def run_http(self):
+        """Serve any number of sessions over Streamable HTTP, sharing this process's clusters and caches"""
+        import uvicorn
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        from starlette.applications import Starlette
+        from starlette.routing import Route
+        
+        manager = StreamableHTTPSessionManager(app=self.server, security_settings=_transport_security(self.config))
+        app = Starlette(
+            routes=[Route(self.config.http_path, endpoint=_ASGIEndpoint(manager.handle_request))],
+            lifespan=lambda app: manager.run(),
+        )
+        server = uvicorn.Server(uvicorn.Config(
+            app, host=self.config.http_host, port=self.config.http_port, log_level="warning"
+        ))
+        await server.serve()
+
+class _Server(Server):
+    """Low-level MCP server that also advertises resource subscriptions"""
+    
+    def create_initialization_options(self, notification_options=None, experimental_capabilities=None):
+        options = super().create_initialization_options(notification_options, experimental_capabilities)
+        options.capabilities.resources.subscribe = True
+        return options
+
+class _ASGIEndpoint:
+    """Wraps an ASGI callable so Starlette routes requests to it unchanged"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+def _transport_security(config):
+    """DNS rebinding protection for the HTTP transport
+    
+    Only requests whose Host (and Origin, if sent) name the bound address or
+    a loopback name are served, so a web page cannot reach the endpoint by
+    rebinding its own domain to 127.0.0.1. K8S_MCP_HTTP_ALLOWED_HOSTS adds
+    names only when the server listens on a non-loopback address.
+    """
+    from mcp.server.transport_security import TransportSecuritySettings
+    
+    host = config.http_host
+    hosts = ["localhost:*", "127.0.0.1:*", "[::1]:*"]
+    bound = f"[{host}]:*" if ":" in host else f"{host}:*"
+    if bound not in hosts:
+        hosts.insert(0, bound)
+    origins = [f"http://{name}" for name in hosts]
+    if host not in LOOPBACK_HOSTS and config.http_allowed_hosts:
+        if "*" in config.http_allowed_hosts:
+            return TransportSecuritySettings(enable_dns_rebinding_protection=False)
+        hosts += config.http_allowed_hosts
+        origins += [f"{scheme}://{name}" for name in config.http_allowed_hosts for scheme in ("http", "https")]
+    return TransportSecuritySettings(enable_dns_rebinding_protection=True, allowed_hosts=hosts, allowed_origins=origins)
+
+def _table_models(table, namespace):
+    return table.models(table.select(namespace=namespace))
+
+def _pod_suspects(table, namespace, nodes):
+    """(pods that may be unhealthy, count_pods of all pods) from a pod table"""
+    return table.models(table.suspects(namespace, nodes)), table.counts(table.select(namespace=namespace))
+
+def _pod_table_text(table, namespace):
+    return table.pod_table(table.select(namespace=namespace), all_namespaces=namespace is None)
+
+def _list_json(list_kind, api_version, resource_version, chunks):
+    """Assemble a List response from pre-encoded item chunks"""
+    head = json.dumps({
+        "kind": list_kind,
+        "apiVersion": api_version,
+        "metadata": {"resourceVersion": resource_version},
+    })
+    return head[:-1] + ', "items": [' + ", ".join(chunks) + "]}"
+
+def _project_page(raw, fields):
+    """Decode one API page and re-encode it with its items projected"""
+    page = loads(raw)
+    items = page.pop("items", None) or []
+    return json.dumps(page)[:-1] + ', "items": [' + encode_items(items, fields) + "]}"
+
+def _merge_json(results):
+    """Combine per-context JSON texts into {"contexts": {name: result or {"error": ...}}}"""
+    parts = []
+    for name, result in results:
+        if isinstance(result, BaseException):
+            result = json.dumps({"error": str(result) or type(result).__name__})
+        parts.append(f"{json.dumps(name)}: {result}")
+    return '{"contexts": {' + ", ".join(parts) + "}}"
+
+def _merge_text(results):
+    """Combine per-context tool outputs under a header per context"""
+    sections = []
+    for name, result in results:
+        if isinstance(result, BaseException):
+            sections.append(f"=== context {name}: error ===\n{str(result) or type(result).__name__}\n")
+        else:
+            sections.append(f"=== context {name} ===\n{result.rstrip()}\n")
+    return "\n".join(sections)
+
+def _render(result):
+    """Pretty-print a fetched object, or the error that prevented fetching it"""
+    if isinstance(result, BaseException):
+        return f"Error: {result}"
+    return json.dumps(result, indent=4)
+
 async def main():
     server = KubernetesMCPServer()
     await server.run()
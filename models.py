@@ -0,0 +1,273 @@
+"""
+Compact decoded Kubernetes objects for the Kubernetes MCP Server
+
+The analyses (cluster health, service connectivity) read a handful of fields
+from every object of a LIST, but a decoded pod dict holds its whole spec
+and status: several times the JSON size in RAM, all of it alive until the
+analysis ends. The models below keep only what the analyses use, in
+__slots__ classes, and are built page by page so each page's dicts are freed
+before the next page is decoded.
+
+JSON is decoded with orjson when it is installed (about twice as fast as
+the json module on large lists) and with json otherwise. Automatic garbage
+collection is held off while a large document is decoded: the parser
+allocates hundreds of thousands of containers, and the collections they
+trigger rescan everything decoded so far, costing more than the parse
+itself. Decoded JSON has no reference cycles, so nothing is left for the
+collector to find.
+"""
+
+import contextlib
+import gc
+import json
+import threading
+
+from summaries import last_termination_reason, pod_ready, pod_restarts, pod_status
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+# Documents at least this large are decoded with garbage collection paused
+GC_PAUSE_BYTES = 256 * 1024
+
+_gc_lock = threading.Lock()
+_gc_pauses = 0
+_gc_was_enabled = False
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """Hold off automatic garbage collection (nests, and is safe across threads)"""
+    global _gc_pauses, _gc_was_enabled
+    with _gc_lock:
+        if _gc_pauses == 0:
+            _gc_was_enabled = gc.isenabled()
+            gc.disable()
+        _gc_pauses += 1
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pauses -= 1
+            if _gc_pauses == 0 and _gc_was_enabled:
+                gc.enable()
+
+
+def loads(raw):
+    """Parse a JSON document (bytes or str)"""
+    if len(raw) < GC_PAUSE_BYTES:
+        return _loads(raw)
+    with gc_paused():
+        return _loads(raw)
+
+
+def dumps(obj):
+    """Compact JSON text of an object"""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+SERVICE_NAME_LABEL = "kubernetes.io/service-name"
+
+
+def pod_owner(pod):
+    """(kind, name) of the workload that owns a pod, resolving ReplicaSets to Deployments"""
+    metadata = pod.get("metadata", {})
+    for ref in metadata.get("ownerReferences") or []:
+        if ref.get("controller", True):
+            kind, name = ref.get("kind"), ref.get("name")
+            # A Deployment's ReplicaSet is named <deployment>-<pod-template-hash>
+            template_hash = (metadata.get("labels") or {}).get("pod-template-hash")
+            if kind == "ReplicaSet" and template_hash and name.endswith("-" + template_hash):
+                return "Deployment", name[: -len(template_hash) - 1]
+            return kind, name
+    return None
+
+
+class Pod:
+    """What the analyses need from a Pod, with the kubectl STATUS precomputed"""
+
+    __slots__ = (
+        "namespace", "name", "labels", "phase", "node", "status", "ready", "containers",
+        "restarts", "last_termination_reason", "owner", "deleting",
+    )
+
+    @classmethod
+    def from_dict(cls, pod):
+        metadata = pod.get("metadata", {})
+        self = cls()
+        self.namespace = metadata.get("namespace")
+        self.name = metadata.get("name")
+        self.labels = metadata.get("labels") or {}
+        self.phase = pod.get("status", {}).get("phase")
+        self.node = pod.get("spec", {}).get("nodeName")
+        self.status = pod_status(pod)
+        self.ready, self.containers = pod_ready(pod)
+        self.restarts = pod_restarts(pod)
+        self.last_termination_reason = last_termination_reason(pod)
+        self.owner = pod_owner(pod)
+        self.deleting = bool(metadata.get("deletionTimestamp"))
+        return self
+
+
+class Node:
+    """Readiness, true problem conditions and schedulability of a Node"""
+
+    __slots__ = ("name", "ready", "problems", "unschedulable")
+
+    @classmethod
+    def from_dict(cls, node):
+        self = cls()
+        self.name = node.get("metadata", {}).get("name")
+        self.ready = None
+        self.problems = []
+        for condition in node.get("status", {}).get("conditions") or []:
+            if condition.get("type") == "Ready":
+                self.ready = condition.get("status") == "True"
+            elif condition.get("status") == "True":
+                self.problems.append(condition.get("type"))
+        self.unschedulable = bool(node.get("spec", {}).get("unschedulable"))
+        return self
+
+
+class Deployment:
+    """Replica counts and failing conditions of a Deployment"""
+
+    __slots__ = ("namespace", "name", "desired", "available", "ready", "failing")
+
+    @classmethod
+    def from_dict(cls, deployment):
+        metadata = deployment.get("metadata", {})
+        status = deployment.get("status", {})
+        self = cls()
+        self.namespace = metadata.get("namespace")
+        self.name = metadata.get("name")
+        self.desired = deployment.get("spec", {}).get("replicas", 1)
+        self.available = status.get("availableReplicas", 0)
+        self.ready = status.get("readyReplicas", 0)
+        self.failing = [
+            condition.get("reason") or condition.get("type")
+            for condition in status.get("conditions") or []
+            if condition.get("status") != "True"
+        ]
+        return self
+
+
+class Event:
+    """An event reduced to its involved object, classification and timing"""
+
+    __slots__ = ("namespace", "kind", "name", "type", "reason", "message", "count", "last_seen")
+
+    @classmethod
+    def from_dict(cls, event):
+        involved = event.get("involvedObject") or event.get("regarding") or {}
+        self = cls()
+        # Cluster-scoped objects such as nodes have no namespace
+        self.namespace = involved.get("namespace") or None
+        self.kind = involved.get("kind")
+        self.name = involved.get("name")
+        # An event without a type is not assumed to be a Warning
+        self.type = event.get("type")
+        self.reason = event.get("reason")
+        self.message = event.get("message")
+        self.count = event.get("count") or 1
+        self.last_seen = (
+            event.get("lastTimestamp") or event.get("eventTime")
+            or event.get("metadata", {}).get("creationTimestamp") or ""
+        )
+        return self
+
+
+class Service:
+    """Type and selector of a Service"""
+
+    __slots__ = ("namespace", "name", "type", "selector")
+
+    @classmethod
+    def from_dict(cls, service):
+        metadata = service.get("metadata", {})
+        spec = service.get("spec", {})
+        self = cls()
+        self.namespace = metadata.get("namespace")
+        self.name = metadata.get("name")
+        self.type = spec.get("type", "ClusterIP")
+        self.selector = spec.get("selector") or {}
+        return self
+
+
+class Endpoint:
+    """One endpoint of an EndpointSlice"""
+
+    __slots__ = ("name", "target_kind", "target_namespace", "target_name", "ready", "node")
+
+    @classmethod
+    def from_dict(cls, endpoint):
+        target = endpoint.get("targetRef") or {}
+        self = cls()
+        self.target_kind = target.get("kind")
+        self.target_namespace = target.get("namespace")
+        self.target_name = target.get("name")
+        self.name = self.target_name or ",".join(endpoint.get("addresses") or [])
+        # A missing ready condition means ready, per the EndpointSlice API
+        self.ready = (endpoint.get("conditions") or {}).get("ready") is not False
+        self.node = endpoint.get("nodeName")
+        return self
+
+
+class EndpointSlice:
+    """The service an EndpointSlice belongs to and its endpoints"""
+
+    __slots__ = ("namespace", "service", "endpoints")
+
+    @classmethod
+    def from_dict(cls, endpoint_slice):
+        metadata = endpoint_slice.get("metadata", {})
+        self = cls()
+        self.namespace = metadata.get("namespace")
+        self.service = (metadata.get("labels") or {}).get(SERVICE_NAME_LABEL)
+        self.endpoints = [Endpoint.from_dict(endpoint) for endpoint in endpoint_slice.get("endpoints") or []]
+        return self
+
+
+# Backend kind -> model its LIST items decode to
+MODELS = {
+    "pods": Pod,
+    "nodes": Node,
+    "deployments": Deployment,
+    "events": Event,
+    "services": Service,
+    "endpointslices": EndpointSlice,
+}
+
+
+def decode_items(raw, model):
+    """Decode a LIST response body straight into models"""
+    with gc_paused():
+        return [model.from_dict(item) for item in _loads(raw).get("items") or []]
+
+
+def page_continue(raw):
+    """(True, continue token or None) read from the metadata ahead of a LIST page's items,
+    or (False, None) if the page does not start with its metadata"""
+    end = raw.find(b'"items"', 0, 4096)
+    if end < 0:
+        return False, None
+    try:
+        head = _loads(raw[:end].rstrip(b" \t\r\n,") + b"}")
+    except ValueError:
+        return False, None
+    if "metadata" not in head:
+        return False, None
+    return True, head["metadata"].get("continue") or None
+
+
+def decode_page(raw, model):
+    """(models, continue token) of one LIST page"""
+    with gc_paused():
+        page = _loads(raw)
+        return [model.from_dict(item) for item in page.get("items") or []], page.get("metadata", {}).get("continue")
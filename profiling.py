@@ -0,0 +1,179 @@
+"""
+Opt-in request profiling for the Kubernetes MCP Server
+
+With K8S_MCP_PROFILE_RATE above zero (or after a configure_profiling call) a
+sampled fraction of resource reads and tool calls runs under cProfile, and
+optionally tracemalloc. Each sampled request leaves two files in
+K8S_MCP_PROFILE_DIR (a per-user directory with mode 0700, since the reports
+quote request arguments), named after the tool or resource and a hash of
+its arguments:
+
+- NAME.prof: the raw cProfile stats (pstats, snakeviz, gprof2dot, ...)
+- NAME.txt: the request and its arguments, duration, peak traced memory,
+  the hottest functions and the top allocation sites
+
+cProfile and tracemalloc see the whole event-loop thread, so only one
+request is profiled at a time and anything else the loop runs meanwhile
+shows up in its profile too; work done on worker threads (the API backend's
+blocking calls, JSON decoding of paged lists) is not included. When the rate
+is zero a request pays for one attribute check, and cProfile, pstats and
+tracemalloc are not even imported until the first sample.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import time
+
+from config import private_dir
+
+# Frames kept per traced allocation (more frames cost more memory while tracing)
+TRACE_FRAMES = 10
+
+_OFF = contextlib.nullcontext()
+
+
+class Profiler:
+    """Samples requests into cProfile/tracemalloc reports written to a directory"""
+
+    def __init__(self, directory, rate=0.0, memory=False, names=(), max_files=100, top=30):
+        self.directory = directory
+        self.rate = rate
+        self.memory = memory
+        self.names = set(names)
+        self.max_files = max_files
+        self.top = top
+        self.active = False
+        self.profiled = 0
+        self.skipped = 0
+        self.last = None
+        self.error = None
+
+    def configure(self, rate=None, memory=None, names=None):
+        if rate is not None:
+            if not 0 <= rate <= 1:
+                raise ValueError("rate must be between 0 and 1")
+            self.rate = rate
+        if memory is not None:
+            self.memory = memory
+        if names is not None:
+            self.names = set(names)
+
+    def profile(self, type_, name, arguments):
+        """Context manager profiling this request if it is sampled"""
+        if not self.rate:
+            return _OFF
+        if self.names and name not in self.names:
+            return _OFF
+        if random.random() >= self.rate:
+            return _OFF
+        if self.active:
+            # cProfile and tracemalloc are per-process; one request at a time
+            self.skipped += 1
+            return _OFF
+        return _Sample(self, type_, name, arguments)
+
+    def write(self, sample, profile, duration, allocations, peak):
+        import io
+        import pstats
+
+        private_dir(self.directory)
+        stem = os.path.join(self.directory, sample.stem())
+        profile.dump_stats(stem + ".prof")
+        with open(stem + ".txt", "w") as f:
+            f.write(f"{sample.type} {sample.name}\n")
+            f.write(f"arguments: {json.dumps(sample.arguments, sort_keys=True, default=str)}\n")
+            f.write(f"started: {time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sample.wall))}\n")
+            f.write(f"duration: {duration * 1000:.1f} ms\n")
+            if peak is not None:
+                f.write(f"peak traced memory: {peak / 2 ** 20:.1f} MiB\n")
+            f.write("\nHottest functions (cumulative time):\n")
+            output = io.StringIO()
+            pstats.Stats(profile, stream=output).sort_stats("cumulative").print_stats(self.top)
+            f.write(output.getvalue())
+            if allocations:
+                f.write("\nTop allocation sites still held at the end of the request:\n")
+                for statistic in allocations:
+                    frame = statistic.traceback[0]
+                    f.write(f"{statistic.size / 1024:10.1f} KiB {statistic.count:8d} blocks  {frame.filename}:{frame.lineno}\n")
+        self.profiled += 1
+        self.last = stem + ".txt"
+        self.prune()
+
+    def prune(self):
+        """Keep only the newest max_files profiles"""
+        reports = sorted(
+            (entry for entry in os.scandir(self.directory) if entry.name.endswith(".txt")),
+            key=lambda entry: entry.stat().st_mtime,
+        )
+        for entry in reports[:max(len(reports) - self.max_files, 0)]:
+            for suffix in (".txt", ".prof"):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(entry.path[:-4] + suffix)
+
+    def status(self):
+        return {
+            "rate": self.rate,
+            "memory": self.memory,
+            "names": sorted(self.names),
+            "directory": self.directory,
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped,
+            "last": self.last,
+            "error": self.error,
+        }
+
+
+class _Sample:
+    """One request running under the profiler"""
+
+    def __init__(self, profiler, type_, name, arguments):
+        self.profiler = profiler
+        self.type = type_
+        self.name = name
+        self.arguments = dict(arguments) if isinstance(arguments, dict) else arguments
+
+    def stem(self):
+        digest = hashlib.sha1(json.dumps(self.arguments, sort_keys=True, default=str).encode()).hexdigest()[:8]
+        safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.name).strip("_")
+        started = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.wall)) + f"{self.wall % 1:.3f}"[1:]
+        return f"{started}-{self.type}-{safe_name}-{digest}"
+
+    def __enter__(self):
+        import cProfile
+        import tracemalloc
+
+        self.profiler.active = True
+        self.wall = time.time()
+        self.tracing = self.profiler.memory and not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start(TRACE_FRAMES)
+        self.profile = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        import tracemalloc
+
+        self.profile.disable()
+        duration = time.perf_counter() - self.started
+        allocations = peak = None
+        try:
+            if self.tracing:
+                _, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot().filter_traces(
+                    (tracemalloc.Filter(False, tracemalloc.__file__),)
+                )
+                tracemalloc.stop()
+                allocations = snapshot.statistics("lineno")[:self.profiler.top]
+            self.profiler.write(self, self.profile, duration, allocations, peak)
+        except OSError as e:
+            # A full or unwritable directory must not fail the request
+            self.profiler.error = str(e)
+        finally:
+            self.profiler.active = False
+        return False
@@ -0,0 +1,99 @@
+"""
+Query parameters for k8s:// resource URIs
+
+    k8s://pods?namespace=x&labelSelector=app=y&fieldSelector=status.phase!=Running
+              &fields=metadata.name,status.phase&limit=500&continue=<token>
+
+Selectors and namespace are pushed down to the API server; `fields` prunes
+every object to the listed dotted paths before it is serialized.
+"""
+
+import json
+from urllib.parse import parse_qsl
+
+# Query parameters accepted on k8s:// list resources
+LIST_PARAMS = ("namespace", "labelSelector", "fieldSelector", "fields", "limit", "continue")
+
+
+class QueryError(ValueError):
+    """A resource URI carried invalid parameters"""
+
+
+def parse_resource_uri(uri):
+    """Split a resource URI into its base and query parameters"""
+    base, _, query = uri.partition("?")
+    return base, dict(parse_qsl(query, keep_blank_values=True))
+
+
+def check_params(base, params, allowed=LIST_PARAMS):
+    unknown = sorted(set(params) - set(allowed))
+    if unknown:
+        raise QueryError(f"Unsupported parameters for {base}: {', '.join(unknown)}")
+
+
+def api_query(params):
+    """Selector parameters to forward to the API server"""
+    return {
+        "labelSelector": params.get("labelSelector"),
+        "fieldSelector": params.get("fieldSelector"),
+    }
+
+
+def selector_string(selector):
+    """Render a LabelSelector (matchLabels/matchExpressions) as a labelSelector query string"""
+    terms = [f"{key}={value}" for key, value in (selector.get("matchLabels") or {}).items()]
+    for expression in selector.get("matchExpressions") or []:
+        key = expression.get("key")
+        operator = expression.get("operator")
+        values = ",".join(expression.get("values") or [])
+        if operator == "In":
+            terms.append(f"{key} in ({values})")
+        elif operator == "NotIn":
+            terms.append(f"{key} notin ({values})")
+        elif operator == "Exists":
+            terms.append(key)
+        elif operator == "DoesNotExist":
+            terms.append(f"!{key}")
+    return ",".join(terms)
+
+
+def parse_fields(spec):
+    """Turn "metadata.name,status.phase" into a projection tree (None = no projection)
+
+    Leaves are None, meaning "keep the whole value"; a shorter path wins over
+    a longer one that it contains.
+    """
+    if not spec:
+        return None
+    tree = {}
+    for path in spec.split(","):
+        keys = [key for key in path.strip().split(".") if key]
+        if not keys:
+            continue
+        node = tree
+        for key in keys[:-1]:
+            child = node.setdefault(key, {})
+            if child is None:
+                break
+            node = child
+        else:
+            node[keys[-1]] = None
+    return tree or None
+
+
+def project(value, tree):
+    """Keep only the paths in a projection tree; lists are projected element-wise"""
+    if tree is None:
+        return value
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    return {key: project(value[key], sub) for key, sub in tree.items() if key in value}
+
+
+def encode_items(items, fields=None):
+    """Encode (and optionally project) objects as the comma-separated body of a JSON array"""
+    if fields is not None:
+        items = [project(item, fields) for item in items]
+    return json.dumps(items)[1:-1]
@@ -5,17 +5,25 @@ Simple Kubernetes MCP Server for Testing
 
 import asyncio
 import json
-import subprocess
 from mcp.server import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
 from mcp.types import Resource, Tool, TextContent
 
+from config import Config
+from executor import CommandExecutor
+
 class SimpleK8sMCPServer:
     def __init__(self):
+        self.config = Config()
+        self.executor = CommandExecutor(self.config.max_concurrency, self.config.timeout)
         self.server = Server("kubernetes-observability")
         self.setup_handlers()
     
+    async def kubectl(self, *args):
+        """Run kubectl without blocking the event loop"""
+        return await self.executor.run([self.config.kubectl, *args])
+    
     def setup_handlers(self):
         @self.server.list_resources()
         async def list_resources():
@@ -48,30 +56,19 @@ class SimpleK8sMCPServer:
         
         @self.server.read_resource()
         async def read_resource(uri: str) -> str:
+            uri = str(uri)
             try:
                 if uri == "k8s://pods":
-                    result = subprocess.run(
-                        ["kubectl", "get", "pods", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
+                    result = await self.kubectl("get", "pods", "--all-namespaces", "-o", "json")
                     return result.stdout
                 elif uri == "k8s://services":
-                    result = subprocess.run(
-                        ["kubectl", "get", "services", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
+                    result = await self.kubectl("get", "services", "--all-namespaces", "-o", "json")
                     return result.stdout
                 elif uri == "k8s://nodes":
-                    result = subprocess.run(
-                        ["kubectl", "get", "nodes", "-o", "json"],
-                        capture_output=True, text=True
-                    )
+                    result = await self.kubectl("get", "nodes", "-o", "json")
                     return result.stdout
                 elif uri == "k8s://events":
-                    result = subprocess.run(
-                        ["kubectl", "get", "events", "--all-namespaces", "-o", "json"],
-                        capture_output=True, text=True
-                    )
+                    result = await self.kubectl("get", "events", "--all-namespaces", "-o", "json")
                     return result.stdout
                 else:
                     return json.dumps({"error": f"Unknown resource: {uri}"})
@@ -106,10 +103,7 @@ class SimpleK8sMCPServer:
             if name == "cluster_health_check":
                 try:
                     # Check pods
-                    result = subprocess.run(
-                        ["kubectl", "get", "pods", "--all-namespaces"],
-                        capture_output=True, text=True
-                    )
+                    result = await self.kubectl("get", "pods", "--all-namespaces")
                     return [TextContent(type="text", text=result.stdout)]
                 except Exception as e:
                     return [TextContent(type="text", text=f"Error: {str(e)}")]
@@ -117,11 +111,11 @@ class SimpleK8sMCPServer:
                 try:
                     namespace = arguments.get("namespace", "all")
                     if namespace == "all":
-                        cmd = ["kubectl", "get", "pods", "--all-namespaces"]
+                        cmd = ["get", "pods", "--all-namespaces"]
                     else:
-                        cmd = ["kubectl", "get", "pods", "-n", namespace]
+                        cmd = ["get", "pods", "-n", namespace]
                     
-                    result = subprocess.run(cmd, capture_output=True, text=True)
+                    result = await self.kubectl(*cmd)
                     return [TextContent(type="text", text=result.stdout)]
                 except Exception as e:
                     return [TextContent(type="text", text=f"Error: {str(e)}")]
@@ -0,0 +1,114 @@
+"""
+Resource subscriptions for the Kubernetes MCP Server
+
+Clients subscribe to k8s:// URIs instead of polling them. Each subscription
+is backed by the informer (list+watch) of its kind in every cluster it
+covers; a watch event that can affect the URI marks it dirty and, after a
+short debounce, one notifications/resources/updated is sent to every
+session subscribed to it. A burst of events (a rollout touching dozens of
+pods) therefore costs one notification per debounce window, not one per
+event.
+"""
+
+import asyncio
+
+
+class Subscription:
+    """One subscribed URI: its sessions and the changes that concern it"""
+
+    __slots__ = ("uri", "base", "kind", "namespace", "clusters", "sessions", "pending")
+
+    def __init__(self, uri, base, kind, namespace, clusters):
+        self.uri = uri
+        self.base = base
+        self.kind = kind
+        self.namespace = namespace
+        self.clusters = clusters
+        self.sessions = set()
+        self.pending = None
+
+    def concerns(self, cluster, obj):
+        """True if a change to obj in cluster can change this URI's contents"""
+        if cluster not in self.clusters:
+            return False
+        if obj is None or not self.namespace:
+            return True
+        return obj.get("metadata", {}).get("namespace") == self.namespace
+
+
+class Subscriptions:
+    """Subscribed URIs and the debounced notifications sent for them"""
+
+    def __init__(self, debounce=1.0):
+        self.debounce = debounce
+        self._by_uri = {}
+        self._by_kind = {}  # kind -> {uri: Subscription}
+        self._listening = set()  # (cluster name, kind) pairs with a listener installed
+        self._tasks = set()
+        self.notifications = 0
+        self.changes = 0
+
+    def add(self, session, uri, base, kind, namespace, clusters):
+        subscription = self._by_uri.get(uri)
+        if subscription is None:
+            subscription = self._by_uri[uri] = Subscription(uri, base, kind, namespace, clusters)
+            self._by_kind.setdefault(kind, {})[uri] = subscription
+        subscription.sessions.add(session)
+        for cluster in clusters:
+            informer = cluster.watch(kind)
+            if (cluster.name, kind) not in self._listening:
+                self._listening.add((cluster.name, kind))
+                informer.listeners.append(
+                    lambda event_type, obj, cluster=cluster, kind=kind: self.changed(cluster, kind, obj)
+                )
+
+    def remove(self, session, uri):
+        subscription = self._by_uri.get(uri)
+        if subscription is None:
+            return
+        subscription.sessions.discard(session)
+        if not subscription.sessions:
+            self._drop(subscription)
+
+    def _drop(self, subscription):
+        if subscription.pending is not None:
+            subscription.pending.cancel()
+        self._by_uri.pop(subscription.uri, None)
+        self._by_kind.get(subscription.kind, {}).pop(subscription.uri, None)
+
+    def changed(self, cluster, kind, obj):
+        """Called by an informer for every applied change (obj is None after a relist)"""
+        self.changes += 1
+        for subscription in self._by_kind.get(kind, {}).values():
+            if subscription.pending is None and subscription.concerns(cluster, obj):
+                subscription.pending = asyncio.get_running_loop().call_later(
+                    self.debounce, self._flush, subscription
+                )
+
+    def _flush(self, subscription):
+        subscription.pending = None
+        # The next read must not be answered from a response cached before the change
+        for cluster in subscription.clusters:
+            cluster.cache.invalidate(subscription.base)
+        task = asyncio.create_task(self._notify(subscription))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _notify(self, subscription):
+        for session in list(subscription.sessions):
+            try:
+                await session.send_resource_updated(subscription.uri)
+                self.notifications += 1
+            except Exception:
+                # The session went away without unsubscribing
+                subscription.sessions.discard(session)
+        if not subscription.sessions:
+            self._drop(subscription)
+
+    def stats(self):
+        return {
+            "subscriptions": len(self._by_uri),
+            "sessions": len({session for s in self._by_uri.values() for session in s.sessions}),
+            "changes": self.changes,
+            "notifications": self.notifications,
+        }
@@ -0,0 +1,262 @@
+"""
+Compact views of Kubernetes objects for the MCP resources and tools
+
+Besides the kubectl-style pod table, every summarized kind has a flat row
+layout (COLUMNS + summarize_* function) used by the k8s://<kind>/summary
+resources. Rows carry only what an agent needs to triage, typically a few
+percent of the size of the raw objects.
+"""
+
+from datetime import datetime, timezone
+
+
+def parse_time(value):
+    """Parse a Kubernetes RFC3339 timestamp (None if missing)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def format_age(created, now=None):
+    """Render the age of an object the way kubectl does (e.g. 5d, 3h, 12m)"""
+    if created is None:
+        return "<unknown>"
+    now = now or datetime.now(timezone.utc)
+    seconds = int((now - created).total_seconds())
+    if seconds < 120:
+        return f"{max(seconds, 0)}s"
+    minutes = seconds // 60
+    if minutes < 120:
+        return f"{minutes}m"
+    hours = minutes // 60
+    if hours < 48:
+        return f"{hours}h"
+    return f"{hours // 24}d"
+
+
+def pod_status(pod):
+    """Compute the STATUS column kubectl shows for a pod"""
+    metadata = pod.get("metadata", {})
+    status = pod.get("status", {})
+    reason = status.get("reason") or status.get("phase") or "Unknown"
+
+    init_statuses = status.get("initContainerStatuses") or []
+    for index, container in enumerate(init_statuses):
+        state = container.get("state", {})
+        terminated = state.get("terminated")
+        if terminated and terminated.get("exitCode") == 0:
+            continue
+        if terminated:
+            reason = "Init:" + (terminated.get("reason") or f"ExitCode:{terminated.get('exitCode')}")
+        elif state.get("waiting", {}).get("reason") not in (None, "PodInitializing"):
+            reason = "Init:" + state["waiting"]["reason"]
+        else:
+            reason = f"Init:{index}/{len(init_statuses)}"
+        break
+    else:
+        for container in reversed(status.get("containerStatuses") or []):
+            state = container.get("state", {})
+            if state.get("waiting", {}).get("reason"):
+                reason = state["waiting"]["reason"]
+            elif state.get("terminated", {}).get("reason"):
+                reason = state["terminated"]["reason"]
+            elif "terminated" in state:
+                terminated = state["terminated"]
+                if terminated.get("signal"):
+                    reason = f"Signal:{terminated['signal']}"
+                else:
+                    reason = f"ExitCode:{terminated.get('exitCode')}"
+
+    if metadata.get("deletionTimestamp"):
+        reason = "Terminating"
+    return reason
+
+
+def pod_ready(pod):
+    """Return (ready containers, total containers) for a pod"""
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    total = len(pod.get("spec", {}).get("containers") or statuses)
+    return sum(1 for c in statuses if c.get("ready")), total
+
+
+def pod_restarts(pod):
+    """Total container restarts for a pod"""
+    statuses = pod.get("status", {}).get("containerStatuses") or []
+    return sum(c.get("restartCount", 0) for c in statuses)
+
+
+def format_table(headers, rows):
+    """Render rows as a left-aligned, space-padded text table"""
+    widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            widths[i] = max(widths[i], len(cell))
+    lines = []
+    for row in [headers] + rows:
+        lines.append("   ".join(cell.ljust(widths[i]) for i, cell in enumerate(row)).rstrip())
+    return "\n".join(lines) + "\n"
+
+
+def pod_table(pods, all_namespaces=True, now=None):
+    """Render a pod list like `kubectl get pods`"""
+    now = now or datetime.now(timezone.utc)
+    headers = ["NAME", "READY", "STATUS", "RESTARTS", "AGE"]
+    if all_namespaces:
+        headers.insert(0, "NAMESPACE")
+    rows = []
+    for pod in pods.get("items", []):
+        metadata = pod.get("metadata", {})
+        ready, total = pod_ready(pod)
+        row = [
+            metadata.get("name", ""),
+            f"{ready}/{total}",
+            pod_status(pod),
+            str(pod_restarts(pod)),
+            format_age(parse_time(metadata.get("creationTimestamp")), now),
+        ]
+        if all_namespaces:
+            row.insert(0, metadata.get("namespace", ""))
+        rows.append(row)
+    if not rows:
+        return "No resources found\n"
+    return format_table(headers, rows)
+
+
+def last_termination_reason(pod):
+    """Reason of the most recent container termination (e.g. OOMKilled), if any"""
+    latest = None
+    for container in pod.get("status", {}).get("containerStatuses") or []:
+        for state in (container.get("state", {}), container.get("lastState", {})):
+            terminated = state.get("terminated")
+            if terminated:
+                finished = terminated.get("finishedAt") or ""
+                if latest is None or finished > latest[0]:
+                    reason = terminated.get("reason") or f"ExitCode:{terminated.get('exitCode')}"
+                    latest = (finished, reason)
+    return latest[1] if latest else None
+
+
+def _age_seconds(metadata, now):
+    created = parse_time(metadata.get("creationTimestamp"))
+    return int((now - created).total_seconds()) if created else None
+
+
+POD_COLUMNS = [
+    "namespace", "name", "status", "phase", "ready", "containers", "restarts",
+    "node", "age_seconds", "last_termination_reason",
+]
+
+
+def summarize_pod(pod, now):
+    metadata = pod.get("metadata", {})
+    ready, total = pod_ready(pod)
+    return [
+        metadata.get("namespace"),
+        metadata.get("name"),
+        pod_status(pod),
+        pod.get("status", {}).get("phase"),
+        ready,
+        total,
+        pod_restarts(pod),
+        pod.get("spec", {}).get("nodeName"),
+        _age_seconds(metadata, now),
+        last_termination_reason(pod),
+    ]
+
+
+NODE_COLUMNS = [
+    "name", "ready", "unschedulable", "pressure", "cpu", "memory", "pods",
+    "kubelet_version", "age_seconds",
+]
+
+
+def summarize_node(node, now):
+    metadata = node.get("metadata", {})
+    status = node.get("status", {})
+    ready = None
+    pressure = []
+    for condition in status.get("conditions") or []:
+        if condition.get("type") == "Ready":
+            ready = condition.get("status") == "True"
+        elif condition.get("status") == "True":
+            pressure.append(condition.get("type"))
+    allocatable = status.get("allocatable", {})
+    return [
+        metadata.get("name"),
+        ready,
+        bool(node.get("spec", {}).get("unschedulable")),
+        pressure,
+        allocatable.get("cpu"),
+        allocatable.get("memory"),
+        allocatable.get("pods"),
+        status.get("nodeInfo", {}).get("kubeletVersion"),
+        _age_seconds(metadata, now),
+    ]
+
+
+SERVICE_COLUMNS = ["namespace", "name", "type", "cluster_ip", "ports", "selector", "age_seconds"]
+
+
+def summarize_service(service, now):
+    metadata = service.get("metadata", {})
+    spec = service.get("spec", {})
+    ports = [
+        f"{port.get('port')}/{port.get('protocol', 'TCP')}"
+        for port in spec.get("ports") or []
+    ]
+    selector = ",".join(f"{k}={v}" for k, v in (spec.get("selector") or {}).items())
+    return [
+        metadata.get("namespace"),
+        metadata.get("name"),
+        spec.get("type"),
+        spec.get("clusterIP"),
+        ports,
+        selector or None,
+        _age_seconds(metadata, now),
+    ]
+
+
+DEPLOYMENT_COLUMNS = [
+    "namespace", "name", "desired", "ready", "updated", "available", "unavailable",
+    "failing_conditions", "age_seconds",
+]
+
+
+def summarize_deployment(deployment, now):
+    metadata = deployment.get("metadata", {})
+    status = deployment.get("status", {})
+    failing = [
+        condition.get("reason") or condition.get("type")
+        for condition in status.get("conditions") or []
+        if condition.get("status") != "True"
+    ]
+    return [
+        metadata.get("namespace"),
+        metadata.get("name"),
+        deployment.get("spec", {}).get("replicas", 1),
+        status.get("readyReplicas", 0),
+        status.get("updatedReplicas", 0),
+        status.get("availableReplicas", 0),
+        status.get("unavailableReplicas", 0),
+        failing,
+        _age_seconds(metadata, now),
+    ]
+
+
+# kind -> (columns, row function)
+SUMMARIES = {
+    "pods": (POD_COLUMNS, summarize_pod),
+    "nodes": (NODE_COLUMNS, summarize_node),
+    "services": (SERVICE_COLUMNS, summarize_service),
+    "deployments": (DEPLOYMENT_COLUMNS, summarize_deployment),
+}
+
+
+def summary_rows(kind, items, now=None):
+    """Summarize decoded objects of a kind into rows in one pass"""
+    now = now or datetime.now(timezone.utc)
+    summarize = SUMMARIES[kind][1]
+    return [summarize(item, now) for item in items]
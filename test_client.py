@@ -1,13 +1,46 @@
 #!/usr/bin/env python3.11
 """
 Test client for Simple Kubernetes MCP Server
+
+Without arguments this runs a smoke test against simple_mcp_server.py.
+With --load it becomes a load generator for mcp_server.py: it opens many
+concurrent client sessions (over stdio or Streamable HTTP), drives a
+weighted mix of resource reads and tool calls at a fixed concurrency or
+request rate, and reports latency percentiles, error rates and server-side
+saturation read from k8s://_server/status.
 """
 
+import argparse
 import asyncio
+import contextlib
+import json
+import math
 import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
 from mcp.client.session import ClientSession
 from mcp.client.stdio import StdioServerParameters, stdio_client
 
+CLIENT_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(CLIENT_DIR, "bench")
+
+# weight:target entries; a target is a k8s:// URI or a tool name followed by
+# its JSON arguments. {namespace} is replaced with --namespace.
+DEFAULT_MIX = (
+    "4:k8s://pods?namespace={namespace}",
+    "2:k8s://pods/summary",
+    "2:k8s://nodes",
+    "1:k8s://events?namespace={namespace}",
+    '2:check_pod_status {"namespace": "{namespace}"}',
+    '1:get_events {"namespace": "{namespace}"}',
+    "1:cluster_health_check",
+)
+
 async def test_simple_server():
     """Test the MCP server functionality"""
     
@@ -78,6 +111,375 @@ async def test_simple_server():
     
     return True
 
+class Request:
+    """One entry of the request mix"""
+
+    def __init__(self, spec, namespace):
+        weight, _, target = spec.partition(":")
+        if not target or not weight.strip().isdigit():
+            raise ValueError(f"mix entries look like WEIGHT:TARGET, got {spec!r}")
+        target = target.strip().replace("{namespace}", namespace)
+        self.weight = int(weight)
+        self.arguments = None
+        if target.startswith("k8s://"):
+            self.uri = target
+            self.label = target
+        else:
+            name, _, arguments = target.partition(" ")
+            self.uri = None
+            self.tool = name
+            self.arguments = json.loads(arguments) if arguments.strip() else {}
+            self.label = f"{name} {json.dumps(self.arguments)}" if self.arguments else name
+
+    async def send(self, session):
+        """Issue the request; returns its text (an error is raised or returned as text)"""
+        if self.uri:
+            result = await session.read_resource(self.uri)
+            text = result.contents[0].text
+            if text.startswith('{"error"'):
+                raise RuntimeError(json.loads(text)["error"])
+            return text
+        result = await session.call_tool(self.tool, self.arguments)
+        text = result.content[0].text if result.content else ""
+        if result.isError or text.startswith("Error"):
+            raise RuntimeError(text.splitlines()[0] if text else "tool error")
+        return text
+
+
+class Recorder:
+    """Latencies and errors per request label"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.error_messages = {}
+        self.bytes = 0
+
+    def record(self, label, seconds, error=None, size=0):
+        self.latencies.setdefault(label, []).append(seconds * 1000)
+        self.bytes += size
+        if error is not None:
+            self.errors[label] = self.errors.get(label, 0) + 1
+            message = f"{type(error).__name__}: {error}"[:160]
+            self.error_messages[message] = self.error_messages.get(message, 0) + 1
+
+    def summary(self, label, latencies):
+        errors = sum(self.errors.values()) if label == "all" else self.errors.get(label, 0)
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "error_rate": round(errors / len(latencies), 4) if latencies else 0,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": round(max(latencies), 2) if latencies else None,
+        }
+
+
+class SaturationMonitor:
+    """Samples k8s://_server/status while the load runs and keeps the peaks"""
+
+    def __init__(self, sessions, interval):
+        self.sessions = sessions
+        self.interval = interval
+        self.samples = 0
+        self.failures = 0
+        self.peak_in_flight = 0
+        self.peak_waiting = 0
+        self.peak_utilization = 0.0
+        self.peak_sessions = 0
+        self.first = None
+        self.last = None
+
+    async def run(self):
+        while True:
+            await self.sample()
+            await asyncio.sleep(self.interval)
+
+    async def sample(self):
+        statuses = await asyncio.gather(*(self.read(session) for session in self.sessions))
+        statuses = [status for status in statuses if status is not None]
+        if not statuses:
+            return
+        # Over stdio every session has its own server process, so add them up
+        executor = {key: sum(s["executor"][key] for s in statuses) for key in ("max_concurrency", "in_flight", "waiting")}
+        cache = {key: sum(s["cache"][key] for s in statuses) for key in ("hits", "misses", "upstream_calls", "coalesced")}
+        self.samples += 1
+        self.peak_in_flight = max(self.peak_in_flight, executor["in_flight"])
+        self.peak_waiting = max(self.peak_waiting, executor["waiting"])
+        self.peak_utilization = max(self.peak_utilization, executor["in_flight"] / max(executor["max_concurrency"], 1))
+        self.peak_sessions = max(self.peak_sessions, max(s.get("sessions", 0) for s in statuses))
+        if self.first is None:
+            self.first = dict(cache, max_concurrency=executor["max_concurrency"], backend=statuses[0]["backend"])
+        self.last = cache
+
+    async def read(self, session):
+        try:
+            result = await session.read_resource("k8s://_server/status")
+            return json.loads(result.contents[0].text)
+        except Exception:
+            self.failures += 1
+            return None
+
+    def report(self):
+        if self.first is None:
+            return {"samples": 0, "failures": self.failures}
+        lookups = (self.last["hits"] - self.first["hits"]) + (self.last["misses"] - self.first["misses"])
+        return {
+            "samples": self.samples,
+            "failures": self.failures,
+            "backend": self.first["backend"],
+            "max_concurrency": self.first["max_concurrency"],
+            "peak_in_flight": self.peak_in_flight,
+            "peak_waiting": self.peak_waiting,
+            "peak_utilization": round(self.peak_utilization, 3),
+            "peak_sessions": self.peak_sessions,
+            "upstream_calls": self.last["upstream_calls"] - self.first["upstream_calls"],
+            "coalesced": self.last["coalesced"] - self.first["coalesced"],
+            "cache_hit_ratio": round((self.last["hits"] - self.first["hits"]) / lookups, 4) if lookups else None,
+        }
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile in milliseconds"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)], 2)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"server did not listen on port {port} within {timeout}s")
+
+
+@contextlib.asynccontextmanager
+async def open_session(args, env, url):
+    """One initialized ClientSession over the chosen transport"""
+    read_timeout = timedelta(seconds=args.timeout)
+    if args.transport == "http":
+        from mcp.client.streamable_http import streamable_http_client
+        from mcp.shared._httpx_utils import create_mcp_http_client
+        import httpx
+
+        async with create_mcp_http_client(timeout=httpx.Timeout(args.timeout, read=args.timeout + 30)) as http_client:
+            async with streamable_http_client(url, http_client=http_client) as (read, write, _):
+                async with ClientSession(read, write, read_timeout_seconds=read_timeout) as session:
+                    await session.initialize()
+                    yield session
+    else:
+        server_params = StdioServerParameters(command=sys.executable, args=[args.server], env=env)
+        with open(os.devnull, "w") as errlog:
+            async with stdio_client(server_params, errlog=errlog) as (read, write):
+                async with ClientSession(read, write, read_timeout_seconds=read_timeout) as session:
+                    await session.initialize()
+                    yield session
+
+
+async def closed_loop(sessions, mix, weights, recorder, args, deadline):
+    """--concurrency requests in flight per session, each sent as soon as the last one returns"""
+    async def worker(session, rng):
+        while time.monotonic() < deadline:
+            await timed(session, rng.choices(mix, weights)[0], recorder, time.monotonic())
+
+    workers = [
+        worker(session, random.Random(args.seed * 1000 + i * args.concurrency + j))
+        for i, session in enumerate(sessions)
+        for j in range(args.concurrency)
+    ]
+    await asyncio.gather(*workers)
+
+
+async def open_loop(sessions, mix, weights, recorder, args, deadline):
+    """--rate requests per second spread round-robin over the sessions, whether or not earlier ones returned"""
+    rng = random.Random(args.seed)
+    interval = 1 / args.rate
+    tasks = set()
+    started = time.monotonic()
+    sent = 0
+    while True:
+        # Latency counts from the scheduled send time, so a backed-up server is not hidden
+        scheduled = started + sent * interval
+        if scheduled >= deadline:
+            break
+        await asyncio.sleep(max(scheduled - time.monotonic(), 0))
+        task = asyncio.create_task(timed(sessions[sent % len(sessions)], rng.choices(mix, weights)[0], recorder, scheduled))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        sent += 1
+    if tasks:
+        await asyncio.wait(tasks)
+
+
+async def timed(session, request, recorder, started):
+    try:
+        text = await request.send(session)
+    except Exception as e:
+        recorder.record(request.label, time.monotonic() - started, error=e)
+    else:
+        recorder.record(request.label, time.monotonic() - started, size=len(text))
+
+
+async def run_load(args):
+    mix = [Request(spec, args.namespace) for spec in args.mix]
+    weights = [request.weight for request in mix]
+    env = dict(os.environ)
+    fake = None
+    http_server = None
+    with contextlib.ExitStack() as cleanup:
+        if args.fake_pods:
+            sys.path.insert(0, BENCH_DIR)
+            from run import start_fake_cluster
+
+            directory = cleanup.enter_context(tempfile.TemporaryDirectory())
+            fake, kubeconfig = start_fake_cluster(args.fake_pods, directory)
+            cleanup.callback(fake.wait)
+            cleanup.callback(fake.kill)
+            env.update(
+                KUBECONFIG=kubeconfig,
+                BENCH_PODS=str(args.fake_pods),
+                K8S_MCP_KUBECTL=os.path.join(BENCH_DIR, "kubectl"),
+                K8S_MCP_CONTEXT="",
+                K8S_MCP_CONTEXTS="",
+            )
+        url = args.url
+        if args.transport == "http" and not url:
+            port = free_port()
+            http_server = subprocess.Popen(
+                [sys.executable, args.server],
+                env=dict(env, K8S_MCP_TRANSPORT="http", K8S_MCP_HTTP_HOST="127.0.0.1", K8S_MCP_HTTP_PORT=str(port)),
+                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            cleanup.callback(http_server.wait)
+            cleanup.callback(http_server.terminate)
+            await wait_for_port(port, http_server)
+            url = f"http://127.0.0.1:{port}{env.get('K8S_MCP_HTTP_PATH', '/mcp')}"
+
+        print(f"🚀 Opening {args.sessions} {args.transport} sessions...", file=sys.stderr)
+        async with contextlib.AsyncExitStack() as stack:
+            opened = time.monotonic()
+            sessions = []
+            for _ in range(args.sessions):
+                sessions.append(await stack.enter_async_context(open_session(args, env, url)))
+            connect_seconds = time.monotonic() - opened
+
+            # Untimed warm-up so first-call costs (informer sync, pool setup) are not measured
+            warm = Recorder()
+            await asyncio.gather(*(timed(session, request, warm, time.monotonic()) for session in sessions for request in mix))
+
+            monitor = SaturationMonitor(sessions if args.transport == "stdio" else sessions[:1], args.status_interval)
+            await monitor.sample()
+            monitor_task = asyncio.create_task(monitor.run())
+            recorder = Recorder()
+            mode = f"rate {args.rate}/s" if args.rate else f"concurrency {args.concurrency}/session"
+            print(f"⏱️  Running for {args.duration}s at {mode}...", file=sys.stderr)
+            started = time.monotonic()
+            deadline = started + args.duration
+            if args.rate:
+                await open_loop(sessions, mix, weights, recorder, args, deadline)
+            else:
+                await closed_loop(sessions, mix, weights, recorder, args, deadline)
+            elapsed = time.monotonic() - started
+            monitor_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await monitor_task
+            await monitor.sample()
+
+    everything = [latency for latencies in recorder.latencies.values() for latency in latencies]
+    return {
+        "transport": args.transport,
+        "sessions": args.sessions,
+        "mode": "rate" if args.rate else "concurrency",
+        "target_rate": args.rate,
+        "concurrency": None if args.rate else args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "connect_s": round(connect_seconds, 2),
+        "fake_pods": args.fake_pods,
+        "throughput_rps": round(len(everything) / elapsed, 2) if elapsed else None,
+        "bytes": recorder.bytes,
+        "overall": recorder.summary("all", everything),
+        "requests": {label: recorder.summary(label, latencies) for label, latencies in sorted(recorder.latencies.items())},
+        "error_messages": recorder.error_messages,
+        "server": monitor.report(),
+    }
+
+
+def print_report(report):
+    print(f"\n📈 {report['sessions']} {report['transport']} sessions, "
+          f"{report['mode']} {report['target_rate'] or report['concurrency']}, {report['duration_s']}s: "
+          f"{report['throughput_rps']} req/s")
+    print(f"{'REQUEST':<48} {'N':>6} {'ERR %':>6} {'P50 ms':>9} {'P95 ms':>9} {'P99 ms':>9} {'MAX ms':>9}")
+    rows = list(report["requests"].items()) + [("all", report["overall"])]
+    for label, row in rows:
+        print(f"{label[:48]:<48} {row['requests']:>6} {row['error_rate'] * 100:>6.1f} "
+              f"{row['p50_ms']!s:>9} {row['p95_ms']!s:>9} {row['p99_ms']!s:>9} {row['max_ms']!s:>9}")
+    for message, count in sorted(report["error_messages"].items(), key=lambda item: -item[1])[:5]:
+        print(f"❌ {count} x {message}")
+    server = report["server"]
+    if server.get("samples"):
+        print(f"🖥️  Server ({server['backend']}): peak {server['peak_in_flight']}/{server['max_concurrency']} "
+              f"upstream calls in flight ({server['peak_utilization'] * 100:.0f}%), peak {server['peak_waiting']} queued, "
+              f"{server['upstream_calls']} upstream calls, {server['coalesced']} coalesced, "
+              f"cache hit ratio {server['cache_hit_ratio']}")
+    else:
+        print("🖥️  Server status was not readable")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Smoke-test or load-test the Kubernetes MCP server")
+    parser.add_argument("--load", action="store_true", help="run the load generator instead of the smoke test")
+    parser.add_argument("--transport", choices=("stdio", "http"), default="stdio",
+                        help="stdio starts one server process per session; http shares one server")
+    parser.add_argument("--url", help="Streamable HTTP endpoint of a running server (default: start one)")
+    parser.add_argument("--server", default=os.path.join(CLIENT_DIR, "mcp_server.py"), help="server script to start")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent client sessions")
+    parser.add_argument("--concurrency", type=int, default=1, help="requests in flight per session (closed loop)")
+    parser.add_argument("--rate", type=float, help="total requests per second across sessions (open loop)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of measured load")
+    parser.add_argument("--mix", action="append", help="WEIGHT:URI or WEIGHT:TOOL {json args}; repeatable")
+    parser.add_argument("--namespace", help="substituted for {namespace} in the mix (default: ns-0 with --fake-pods, else default)")
+    parser.add_argument("--fake-pods", type=int, help="serve a synthetic cluster of this many pods (bench/fakecluster.py)")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds before a request counts as failed")
+    parser.add_argument("--status-interval", type=float, default=1.0, help="seconds between server status samples")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the request mix")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args()
+    args.mix = args.mix or list(DEFAULT_MIX)
+    args.namespace = args.namespace or ("ns-0" if args.fake_pods else "default")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+    if args.sessions < 1 or args.concurrency < 1:
+        parser.error("--sessions and --concurrency must be at least 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    if not args.load:
+        return asyncio.run(test_simple_server())
+    report = asyncio.run(run_load(args))
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report["overall"]["requests"] > 0
+
+
 if __name__ == "__main__":
-    success = asyncio.run(test_simple_server())
+    success = main()
     exit(0 if success else 1)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+import cache as cache_module
+from cache import ENTRY_OVERHEAD, ResponseCache, SingleFlight
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_leader_error_reaches_every_follower_and_is_not_cached():
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        cache = ResponseCache(ttls={"k8s://pods": 60})
+        results = await asyncio.gather(
+            *(cache.fetch("k8s://pods", {}, loader) for _ in range(5)), return_exceptions=True
+        )
+        assert len(calls) == 1
+        assert all(isinstance(result, RuntimeError) and str(result) == "upstream down" for result in results)
+        assert cache.stats()["entries"] == 0 and cache.flights.in_flight() == 0
+        with pytest.raises(RuntimeError):
+            await cache.fetch("k8s://pods", {}, loader)
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("cancelled", [0, 2])
+def test_cancelled_waiter_does_not_cancel_the_others(cancelled):
+    started = []
+
+    async def loader():
+        started.append(1)
+        await asyncio.sleep(0.1)
+        return "pods"
+
+    async def main():
+        cache = ResponseCache(ttls={"k8s://pods": 60})
+        tasks = [asyncio.create_task(cache.fetch("k8s://pods", {}, loader)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        tasks[cancelled].cancel()  # 0 is the leader, 2 a follower
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert isinstance(results[cancelled], asyncio.CancelledError)
+        assert [result for index, result in enumerate(results) if index != cancelled] == ["pods", "pods"]
+        assert len(started) == 1
+        assert cache.get(("k8s://pods", "{}", None)) == "pods"
+
+    asyncio.run(main())
+
+
+def test_shared_call_is_cancelled_when_every_waiter_leaves():
+    async def main():
+        flights = SingleFlight()
+        seen = []
+
+        async def func():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                seen.append("cancelled")
+                raise
+
+        tasks = [asyncio.create_task(flights.do("key", func)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert seen == ["cancelled"] and flights.in_flight() == 0
+
+    asyncio.run(main())
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = ResponseCache(ttls={"k8s://pods": 5})
+    cache.put("key", "value", cache.ttl("k8s://pods"))
+    clock.now += 4.9
+    assert cache.get("key") == "value"
+    clock.now += 0.2
+    assert cache.get("key") is None
+    assert cache.stats()["expirations"] == 1 and cache.bytes == 0
+
+
+def test_least_recently_used_entries_are_evicted_under_the_byte_budget(clock):
+    entry = 100 + ENTRY_OVERHEAD
+    cache = ResponseCache(max_bytes=3 * entry)
+    for key in "abc":
+        cache.put(key, "x" * 100, 60)
+    assert cache.get("a") is not None  # b is now the least recently used
+    cache.put("d", "x" * 100, 60)
+    assert cache.get("b") is None
+    assert [key for key in "acd" if cache.get(key) is not None] == ["a", "c", "d"]
+    assert cache.bytes == 3 * entry and cache.stats()["evictions"] == 1
+    cache.put("big", "x" * (3 * entry), 60)  # larger than the whole budget: not stored
+    assert cache.get("big") is None and cache.bytes == 3 * entry
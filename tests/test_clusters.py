@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+import pytest
+
+import clusters
+from clusters import Cluster
+from config import Config
+
+
+def test_concurrent_connects_share_one_attempt_and_retry_after_failure(monkeypatch):
+    calls = []
+
+    def create_backend(config, executor, context):
+        calls.append(context)
+        time.sleep(0.05)
+        if len(calls) == 1:
+            raise RuntimeError("kubeconfig not found")
+        return "backend"
+
+    monkeypatch.setattr(clusters, "create_backend", create_backend)
+
+    async def main():
+        cluster = Cluster(Config(), "prod")
+        with pytest.raises(RuntimeError):
+            cluster.backend
+        results = await asyncio.gather(cluster.connect(), cluster.connect(), return_exceptions=True)
+        assert [str(result) for result in results] == ["kubeconfig not found"] * 2
+        assert not cluster.connected
+        assert await asyncio.gather(cluster.connect(), cluster.connect()) == ["backend", "backend"]
+        assert cluster.backend == "backend" and calls == ["prod", "prod"]
+
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+from columnar import NodeTable, PodTable, TableStore
+
+
+def job_pod(index, namespace="batch"):
+    uid = f"uid-{index}"
+    return {
+        "metadata": {
+            "namespace": namespace,
+            "name": f"job-{index}-abcde",
+            "labels": {"controller-uid": uid, "job-name": f"job-{index}", "team": "data"},
+            "ownerReferences": [{"kind": "Job", "name": f"job-{index}", "controller": True}],
+            "creationTimestamp": "2026-10-18T03:00:00Z",
+        },
+        "spec": {"nodeName": "node-1", "containers": [{"name": "main"}]},
+        "status": {"phase": "Running", "containerStatuses": [{"name": "main", "ready": True, "restartCount": 0}]},
+    }
+
+
+def key(pod):
+    return f"{pod['metadata']['namespace']}/{pod['metadata']['name']}"
+
+
+def test_churning_pods_do_not_grow_interned_tables():
+    table = PodTable()
+    for index in range(5):
+        table.put(key(job_pod(index)), job_pod(index))
+    sizes = (len(table.strings), len(table.strings.values), len(table.label_sets.values))
+    for index in range(5, 2000):
+        table.drop(key(job_pod(index - 5)))
+        table.put(key(job_pod(index)), job_pod(index))
+    assert (len(table.strings), len(table.strings.values), len(table.label_sets.values)) == sizes
+    assert sum(labels is not None for labels in table._label_dicts) == 6  # five jobs and the empty set
+
+
+def test_rows_survive_releases_of_shared_values():
+    table = PodTable()
+    pods = [job_pod(index) for index in range(3)]
+    for pod in pods:
+        table.put(key(pod), pod)
+    table.drop(key(pods[0]))
+    pods[1]["status"]["phase"] = "Failed"
+    table.put(key(pods[1]), pods[1])
+    table.put(key(pods[1]), pods[1])
+    models = {pod.name: pod for pod in table.models(table.select())}
+    assert sorted(models) == ["job-1-abcde", "job-2-abcde"]
+    assert models["job-1-abcde"].phase == "Failed"
+    assert models["job-1-abcde"].labels == pods[1]["metadata"]["labels"]
+    assert models["job-2-abcde"].owner == ("Job", "job-2")
+    assert table.select(phase="Failed") == [table.keys[key(pods[1])]]
+    table.drop(key(pods[1]))
+    table.drop(key(pods[2]))
+    assert len(table.strings) == 1 and len(table.label_sets) == 1
+
+
+def test_node_problem_sets_are_released():
+    table = NodeTable()
+    node = {
+        "metadata": {"name": "node-1"},
+        "spec": {},
+        "status": {"conditions": [{"type": "Ready", "status": "True"}, {"type": "DiskPressure", "status": "True"}]},
+    }
+    table.put("/node-1", node)
+    assert len(table.problem_sets) == 2
+    table.drop("/node-1")
+    assert len(table.problem_sets) == 1
+
+
+def test_snapshot_is_not_changed_by_later_puts_and_drops():
+    table = PodTable()
+    for index in range(3):
+        table.put(key(job_pod(index)), job_pod(index))
+    snapshot = table.snapshot()
+    table.drop(key(job_pod(0)))
+    table.put(key(job_pod(3)), job_pod(3))
+    assert sorted(pod.name for pod in snapshot.models(snapshot.select())) == ["job-0-abcde", "job-1-abcde", "job-2-abcde"]
+    assert snapshot.models(snapshot.select(owner_name="job-0"))[0].labels["job-name"] == "job-0"
+    assert sorted(pod.name for pod in table.models(table.select())) == ["job-1-abcde", "job-2-abcde", "job-3-abcde"]
+
+
+def test_store_relist_swaps_in_a_new_table():
+    store = TableStore(PodTable(), "PodList", compact=True)
+    store.replace([job_pod(0), job_pod(1)], "1")
+    before = store.table
+    store.replace([job_pod(1), job_pod(2)], "2")
+    assert store.table is not before and len(before) == 2
+    assert sorted(pod.name for pod in store.read(lambda table: table.models(table.select()))) == ["job-1-abcde", "job-2-abcde"]
+    changes, _, _ = store.changes_since("1")
+    assert changes == {"batch/job-0-abcde": ("DELETED", "DELETED"), "batch/job-2-abcde": ("ADDED", "ADDED")}
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+from config import private_dir
+from discovery import DiscoveryCache
+
+
+def cache(path, fingerprint="kubeconfig"):
+    return DiscoveryCache(str(path), 600, fingerprint)
+
+
+def test_missing_kinds_persist_across_instances(tmp_path):
+    path = tmp_path / "k8s-mcp" / "discovery.json"
+    cache(path).set_missing("prod", "endpointslices")
+    assert cache(path).missing("prod", "endpointslices") is not None
+    assert cache(path, "edited kubeconfig").missing("prod", "endpointslices") is None
+    assert oct(os.stat(path.parent).st_mode & 0o777) == "0o700"
+
+
+def test_shared_directory_is_not_written(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir(mode=0o777)
+    os.chmod(shared, 0o777)
+    with pytest.raises(PermissionError):
+        private_dir(str(shared))
+    cache(shared / "discovery.json").set_missing("prod", "endpointslices")
+    assert not (shared / "discovery.json").exists()
+
+
+@pytest.mark.skipif(not hasattr(os, "geteuid") or os.geteuid() != 0, reason="needs root to chown")
+def test_file_owned_by_another_user_is_a_miss(tmp_path):
+    path = tmp_path / "discovery.json"
+    planted = {"fingerprint": "kubeconfig", "contexts": None, "missing": {"prod": {"endpointslices": 4e9}}}
+    path.write_text(json.dumps(planted))
+    os.chown(path, 65534, 65534)
+    assert cache(path).missing("prod", "endpointslices") is None
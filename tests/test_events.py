@@ -0,0 +1,46 @@
+import time
+
+from events import EventStore
+
+
+def event(namespace, name, reason, kind="Pod", type="Warning"):
+    return {
+        "metadata": {"namespace": namespace, "name": f"{name}.{reason}", "resourceVersion": "1"},
+        "involvedObject": {"kind": kind, "namespace": namespace, "name": name},
+        "reason": reason,
+        "message": f"{reason} {name}",
+        "type": type,
+        "count": 1,
+        "lastTimestamp": "2026-10-18T03:00:00Z",
+    }
+
+
+def store(*events):
+    events_store = EventStore(max_age=float("inf"))
+    events_store.replace(list(events), "1")
+    return events_store
+
+
+def test_name_without_namespace_finds_namespaced_events():
+    events_store = store(event("ns-3", "app-3-0000387", "BackOff"), event("ns-1", "other", "BackOff"))
+    records = events_store.query(kind="Pod", name="app-3-0000387")
+    assert [(record.namespace, record.reason) for record in records] == [("ns-3", "BackOff")]
+    assert len(events_store.query(kind="Pod", namespace="ns-3", name="app-3-0000387")) == 1
+    assert events_store.query(kind="Pod", namespace="ns-1", name="app-3-0000387") == []
+
+
+def test_name_without_namespace_merges_namespaces():
+    events_store = store(event("ns-1", "web", "BackOff"), event("ns-2", "web", "Unhealthy"), event(None, "web", "NodeNotReady", kind="Node"))
+    records = events_store.query(kind="Pod", name="web")
+    assert sorted(record.namespace for record in records) == ["ns-1", "ns-2"]
+    assert [record.reason for record in events_store.query(kind="Node", name="web")] == ["NodeNotReady"]
+
+
+def test_max_age_filters_lookups_but_not_the_raw_events():
+    events_store = EventStore(max_age=3600)
+    events_store.replace([event("ns-1", "web", "BackOff"), event("ns-1", "db", "Unhealthy")], "1")
+    recent = event("ns-1", "api", "Pulled")
+    recent["lastTimestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() - 60))
+    events_store.upsert(recent)
+    assert [record.name for record in events_store.query(namespace="ns-1")] == ["api"]
+    assert len(events_store.items()) == 3
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+import pytest
+
+from executor import CommandExecutor, CommandTimeout
+
+
+def test_timed_out_call_keeps_its_slot_until_the_thread_returns():
+    async def main():
+        executor = CommandExecutor(max_concurrency=1, timeout=5)
+        with pytest.raises(CommandTimeout):
+            await executor.run_blocking(time.sleep, 0.3, timeout=0.05)
+        assert executor.in_flight == 1
+        started = time.monotonic()
+        assert await executor.run_blocking(lambda: "next") == "next"
+        assert time.monotonic() - started > 0.15
+        assert executor.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_call_keeps_its_slot_and_spares_others():
+    async def main():
+        executor = CommandExecutor(max_concurrency=2, timeout=5)
+        slow = asyncio.create_task(executor.run_blocking(time.sleep, 0.3))
+        other = asyncio.create_task(executor.run_blocking(lambda: time.sleep(0.1) or "other"))
+        await asyncio.sleep(0.05)
+        slow.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await slow
+        assert executor.in_flight == 2
+        assert await other == "other"
+        await asyncio.sleep(0.35)
+        assert executor.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_abandoned_call_error_is_not_reraised():
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("late")
+
+    async def main():
+        executor = CommandExecutor(max_concurrency=1)
+        with pytest.raises(CommandTimeout):
+            await executor.run_blocking(fail, timeout=0.01)
+        await asyncio.sleep(0.2)
+        assert executor.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_command_timeout_and_cancellation_kill_the_child():
+    async def main():
+        executor = CommandExecutor(max_concurrency=1, timeout=5)
+        started = time.monotonic()
+        with pytest.raises(CommandTimeout):
+            await executor.run(["sleep", "5"], timeout=0.1)
+        task = asyncio.create_task(executor.run(["sleep", "5"]))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert time.monotonic() - started < 2
+        assert executor.in_flight == 0
+        assert (await executor.run(["echo", "ok"])).stdout == "ok\n"
+
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from backend import ApiBackend
+from bench.fakecluster import FakeCluster, kubeconfig, serve
+from config import Config
+from executor import CommandExecutor
+from informer import Informer
+from mcp_server import KubernetesMCPServer
+
+
+@pytest.fixture
+def cluster(tmp_path, monkeypatch):
+    """A 50-pod fake cluster served on a free port, with KUBECONFIG pointing at it"""
+    fake = FakeCluster(50)
+    server = serve(fake)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    path = tmp_path / "kubeconfig"
+    path.write_text(kubeconfig(f"http://127.0.0.1:{server.server_address[1]}"))
+    monkeypatch.setenv("KUBECONFIG", str(path))
+    # The client reads KUBECONFIG once, when it is imported
+    monkeypatch.setattr("kubernetes.config.kube_config.KUBE_CONFIG_DEFAULT_LOCATION", str(path))
+    monkeypatch.setenv("K8S_MCP_DISCOVERY_CACHE", str(tmp_path / "discovery.json"))
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def pod(fake, i, version, **labels):
+    obj = json.loads(fake.pod(i))
+    obj["metadata"]["resourceVersion"] = version
+    obj["metadata"]["labels"].update(labels)
+    return obj
+
+
+def key(obj):
+    return f"{obj['metadata']['namespace']}/{obj['metadata']['name']}"
+
+
+async def until(condition, timeout=10):
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError("timed out waiting for the informer")
+
+
+def run_informer(test, **options):
+    async def main():
+        informer = Informer(ApiBackend(CommandExecutor(timeout=10)), "pods", compact=True, **options)
+        informer.start()
+        try:
+            await informer.wait_ready(10)
+            await test(informer)
+        finally:
+            await informer.stop()
+            informer.backend.close()
+
+    asyncio.run(main())
+
+
+def test_relists_when_the_watch_reports_410_gone(cluster):
+    cluster.queue_watch("pods", {"type": "ERROR", "object": {"kind": "Status", "code": 410, "reason": "Expired"}})
+
+    async def test(informer):
+        await until(lambda: informer.relists == 2)
+        assert len(informer.store) == 50 and informer.last_error is None
+        assert [query["resourceVersion"] for _, query in cluster.watch_requests] == ["200000", "200000"]
+
+    run_informer(test)
+
+
+def test_watch_resumes_from_the_last_bookmark(cluster):
+    changed = pod(cluster, 0, "200001", release="canary")
+    cluster.queue_watch(
+        "pods", {"type": "MODIFIED", "object": changed}, {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "200007"}}},
+    )
+
+    async def test(informer):
+        # The first stream closes after timeoutSeconds; the next one starts at the bookmark
+        await until(lambda: len(cluster.watch_requests) == 2)
+        assert cluster.watch_requests[1][1]["resourceVersion"] == "200007"
+        assert informer.relists == 1
+        assert informer.store.get(key(changed))["metadata"]["labels"]["release"] == "canary"
+
+    run_informer(test, watch_timeout=1)
+
+
+def test_delta_reads_report_tombstones_and_resync_past_the_change_log(cluster, monkeypatch):
+    monkeypatch.setenv("K8S_MCP_CHANGE_LOG_SIZE", "2")
+    added, removed, changed = pod(cluster, 0, "200001"), pod(cluster, 1, "200002"), pod(cluster, 2, "200003", release="canary")
+    added["metadata"]["name"] = "new-pod"
+    cluster.queue_watch(
+        "pods",
+        {"type": "ADDED", "object": added},
+        {"type": "DELETED", "object": removed},
+        {"type": "MODIFIED", "object": changed},
+    )
+
+    async def main():
+        server = KubernetesMCPServer(Config())
+        try:
+            # The first delta read starts the watch
+            await server.read_resource_text("k8s://pods?since=200000")
+            store = server.default.informers["pods"].store
+            await until(lambda: store.resource_version == "200003")
+
+            delta = json.loads(await server.read_resource_text("k8s://pods?since=200001"))
+            assert delta["metadata"]["resourceVersion"] == "200003" and "resync" not in delta
+            assert delta["deleted"] == [{"namespace": removed["metadata"]["namespace"], "name": removed["metadata"]["name"]}]
+            assert delta["added"] == []
+            assert [obj["metadata"]["labels"]["release"] for obj in delta["modified"]] == ["canary"]
+
+            # Three changes since 200000 but a log of two: the whole list comes back
+            resync = json.loads(await server.read_resource_text("k8s://pods?since=200000"))
+            assert resync["resync"] is True and len(resync["items"]) == 50
+            assert key(removed) not in {key(obj) for obj in resync["items"]}
+        finally:
+            await server.stop()
+
+    asyncio.run(main())
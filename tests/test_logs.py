@@ -0,0 +1,63 @@
+import asyncio
+
+from logs import LogSearch, log_query
+
+LINES = [
+    b"2026-10-18T03:27:05.000000000Z level=info msg=started",
+    b"2026-10-18T03:27:06.000000000Z level=error msg=timeout talking to db",
+    b"2026-10-18T03:27:07.000000000Z retrying level=warn",
+]
+
+
+class FakeBackend:
+    def stream_logs(self, namespace, pod, timeout=None, **query):
+        async def lines():
+            for line in LINES:
+                yield line
+
+        return lines()
+
+
+def search(pattern):
+    log_search = LogSearch(FakeBackend(), pattern, {"limitBytes": 1 << 20})
+    return asyncio.run(log_search.run([("ns", "pod", "main")]))
+
+
+def test_anchored_pattern_matches_message_start():
+    matches = search("^level=")
+    assert [match.line for match in matches] == ["level=info msg=started", "level=error msg=timeout talking to db"]
+    assert matches[0].timestamp == "2026-10-18T03:27:05.000000000Z"
+
+
+def test_pattern_does_not_match_timestamp():
+    assert search(r"\d{4}-\d{2}-\d{2}") == []
+    assert [match.line for match in search("timeout")] == ["level=error msg=timeout talking to db"]
+
+
+class SlowCloseBackend:
+    """Every container matches on every line; closing a stream takes a while"""
+
+    def stream_logs(self, namespace, pod, timeout=None, **query):
+        async def lines():
+            try:
+                for second in range(100):
+                    yield f"2026-10-18T03:27:{second % 60:02d}.000000000Z {pod} error".encode()
+                    await asyncio.sleep(0)
+            finally:
+                await asyncio.sleep(0.01)
+
+        return lines()
+
+
+def test_search_stops_at_max_matches_across_streams():
+    log_search = LogSearch(SlowCloseBackend(), "error", {"limitBytes": 1 << 20}, max_matches=5, concurrency=10)
+    targets = [("ns", f"pod-{index}", "main") for index in range(10)]
+    matches = asyncio.run(log_search.run(targets))
+    assert len(matches) == 5
+    assert log_search.stopped_early
+
+
+def test_follow_starts_from_the_default_tail():
+    assert log_query({"follow": True}, 1024)["tailLines"] == 50
+    assert "tailLines" not in log_query({"follow": True, "since_seconds": 60}, 1024)
+    assert log_query({"follow": True, "tail_lines": 5}, 1024)["tailLines"] == 5
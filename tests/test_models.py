@@ -0,0 +1,25 @@
+import json
+
+from analysis import index_events
+from models import Event, page_continue
+
+
+def event(type=None, name="web-1"):
+    body = {"involvedObject": {"kind": "Pod", "namespace": "shop", "name": name}, "reason": "BackOff", "count": 2}
+    if type is not None:
+        body["type"] = type
+    return body
+
+
+def test_untyped_events_are_not_warnings():
+    assert Event.from_dict(event()).type is None
+    events = [Event.from_dict(event()), Event.from_dict(event("Normal", "web-2")), Event.from_dict(event("Warning", "web-3"))]
+    assert list(index_events(events)) == [("shop", "Pod", "web-3")]
+
+
+def test_continue_token_is_read_ahead_of_the_items():
+    page = {"kind": "PodList", "metadata": {"resourceVersion": "7", "continue": "abc"}, "items": [event()]}
+    assert page_continue(json.dumps(page).encode()) == (True, "abc")
+    assert page_continue(json.dumps(dict(page, metadata={"resourceVersion": "7"})).encode()) == (True, None)
+    # Items ahead of the metadata: the token is only known once the page is decoded
+    assert page_continue(json.dumps({"items": [], "metadata": {"continue": "abc"}}).encode()) == (False, None)
@@ -0,0 +1,289 @@
+"""
+Resource usage history for the Kubernetes MCP Server
+
+A MetricsPoller samples the metrics.k8s.io API (node and pod metrics, as
+served by metrics-server) at a fixed interval and appends every sample to a
+per-node, per-pod and per-container Series. A Series is a ring buffer over
+three preallocated arrays, so its memory is fixed no matter how long the
+server runs; windowed statistics (current, p50/p95/max, memory trend) are
+computed from that local history without further API calls.
+"""
+
+import asyncio
+import math
+import time
+from array import array
+
+from summaries import format_table, parse_time
+
+# Decimal and binary suffixes of Kubernetes resource quantities
+_QUANTITY_SUFFIXES = {
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1.0,
+    "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2.0 ** 10, "Mi": 2.0 ** 20, "Gi": 2.0 ** 30, "Ti": 2.0 ** 40, "Pi": 2.0 ** 50, "Ei": 2.0 ** 60,
+}
+
+
+def parse_quantity(value):
+    """Convert a quantity such as 250m, 12345n or 512Mi to a float (cores or bytes)"""
+    if value is None:
+        return 0.0
+    value = str(value).strip()
+    for length in (2, 1):
+        suffix = value[-length:]
+        if suffix in _QUANTITY_SUFFIXES and not suffix.isdigit():
+            return float(value[:-length]) * _QUANTITY_SUFFIXES[suffix]
+    return float(value)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+
+class Series:
+    """Fixed-capacity ring buffer of (time, cpu cores, memory bytes) samples"""
+
+    __slots__ = ("times", "cpu", "memory", "next", "size")
+
+    def __init__(self, capacity):
+        self.times = array("d", bytes(8 * capacity))
+        self.cpu = array("f", bytes(4 * capacity))
+        self.memory = array("d", bytes(8 * capacity))
+        self.next = 0
+        self.size = 0
+
+    @property
+    def capacity(self):
+        return len(self.times)
+
+    @property
+    def last_time(self):
+        return self.times[self.next - 1] if self.size else None
+
+    def append(self, timestamp, cpu, memory):
+        """Record a sample; repeats of the last sample time are ignored"""
+        if self.size and timestamp <= self.last_time:
+            return False
+        self.times[self.next] = timestamp
+        self.cpu[self.next] = cpu
+        self.memory[self.next] = memory
+        self.next = (self.next + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+        return True
+
+    def window(self, since):
+        """(times, cpu, memory) lists of the samples taken at or after `since`, oldest first"""
+        times, cpu, memory = [], [], []
+        capacity = self.capacity
+        for offset in range(self.size, 0, -1):
+            index = (self.next - offset) % capacity
+            if self.times[index] >= since:
+                times.append(self.times[index])
+                cpu.append(self.cpu[index])
+                memory.append(self.memory[index])
+        return times, cpu, memory
+
+    def stats(self, window_seconds, now=None):
+        """Current value, p50/p95/max and trend of cpu and memory over a window"""
+        now = now or time.time()
+        times, cpu, memory = self.window(now - window_seconds)
+        if not times:
+            return None
+        result = {
+            "samples": len(times),
+            "window_seconds": round(times[-1] - times[0], 1),
+            "last_sample": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(times[-1])),
+        }
+        for name, values in (("cpu_cores", cpu), ("memory_bytes", memory)):
+            ordered = sorted(values)
+            result[name] = {
+                "current": round(values[-1], 4),
+                "p50": round(percentile(ordered, 0.5), 4),
+                "p95": round(percentile(ordered, 0.95), 4),
+                "max": round(ordered[-1], 4),
+                # Least-squares slope, in units per minute
+                "trend_per_minute": round(_slope(times, values) * 60, 4),
+            }
+        return result
+
+
+def _slope(times, values):
+    n = len(times)
+    if n < 2:
+        return 0.0
+    mean_t = sum(times) / n
+    mean_v = sum(values) / n
+    denominator = sum((t - mean_t) ** 2 for t in times)
+    if not denominator:
+        return 0.0
+    return sum((t - mean_t) * (v - mean_v) for t, v in zip(times, values)) / denominator
+
+
+class UsageHistory:
+    """Series for every node, pod and container, keyed by ("node", name), ("pod", ns, name) or ("container", ns, pod, name)"""
+
+    def __init__(self, capacity=240, max_series=50000):
+        self.capacity = capacity
+        self.max_series = max_series
+        self.series = {}
+        self.dropped = 0
+
+    def record(self, key, timestamp, cpu, memory):
+        series = self.series.get(key)
+        if series is None:
+            if len(self.series) >= self.max_series:
+                self.dropped += 1
+                return
+            series = self.series[key] = Series(self.capacity)
+        series.append(timestamp, cpu, memory)
+
+    def add_node_metrics(self, items):
+        for item in items:
+            timestamp = _sample_time(item)
+            usage = item.get("usage") or {}
+            self.record(
+                ("node", item.get("metadata", {}).get("name")), timestamp,
+                parse_quantity(usage.get("cpu")), parse_quantity(usage.get("memory")),
+            )
+
+    def add_pod_metrics(self, items):
+        for item in items:
+            metadata = item.get("metadata", {})
+            namespace, name = metadata.get("namespace"), metadata.get("name")
+            timestamp = _sample_time(item)
+            pod_cpu = pod_memory = 0.0
+            for container in item.get("containers") or []:
+                usage = container.get("usage") or {}
+                cpu, memory = parse_quantity(usage.get("cpu")), parse_quantity(usage.get("memory"))
+                pod_cpu += cpu
+                pod_memory += memory
+                self.record(("container", namespace, name, container.get("name")), timestamp, cpu, memory)
+            self.record(("pod", namespace, name), timestamp, pod_cpu, pod_memory)
+
+    def prune(self, older_than):
+        """Drop series (e.g. of deleted pods) with no sample since `older_than`"""
+        stale = [key for key, series in self.series.items() if (series.last_time or 0) < older_than]
+        for key in stale:
+            del self.series[key]
+        return len(stale)
+
+    def select(self, kind, namespace=None, name=None, container=None):
+        """Keys of one kind's series, filtered by namespace/name/container"""
+        for key in self.series:
+            if key[0] != kind:
+                continue
+            if kind == "node":
+                if name and key[1] != name:
+                    continue
+            else:
+                if namespace and key[1] != namespace:
+                    continue
+                if name and key[2] != name:
+                    continue
+                if container and kind == "container" and key[3] != container:
+                    continue
+            yield key
+
+    def memory_bytes(self):
+        """Bytes held by the sample arrays"""
+        per_series = self.capacity * (8 + 4 + 8)  # times, cpu, memory
+        return per_series * len(self.series)
+
+
+def _sample_time(item):
+    parsed = parse_time(item.get("timestamp"))
+    return parsed.timestamp() if parsed is not None else time.time()
+
+
+class MetricsPoller:
+    """Periodically samples node and pod metrics into a UsageHistory"""
+
+    def __init__(self, backend, interval=15.0, capacity=240, max_series=50000):
+        self.backend = backend
+        self.interval = interval
+        self.history = UsageHistory(capacity, max_series)
+        self.polls = 0
+        self.last_poll = None
+        self.last_error = None
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="metrics poller")
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                await self.poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+            await asyncio.sleep(self.interval)
+
+    async def poll(self):
+        nodes, pods = await asyncio.gather(
+            self.backend.list("nodemetrics"), self.backend.list("podmetrics"), return_exceptions=True
+        )
+        for result in (nodes, pods):
+            if isinstance(result, BaseException):
+                raise result
+        self.history.add_node_metrics(nodes.get("items", []))
+        self.history.add_pod_metrics(pods.get("items", []))
+        # Forget pods that have not reported for a full history's worth of polls
+        self.history.prune(time.time() - self.interval * self.history.capacity)
+        self.polls += 1
+        self.last_poll = time.time()
+        self.last_error = None
+
+    def status(self):
+        return {
+            "interval": self.interval,
+            "polls": self.polls,
+            "last_poll_age_seconds": round(time.time() - self.last_poll, 1) if self.last_poll else None,
+            "series": len(self.history.series),
+            "series_dropped": self.history.dropped,
+            "history_bytes": self.history.memory_bytes(),
+            "last_error": self.last_error,
+        }
+
+
+def usage_table(history, kind, keys, window_seconds, sort_by="cpu", top=20, now=None):
+    """Text table of windowed usage for some series, heaviest first"""
+    rows = []
+    for key in keys:
+        stats = history.series[key].stats(window_seconds, now)
+        if stats is not None:
+            rows.append((key, stats))
+    field = "memory_bytes" if sort_by == "memory" else "cpu_cores"
+    rows.sort(key=lambda row: row[1][field]["current"], reverse=True)
+    headers = ["NAME", "CPU(m)", "CPU P95(m)", "MEMORY(Mi)", "MEMORY P95(Mi)", "MEMORY MAX(Mi)", "MEMORY TREND(Mi/min)", "SAMPLES"]
+    table = []
+    for key, stats in rows[:top]:
+        cpu, memory = stats["cpu_cores"], stats["memory_bytes"]
+        table.append([
+            "/".join(str(part) for part in key[1:]),
+            f"{cpu['current'] * 1000:.0f}",
+            f"{cpu['p95'] * 1000:.0f}",
+            f"{memory['current'] / 2 ** 20:.1f}",
+            f"{memory['p95'] / 2 ** 20:.1f}",
+            f"{memory['max'] / 2 ** 20:.1f}",
+            f"{memory['trend_per_minute'] / 2 ** 20:+.2f}",
+            str(stats["samples"]),
+        ])
+    if not table:
+        return f"No {kind} usage samples in the last {window_seconds:g} seconds\n"
+    return format_table(headers, table)